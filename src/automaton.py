@@ -1,13 +1,20 @@
-from rules import rules
-from classes import HOMOGENEOUS, PERIODIC, CHAOTIC, COMPLEX
-from PIL import Image
+from rules import rules, apply_lookup_table, get_composite_rule
+from classes import RULE_CLASSES
+from cycle_detection import CYCLE_WINDOW, CycleDetector, tile_cycle
+from image_writer import grid_image, save_grid_image
+from instrumentation import NO_INSTRUMENTATION
+from registry import get_registry
 
 import numpy as np
 
 import os
 
+# Output directories already checked (or created) by this process
+_known_directories = set()
+
 class CellularAutomaton:
-    def __init__(self, size: int, steps: int, rule: int, rule2: int=None, begin_type: str='random', zip_mode: bool=False, index:int=None):
+    def __init__(self, size: int, steps: int, rule: int, rule2: int=None, begin_type: str='random', zip_mode: bool=False, index:int=None, engine: str='numpy',
+                 cycle_window: int=CYCLE_WINDOW):
         """
         Constructor for the CellularAutomaton class.
 
@@ -17,6 +24,14 @@ class CellularAutomaton:
         :param rule2: int (optional), a second rule for alternation (zip mode).
         :param begin_type: str, initial state of the cells, 'random' or 'center'.
         :param zip_mode: bool, whether to alternate between two rules at each step.
+        :param index: int (optional), execution index used to build the output path.
+        :param engine: str, evolution engine, 'numpy' (whole-row lookup table) or 'dict' (cell by cell reference).
+        :param cycle_window: int, number of recent checked rows (one every CYCLE_STRIDE steps) each new checked row is
+                             compared with (up to a rotation) by 'run'. On by default: once a row repeats, the rest of
+                             the grid is filled by tiling the cycle instead of being simulated. A period p is detected
+                             when p // gcd(p, CYCLE_STRIDE) <= cycle_window. 0 disables it (every row is simulated).
+                             Ignored by the 'dict' engine, which always simulates every row: it is the reference the
+                             other engines are checked against, so it does not share their cycle detection.
         """
 
         self.__size = size
@@ -24,10 +39,16 @@ class CellularAutomaton:
         self.__zip_mode = None # @FIXME: Fazer zip_mode com herança
         self.__rule = None
         self.__rule2 = None
+        self.__composite_rule = None
         self.__begin_type = None
         self.__label = ''
         self.__index = index
         self.__previous_execs = None
+        self.__exec_reserved = False
+        self.__cycle = None
+        self.__engine = self.__validate_engine(engine)
+        # O motor de referência simula todas as linhas, independente da detecção de ciclos que ele valida
+        self.__cycle_window = 0 if self.__engine == 'dict' else cycle_window
         self.__validate_path('../results/')
         self.calculate_previous_execs()
 
@@ -86,6 +107,15 @@ class CellularAutomaton:
         else:
             self.__begin_type = begin_type
 
+    @staticmethod
+    def __validate_engine(engine):
+        """
+        Validate the evolution engine.
+        """
+        if engine not in ['numpy', 'dict']:
+            raise ValueError("\033[31m[ERROR] Invalid engine. Use 'numpy' or 'dict'.\033[0m")
+        return engine
+
     def __validate_creation(self, begin_type):
         """
         Validate the creation of the cellular automaton.
@@ -113,26 +143,24 @@ class CellularAutomaton:
         #     raise ValueError("Invalid path. Must be a PNG file.")
         
         directory = os.path.dirname(path)
+        if directory in _known_directories:
+            return
         if not os.path.exists(directory):
             print(f"Creating directory: {directory}")
-            os.makedirs(directory)  # Cria o diretório se ele não existir
+            os.makedirs(directory, exist_ok=True)  # Cria o diretório se ele não existir (outro worker pode criá-lo ao mesmo tempo)
+        _known_directories.add(directory)
 
     @staticmethod
     def __validate_class(rule):
         """
         Validate the class of the cellular automaton.
         """
-        if rule in HOMOGENEOUS.get_rules():
-            return HOMOGENEOUS
-        elif rule in PERIODIC.get_rules():
-            return PERIODIC
-        elif rule in CHAOTIC.get_rules():
-            return CHAOTIC
-        elif rule in COMPLEX.get_rules():
-            return COMPLEX
-        else:
+        # Consulta em O(1) no índice regra -> classe (classes.py)
+        rule_class = RULE_CLASSES[rule] if 0 <= rule < len(RULE_CLASSES) else None
+        if rule_class is None:
             # raise Warning("[!] Rule: {} does not match any class.".format(rule))
             raise ValueError('\033[31m[ERROR] Rule:', rule ,'does not match any class. Something went wrong.' + '\033[0m')
+        return rule_class
 
     #### RULE GENERATION METHODS ####
 
@@ -156,12 +184,34 @@ class CellularAutomaton:
         self.__rule = self.__get_rule_obj(rule)
         self.__rule2 = self.__get_rule_obj(rule2) if rule2 is not None else None
 
+        # A composição das duas regras é uma única regra de raio 2, aplicada em uma passada só
+        self.__composite_rule = get_composite_rule(rule, rule2) if rule2 is not None else None
+
 
     #### SIMULATION METHODS ####
 
     def __evolve(self, step):
         """
-        Calculate the next state of the automaton for a given step.
+        Calculate the next state of the automaton for a given step, using the selected engine.
+        :param step: int, the current step in the simulation.
+        """
+        if self.__engine == 'numpy':
+            self.__evolve_numpy(step)
+        else:
+            self.__evolve_dict(step)
+
+    def __evolve_numpy(self, step):
+        """
+        Calculate the next state of the whole row at once, through the rule lookup table.
+        When there is a second rule, the 32-entry table of the composite rule is used instead.
+        :param step: int, the current step in the simulation.
+        """
+        rule = self.__composite_rule if self.__composite_rule is not None else self.__rule
+        self.__grid[step + 1] = apply_lookup_table(self.__grid[step], rule.get_lookup_table())
+
+    def __evolve_dict(self, step):
+        """
+        Calculate the next state cell by cell, through the rule dictionary (reference engine).
         :param step: int, the current step in the simulation.
         """
         next_state = self.__grid[step].copy()  # Cria uma cópia temporária para evitar alterações diretas
@@ -194,18 +244,94 @@ class CellularAutomaton:
             # Copia o resultado final para a matriz do grid
             self.__grid[step + 1] = temp_state.copy()
 
-    def __get_grid(self):
+    def stream(self, steps: int = None, block_rows: int = 1):
+        """
+        Generate the evolution block by block, without storing the grid: only the current row and one
+        block are kept in memory, so the number of steps is not limited by the size of the grid.
+        The rows always come from the whole-row lookup table (the result of both engines is the same).
+        Build the automaton with steps=0 to avoid allocating a grid at all.
+
+        :param steps: int (optional), number of steps to generate. Defaults to the steps of the automaton.
+        :param block_rows: int, number of rows in each yielded block.
+        :return: generator of np.ndarray (bool), blocks of shape (n, size), starting with the initial state.
+                 The block buffer is reused: copy a block to keep it after the next iteration.
+        """
+        steps = self.__steps - 1 if steps is None else steps
+        rule = self.__composite_rule if self.__composite_rule is not None else self.__rule
+        table = rule.get_lookup_table()
+
+        block = np.empty((block_rows, self.__size), dtype=bool)
+        state = self.__grid[0].copy()
+        filled = 0
+        for step in range(steps + 1):
+            block[filled] = state
+            filled += 1
+            if filled == block_rows:
+                yield block
+                filled = 0
+            if step < steps:
+                state = apply_lookup_table(state, table)
+
+        if filled:
+            yield block[:filled]
+
+    def get_grid(self):
         """
         Return the grid.
         """
         return self.__grid
 
+    def set_grid(self, grid):
+        """
+        Replace the grid by an already simulated one (e.g. computed by a BatchAutomaton).
+        """
+        if np.shape(grid) != self.__grid.shape:
+            raise ValueError(f"\033[31m[ERROR] Grid must have shape {self.__grid.shape}.\033[0m")
+        self.__grid[...] = grid
+        self.__cycle = None
+
+    def get_engine(self):
+        """
+        Return the evolution engine.
+        """
+        return self.__engine
+
+    def get_rules(self):
+        """
+        Return the rule number and the second rule number (None without composition).
+        """
+        return self.__rule.get_number(), None if self.__rule2 is None else self.__rule2.get_number()
+
     def run(self):
         """
-        Run the simulation.
+        Run the simulation. When the rows fall into a fixed point or a (possibly shifted) cycle, the
+        remaining rows are tiled instead of simulated.
+        :return: dict, the cycle found, with its 'transient' (first step of the cycle), 'period' and 'shift' (each
+                 row is np.roll of the row 'period' steps before by 'shift'), or None if the rows did not repeat
+                 within the window or cycle detection is off. Also kept until the next run (see 'get_cycle').
         """
+        self.__cycle = None
+        detector = CycleDetector(self.__grid[None], self.__cycle_window) if self.__cycle_window else None
+        if detector is not None:
+            detector.observe(0)
+
         for step in range(self.__steps - 1):
             self.__evolve(step)
+            if detector is None:
+                continue
+            cycles = detector.observe(step + 1)
+            if cycles:
+                self.__cycle = cycles[0]
+                tile_cycle(self.__grid, self.__cycle, step + 1)
+                break
+        return self.__cycle
+
+    def get_cycle(self):
+        """
+        Return the cycle found by the last 'run' as a dict ('transient', 'period' and 'shift'), or None
+        if the rows did not repeat within the window (or the grid was set with 'set_grid').
+        """
+        return self.__cycle
 
     def get_initial_state(self):
         """
@@ -260,6 +386,7 @@ class CellularAutomaton:
         self.__validate_creation(begin_type)
         
         self.__reset_grid()
+        self.__cycle = None
 
     def __reset_grid(self):
         if self.__begin_type == 'random':
@@ -275,26 +402,31 @@ class CellularAutomaton:
 
     ### IMAGE GENERATION METHODS ###
 
-    def __get_image_array(self):
-        """
-        Return the grid as an image.
-        """
-        return (~self.__grid).astype(np.uint8) * 255
-    
     def __get_image(self, scale=1):
         """
         Return the grid as an image.
         """
         self.__validate_scale(scale)
-        img_arr = self.__get_image_array()
-        return Image.fromarray(np.kron(img_arr, np.ones((scale, scale), dtype=np.uint8)), mode='L')
+        return grid_image(self.__grid, scale)
     
-    def save_image(self, scale=1):
+    def save_image(self, scale=1, instrumentation=NO_INSTRUMENTATION):
         """
-        Save the grid as an image.
+        Save the grid as an image. With an execution index, the first save reserves the execution ID of the output path
+        in the registry (see 'calculate_previous_execs').
+        :param instrumentation: Instrumentation (optional), where the rendering, encoding and writing are timed.
         """
-        self.__validate_path(self.__label)
-        self.__get_image(scale).save(self.__label, 'PNG')
+        key = self.get_rules()
+        with instrumentation.phase('write', key):
+            self.__reserve_exec()
+            self.__validate_path(self.__label)
+        self.__validate_scale(scale)
+        try:
+            save_grid_image(self.__grid, self.__label, scale, instrumentation=instrumentation, key=key)
+        except FileNotFoundError:
+            # O diretório foi apagado depois de verificado: verifica de novo e tenta outra vez
+            _known_directories.discard(os.path.dirname(self.__label))
+            self.__validate_path(self.__label)
+            save_grid_image(self.__grid, self.__label, scale, instrumentation=instrumentation, key=key)
 
     def show_image(self, scale=1):
         """
@@ -351,24 +483,55 @@ class CellularAutomaton:
 
     def calculate_previous_execs(self):
         """
-        Calculate the number of previous executions.
+        Calculate the number of previous executions (the next execution ID of the registry). The ID is only peeked at,
+        so building an automaton writes nothing; it is reserved by the first 'save_image', so two automata saving at
+        the same time never share an 'exec_N' folder.
         """
 
-        self.__previous_execs = sum(
-            1 for item in os.listdir('../results')
-            if os.path.isdir(os.path.join('../results', item)) and 'exec' in item
+        self.__previous_execs = get_registry('../results/').peek()
+        self.__exec_reserved = False
+
+    def __reserve_exec(self):
+        """
+        Reserve the execution ID of the output path in the registry, unless it is already reserved (by an earlier save,
+        or by the caller of 'set_previous_execs', e.g. a Simulation, which reserves the IDs of its whole run).
+        """
+        if self.__exec_reserved or self.__index is None or self.__index < 0:
+            return
+        rule, rule2 = self.get_rules()
+        exec = get_registry('../results/').reserve(
+            1, sim_type='automaton', size=self.__size, steps=self.__steps - 1, rule=rule, rule2=rule2, engine=self.__engine,
         )
+        # O índice da execução é mantido: só o número de execuções anteriores muda para apontar ao ID reservado
+        self.__previous_execs = exec - self.__index
+        self.__exec_reserved = True
+        self.__set_label()
 
     def set_previous_execs(self, previous_execs):
         """
-        Set the number of previous executions
+        Set the number of previous executions, whose IDs the caller has already reserved in the registry
         """
 
         self.__previous_execs = previous_execs
+        self.__exec_reserved = True
 
     def get_previous_execs(self):
         """
         Return the number of previous executions
         """
 
-        return self.__previous_execs
\ No newline at end of file
+        return self.__previous_execs
+
+    def get_index(self):
+        """
+        Return the execution index of the current run, or None.
+        """
+        return self.__index
+
+    def get_exec(self):
+        """
+        Return the execution number used in the output path (index + previous executions), or None.
+        """
+        if self.__index is None or self.__index < 0 or self.__previous_execs is None:
+            return None
+        return self.__index + self.__previous_execs
\ No newline at end of file
@@ -0,0 +1,139 @@
+from rules import rules, apply_lookup_tables, lookup_tables, composite_tables_for
+from cycle_detection import CYCLE_WINDOW, CycleDetector, tile_cycle
+
+import numpy as np
+
+class BatchAutomaton:
+    def __init__(self, size: int, steps: int, rule_numbers, rule2_numbers=None, initial_state=None, cycle_window: int = CYCLE_WINDOW):
+        """
+        Constructor for the BatchAutomaton class.
+        Evolves several rules (or rule compositions) from the same initial state at once:
+        every generation of every rule is computed by a single array operation over a
+        (n_rules, size) state tensor, with one lookup table per row.
+
+        :param size: int, number of cells (grid width).
+        :param steps: int, number of steps (time stamps) to simulate.
+        :param rule_numbers: iterable of int, the rules to simulate.
+        :param rule2_numbers: iterable of int (optional), second rule of each composition, same length as 'rule_numbers'.
+        :param initial_state: np.ndarray (bool) (optional), initial row shared by every rule. Random if not given.
+        :param cycle_window: int, number of recent checked rows (one every CYCLE_STRIDE steps) each new checked row is
+                             compared with (up to a rotation). On by default: a rule whose rows repeat leaves the batch
+                             and the rest of its grid is tiled instead of simulated. A period p is detected when
+                             p // gcd(p, CYCLE_STRIDE) <= cycle_window. 0 disables it (every row is simulated).
+        """
+
+        self.__size = size
+        self.__steps = steps + 1
+        self.__rules = self.__validate_rules(rule_numbers)
+        self.__rules2 = self.__validate_rules(rule2_numbers) if rule2_numbers is not None else None
+        self.__cycle_window = cycle_window
+        self.__cycles = [None] * len(self.__rules)
+
+        if self.__rules2 is not None and len(self.__rules2) != len(self.__rules):
+            raise ValueError("\033[31m[ERROR] 'rule2_numbers' must have the same length as 'rule_numbers'.\033[0m")
+
+        # Compositions use the 32-entry composite tables, so each generation is still a single pass
+        if self.__rules2 is None:
+            self.__tables = lookup_tables(self.__rules)
+        else:
+            self.__tables = composite_tables_for(zip(self.__rules, self.__rules2))
+
+        ## GRID INITIALIZATION ##
+        self.__grid = np.zeros((len(self.__rules), self.__steps, self.__size), dtype=bool)
+        if initial_state is None:
+            initial_state = np.random.randint(0, 2, self.__size, dtype=bool)
+        self.set_initial_state(initial_state)
+
+
+    #### VALIDATION METHODS ####
+
+    @staticmethod
+    def __validate_rules(rule_numbers):
+        """
+        Validate a list of rule numbers.
+        """
+        rule_numbers = list(rule_numbers)
+        if not rule_numbers:
+            raise ValueError("\033[31m[ERROR] At least one rule must be given.\033[0m")
+        for rule in rule_numbers:
+            if rule not in rules:
+                raise ValueError("\033[31m[ERROR] Invalid rule number. Must be in the range 0-255.\033[0m")
+        return rule_numbers
+
+
+    #### SIMULATION METHODS ####
+
+    def __evolve(self, step, active):
+        """
+        Calculate the next state of the active rules for a given step.
+        :param step: int, the current step in the simulation.
+        :param active: np.ndarray (int), positions of the rules still being simulated.
+        """
+        if len(active) == len(self.__rules):
+            self.__grid[:, step + 1] = apply_lookup_tables(self.__grid[:, step], self.__tables)
+        else:
+            self.__grid[active, step + 1] = apply_lookup_tables(self.__grid[active, step], self.__tables[active])
+
+    def run(self):
+        """
+        Run the simulation for every rule. A rule whose rows fall into a fixed point or a (possibly
+        shifted) cycle stops being simulated: the rest of its grid is tiled (see 'get_cycle').
+        """
+        self.__cycles = [None] * len(self.__rules)
+        active = np.arange(len(self.__rules))
+        detector = CycleDetector(self.__grid, self.__cycle_window) if self.__cycle_window else None
+        if detector is not None:
+            detector.observe(0, active)
+
+        for step in range(self.__steps - 1):
+            if not len(active):
+                break
+            self.__evolve(step, active)
+            if detector is None:
+                continue
+
+            cycles = detector.observe(step + 1, active)
+            for position, cycle in cycles.items():
+                self.__cycles[position] = cycle
+                tile_cycle(self.__grid[position], cycle, step + 1)
+            if cycles:
+                active = active[[position not in cycles for position in active.tolist()]]
+
+    def set_initial_state(self, initial_state):
+        """
+        Set the initial state shared by every rule.
+        """
+        if len(initial_state) != self.__size:
+            raise ValueError("\033[31m[ERROR] Initial state must have the same size as the grid.\033[0m")
+        self.__grid[:, 0] = initial_state
+
+
+    ### GETTERS ###
+
+    def __len__(self):
+        return len(self.__rules)
+
+    def get_rules(self):
+        """
+        Return the (rule, rule2) pair of each row of the batch; rule2 is None when there is no composition.
+        """
+        rules2 = self.__rules2 if self.__rules2 is not None else [None] * len(self.__rules)
+        return list(zip(self.__rules, rules2))
+
+    def get_grid(self, index):
+        """
+        Return the grid of the rule at position 'index' of the batch (a view, not a copy).
+        """
+        return self.__grid[index]
+
+    def get_cycle(self, index):
+        """
+        Return the cycle of the rule at position 'index' found by 'run' ('transient', 'period' and 'shift'), or None.
+        """
+        return self.__cycles[index]
+
+    def get_grids(self):
+        """
+        Return the full (n_rules, steps + 1, size) tensor.
+        """
+        return self.__grid
@@ -0,0 +1,511 @@
+# File: benchmarks.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Benchmarks for the cellular automaton evolution engines, and a regression suite
+#              over the hot paths that writes JSON results and compares them with a baseline.
+#              Run from the 'src' directory: python benchmarks.py (the correctness checks of the
+#              engines are in the test suite, 'tests/').
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from automaton import CellularAutomaton
+from binary_lifting import BinaryLifting
+from classes import RULE_CLASS_IDS
+from classifier import classify
+from general_rules import GeneralRule
+from hashlife import HashlifeAutomaton
+from instrumentation import Instrumentation
+from packed_automaton import PackedCellularAutomaton
+from parallel_automaton import ParallelCellularAutomaton
+from result_store import ResultBuffer
+from rules import composite_tables_for
+from simulation import Simulation
+from simulation_type import SimulationType
+from utils import paint
+
+def time_call(function, repeat: int = 3):
+    """
+    Return the best wall time (in seconds) of calling 'function' 'repeat' times.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_engines(sizes=(100, 1000, 100000), steps: int = 20, rule: int = 30, rule2: int = None, repeat: int = 3):
+    """
+    Compare the 'dict' and 'numpy' engines of CellularAutomaton.run.
+    Both engines start from the same initial state and their grids must match bit for bit.
+
+    :param sizes: iterable of int, grid widths to benchmark.
+    :param steps: int, number of generations per run.
+    :param rule: int, rule to simulate.
+    :param rule2: int (optional), second rule of the composition.
+    :param repeat: int, number of timed runs (the best one is kept).
+    :return: list of dict, one entry per size.
+    """
+    results = []
+    for size in sizes:
+        initial_state = np.random.randint(0, 2, size, dtype=bool)
+        automata = {}
+        timings = {}
+        for engine in ('dict', 'numpy'):
+            ca = CellularAutomaton(size, steps, rule, rule2, begin_type='fixed', engine=engine)
+            ca.set_initial_state(initial_state)
+            timings[engine] = time_call(ca.run, repeat)
+            automata[engine] = ca
+
+        if not np.array_equal(automata['dict'].get_grid(), automata['numpy'].get_grid()):
+            raise AssertionError(paint('red', f'[ERROR] Engines diverge for rule {rule}, rule2 {rule2}, size {size}.'))
+
+        results.append({
+            'size': size,
+            'steps': steps,
+            'dict': timings['dict'],
+            'numpy': timings['numpy'],
+            'speedup': timings['dict'] / timings['numpy'],
+        })
+    return results
+
+def print_engines(results):
+    print(paint('cyan', f"{'size':>10} {'steps':>6} {'dict (s)':>10} {'numpy (s)':>10} {'speedup':>9}"))
+    for row in results:
+        print(f"{row['size']:>10} {row['steps']:>6} {row['dict']:>10.4f} {row['numpy']:>10.5f} {row['speedup']:>8.1f}x")
+
+def bench_packed(sizes=(10**5, 10**6, 10**7), steps: int = 20, rule: int = 30, rule2: int = None, repeat: int = 3):
+    """
+    Compare memory and throughput of the 'numpy' engine and the bit-packed engine.
+
+    :return: list of dict, one entry per size, with grid bytes and cell updates per second.
+    """
+    results = []
+    for size in sizes:
+        initial_state = np.random.randint(0, 2, size, dtype=bool)
+
+        ca = CellularAutomaton(size, steps, rule, rule2, begin_type='fixed', engine='numpy')
+        ca.set_initial_state(initial_state)
+        numpy_time = time_call(ca.run, repeat)
+
+        packed = PackedCellularAutomaton(size, steps, rule, rule2)
+        packed.set_initial_state(initial_state)
+        packed_time = time_call(packed.run, repeat)
+
+        if not np.array_equal(ca.get_grid()[-1], packed.get_row(-1)):
+            raise AssertionError(paint('red', f'[ERROR] Packed engine diverges for rule {rule}, rule2 {rule2}, size {size}.'))
+
+        results.append({
+            'size': size,
+            'steps': steps,
+            'numpy_bytes': ca.get_grid().nbytes,
+            'packed_bytes': packed.get_nbytes(),
+            'numpy_cells_per_s': size * steps / numpy_time,
+            'packed_cells_per_s': size * steps / packed_time,
+        })
+    return results
+
+def print_packed(results):
+    print(paint('cyan', f"{'size':>10} {'numpy MB':>10} {'packed MB':>10} {'numpy Mcell/s':>14} {'packed Mcell/s':>15}"))
+    for row in results:
+        print(f"{row['size']:>10} {row['numpy_bytes'] / 2**20:>10.2f} {row['packed_bytes'] / 2**20:>10.2f} "
+              f"{row['numpy_cells_per_s'] / 1e6:>14.1f} {row['packed_cells_per_s'] / 1e6:>15.1f}")
+
+def bench_hashlife(rule_numbers=(108, 110, 184), size: int = 1024, generations: int = 10**12, direct_steps: int = 10**4):
+    """
+    Time Hashlife up to 'generations' and estimate the time the 'numpy' engine would need for the same
+    run, from the rate of a 'direct_steps' run (streamed, so no grid is stored).
+
+    :return: list of dict, one entry per rule.
+    """
+    results = []
+    for rule in rule_numbers:
+        initial_state = np.random.randint(0, 2, size, dtype=bool)
+        hashlife = HashlifeAutomaton(size, rule, initial_state=initial_state)
+        hashlife_time = time_call(lambda: hashlife.advance(generations), repeat=1)
+
+        ca = CellularAutomaton(size, 0, rule, begin_type='fixed')
+        ca.set_initial_state(initial_state)
+        direct_time = time_call(lambda: [None for _ in ca.stream(direct_steps, block_rows=1024)], repeat=1)
+
+        results.append({
+            'rule': rule,
+            'size': size,
+            'generations': generations,
+            'hashlife': hashlife_time,
+            'nodes': hashlife.get_node_count(),
+            'direct_estimate': direct_time * generations / direct_steps,
+        })
+    return results
+
+def print_hashlife(results):
+    print(paint('cyan', f"{'rule':>5} {'size':>8} {'generations':>14} {'hashlife (s)':>13} {'nodes':>9} {'direct est. (s)':>16}"))
+    for row in results:
+        print(f"{row['rule']:>5} {row['size']:>8} {row['generations']:>14.3g} {row['hashlife']:>13.3f} "
+              f"{row['nodes']:>9} {row['direct_estimate']:>16.3g}")
+
+def bench_general(sizes=(10**5, 10**6), steps: int = 20, radii=(1, 2, 3), repeat: int = 3):
+    """
+    Compare the throughput of GeneralRule (binary, full table and totalistic) with the elementary
+    fast path (the 'numpy' engine with an 8-entry table).
+
+    :return: list of dict, one entry per size and radius, with the slowdown relative to the elementary rule.
+    """
+    results = []
+    for size in sizes:
+        initial_state = np.random.randint(0, 2, size, dtype=bool)
+        ca = CellularAutomaton(size, steps, 110, begin_type='fixed', engine='numpy')
+        ca.set_initial_state(initial_state)
+        elementary_time = time_call(ca.run, repeat)
+
+        for radius in radii:
+            full = GeneralRule(table=np.random.randint(0, 2, 2 ** (2 * radius + 1)), radius=radius)
+            totalistic = GeneralRule(table=np.random.randint(0, 2, 2 * radius + 2), radius=radius, totalistic=True)
+            results.append({
+                'size': size,
+                'radius': radius,
+                'elementary': elementary_time,
+                'full': time_call(lambda: full.run(initial_state, steps), repeat) / elementary_time,
+                'totalistic': time_call(lambda: totalistic.run(initial_state, steps), repeat) / elementary_time,
+            })
+    return results
+
+def print_general(results):
+    print(paint('cyan', f"{'size':>10} {'radius':>7} {'elementary (s)':>15} {'full table':>11} {'totalistic':>11}"))
+    for row in results:
+        print(f"{row['size']:>10} {row['radius']:>7} {row['elementary']:>15.4f} {row['full']:>10.2f}x {row['totalistic']:>10.2f}x")
+
+def bench_classifier(seeds=(0, 1, 2)):
+    """
+    Classify the 256 elementary rules with 'classifier.classify' and compare with the reference lists of classes.py.
+    """
+    reference = np.frombuffer(RULE_CLASS_IDS, dtype=np.uint8)
+    results = []
+    for seed in seeds:
+        start = time.perf_counter()
+        classes = classify(seed=seed)
+        elapsed = time.perf_counter() - start
+        misses = np.flatnonzero(classes != reference)
+        results.append({
+            'seed': seed, 'time': elapsed, 'agreement': 1 - len(misses) / len(reference),
+            'misses': [f'{rule} ({reference[rule]}->{classes[rule]})' for rule in misses],
+        })
+    return results
+
+def print_classifier(results):
+    print(paint('cyan', f"{'seed':>5} {'time (s)':>9} {'agreement':>10}  misses (reference->assigned)"))
+    for row in results:
+        print(f"{row['seed']:>5} {row['time']:>9.2f} {row['agreement']:>9.1%}  {', '.join(row['misses'])}")
+
+def bench_parallel(size: int = 10**8, steps: int = 128, workers=None, rule: int = 30, rule2: int = None):
+    """
+    Time ParallelCellularAutomaton on one wide ring with 1 to N workers (powers of two up to the number of CPUs
+    by default), against the serial 'numpy' engine streaming the same generations. Every run must reach the same row.
+
+    :return: list of dict, one entry per number of workers.
+    """
+    if workers is None:
+        cpus = multiprocessing.cpu_count()
+        workers = sorted({1 << power for power in range(cpus.bit_length())} | {cpus})
+    initial_state = np.random.randint(0, 2, size, dtype=bool)
+
+    ca = CellularAutomaton(size, 0, rule, rule2, begin_type='fixed')
+    ca.set_initial_state(initial_state)
+    start = time.perf_counter()
+    for block in ca.stream(steps, block_rows=1):
+        pass
+    serial = time.perf_counter() - start
+    expected = block[-1].copy()
+
+    results = []
+    for count in workers:
+        with ParallelCellularAutomaton(size, rule, rule2, workers=count, initial_state=initial_state) as parallel:
+            start = time.perf_counter()
+            row = parallel.advance(steps)
+            elapsed = time.perf_counter() - start
+        if not np.array_equal(row, expected):
+            raise AssertionError(paint('red', f'[ERROR] Parallel engine diverges with {count} workers.'))
+        results.append({'workers': count, 'size': size, 'steps': steps, 'serial': serial, 'time': elapsed})
+
+    for row in results:
+        row['speedup'] = results[0]['time'] / row['time']
+    return results
+
+def print_parallel(results):
+    print(paint('cyan', f"{'workers':>8} {'size':>12} {'steps':>6} {'time (s)':>9} {'Mcell/s':>9} {'vs 1 worker':>12} {'vs serial':>10}"))
+    for row in results:
+        print(f"{row['workers']:>8} {row['size']:>12} {row['steps']:>6} {row['time']:>9.3f} "
+              f"{row['size'] * row['steps'] / row['time'] / 1e6:>9.1f} {row['speedup']:>11.2f}x {row['serial'] / row['time']:>9.2f}x")
+
+#### REGRESSION SUITE ####
+
+# Largest accepted drop of throughput and growth of peak memory against the baseline
+THROUGHPUT_THRESHOLD = 0.2
+MEMORY_THRESHOLD = 0.2
+# Baselines committed with the repository, one for the full suite and one for '--quick'
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks')
+
+def default_baseline(quick: bool = False):
+    """
+    Return the path of the committed baseline of the full or quick regression suite.
+    """
+    return os.path.join(BASELINE_DIR, 'baseline-quick.json' if quick else 'baseline.json')
+
+def peak_memory(function):
+    """
+    Return the peak memory (in bytes) allocated while calling 'function', traced by tracemalloc (which also
+    sees the numpy buffers). The call is not timed, as tracing slows it down.
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(name: str, function, work: float, unit: str, repeat: int = 3, min_time: float = 0.05):
+    """
+    Time 'function' and trace its peak memory. Short calls are repeated within each sample until the sample
+    lasts about 'min_time' seconds, so their timings are not dominated by noise.
+    :param name: str, unique name of the case, the key used to compare with the baseline.
+    :param work: float, amount of work done by one call, in 'unit' (e.g. cell updates), for the throughput.
+    :param repeat: int, number of timed samples (the best one is kept).
+    :return: dict with the name, the seconds per call, the throughput (work per second), the unit and the peak bytes.
+    """
+    first = time_call(function, repeat=1)
+    number = max(1, int(min_time / max(first, 1e-9)))
+    seconds = min(first, time_call(lambda: [function() for _ in range(number)], repeat) / number)
+    return {
+        'name': name,
+        'seconds': seconds,
+        'throughput': work / seconds,
+        'unit': f'{unit}/s',
+        'peak_bytes': peak_memory(function),
+    }
+
+class _Workspace:
+    """
+    Run the cases that write images from a temporary 'src' directory, so their '../results/' tree is
+    created (and removed) in a temporary directory instead of the repository.
+    """
+    def __enter__(self):
+        self.__previous = os.getcwd()
+        self.__directory = tempfile.TemporaryDirectory()
+        working = os.path.join(self.__directory.name, 'src')
+        os.makedirs(working)
+        os.chdir(working)
+        return self
+
+    def __exit__(self, *exc_info):
+        os.chdir(self.__previous)
+        self.__directory.cleanup()
+
+def bench_regression(quick: bool = False, repeat: int = 3):
+    """
+    Time the hot paths, each with its throughput and peak memory:
+    - CellularAutomaton.run across sizes and steps (cell updates per second);
+    - BinaryLifting construction (table entries per second) and find_step (queries per second);
+    - save_image at several scales (pixels per second);
+    - Simulation.run end to end in the 'single', 'all' and 'custom-n-m' modes (runs per second).
+    :param quick: bool, smaller cases, for a fast check.
+    :return: list of dict, one entry per case (see 'measure').
+    """
+    results = []
+    np.random.seed(0)
+
+    for size, steps in ([(100, 200), (10**4, 100)] if quick else [(100, 200), (1000, 1000), (10**5, 200), (10**6, 20)]):
+        for rule, rule2 in ((30, None), (110, 30)):
+            ca = CellularAutomaton(size, steps, rule, rule2, begin_type='random')
+            name = f'run/size={size}/steps={steps}/rule={rule}' + (f'+{rule2}' if rule2 is not None else '')
+            results.append(measure(name, ca.run, size * steps, 'cells', repeat))
+
+    lifting_size = 12 if quick else 16
+    results.append(measure(
+        f'binary_lifting/build/size={lifting_size}', lambda: BinaryLifting(30, lifting_size, max_steps=2**32),
+        32 * 2**lifting_size, 'entries', repeat,
+    ))
+    lifting = BinaryLifting(30, lifting_size, max_steps=2**32)
+    queries = [(int(step), int(state)) for step, state in zip(np.random.randint(0, 2**31, 1000), np.random.randint(0, 2**lifting_size, 1000))]
+    results.append(measure(
+        f'binary_lifting/find_step/size={lifting_size}', lambda: [lifting.find_step(step, state) for step, state in queries],
+        len(queries), 'queries', repeat,
+    ))
+
+    with _Workspace():
+        ca = CellularAutomaton(200 if quick else 1000, 200 if quick else 1000, 30, begin_type='random')
+        ca.run()
+        for scale in (1, 4) if quick else (1, 2, 4, 8):
+            results.append(measure(f'save_image/scale={scale}', lambda: ca.save_image(scale), ca.get_grid().size * scale**2, 'pixels', repeat))
+
+        size, steps = (50, 50) if quick else (100, 200)
+        for mode, runs in (('single', 1), ('all', 256), ('custom-4-4', 14 * 14)):
+            sim_type = SimulationType(mode, execs=1, rule=30) if mode == 'single' else SimulationType(mode, execs=1)
+            simulation = Simulation(sim_type, scale=2, size=size, steps=steps, seed=0)
+            results.append(measure(f'simulation/{mode}/size={size}/steps={steps}', simulation.run, runs, 'runs', repeat))
+    return results
+
+def write_results(results, path: str):
+    """
+    Write the results of 'bench_regression' as JSON, with the environment they were measured on.
+    """
+    document = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(path, 'w') as file:
+        json.dump(document, file, indent=2)
+
+def compare_results(results, baseline, throughput_threshold: float = THROUGHPUT_THRESHOLD, memory_threshold: float = MEMORY_THRESHOLD):
+    """
+    Compare the results with a baseline (the JSON document of 'write_results') case by case.
+    :param throughput_threshold: float, largest accepted relative drop of throughput (0.2 = 20% slower).
+    :param memory_threshold: float, largest accepted relative growth of peak memory.
+    :return: list of dict, one entry per case found in both, with the ratios and whether it regressed.
+    """
+    previous = {case['name']: case for case in baseline['results']}
+    comparison = []
+    for case in results:
+        if case['name'] not in previous:
+            continue
+        reference = previous[case['name']]
+        throughput = case['throughput'] / reference['throughput']
+        memory = case['peak_bytes'] / max(reference['peak_bytes'], 1)
+        comparison.append({
+            'name': case['name'],
+            'throughput_ratio': throughput,
+            'memory_ratio': memory,
+            'regressed': throughput < 1 - throughput_threshold or memory > 1 + memory_threshold,
+        })
+    return comparison
+
+def print_regression(results, comparison=None):
+    ratios = {row['name']: row for row in comparison or []}
+    print(paint('cyan', f"{'case':<48} {'time (s)':>10} {'throughput':>18} {'peak MB':>9} {'vs baseline':>20}"))
+    for row in results:
+        line = (f"{row['name']:<48} {row['seconds']:>10.4f} {row['throughput']:>11.3g} {row['unit']:<6} "
+                f"{row['peak_bytes'] / 2**20:>9.2f}")
+        if row['name'] in ratios:
+            ratio = ratios[row['name']]
+            line += f" {ratio['throughput_ratio']:>8.2f}x {ratio['memory_ratio']:>6.2f}x mem"
+            line = paint('red', line) if ratio['regressed'] else line
+        print(line)
+
+#### DEDUPLICATION ####
+
+def dedup_initial_states(size: int = 64):
+    """
+    Initial rows that are symmetric under the row transformations, so the sweep planner derives grids from them:
+    an alternating row (mirror and complement symmetric, up to a rotation) and a single centered cell (mirror symmetric).
+    None stands for the default random row, which a dedup sweep draws symmetric.
+    """
+    alternating = np.arange(size) % 2 == 1
+    center = np.zeros(size, dtype=bool)
+    center[size // 2] = True
+    return {'random': None, 'alternating': alternating, 'center': center}
+
+def time_sweep(mode: str, size: int, steps: int, **settings):
+    """
+    Run a sweep (one execution, saved to a ResultBuffer) and return its time and the number of pairs it simulated.
+    """
+    instrumentation = Instrumentation()
+    simulation = Simulation(SimulationType(mode, execs=1), size=size, steps=steps, store=ResultBuffer(), seed=0,
+                            instrumentation=instrumentation, **settings)
+    elapsed = time_call(simulation.run, repeat=1)
+    return elapsed, instrumentation.get_state()['counters']['runs']
+
+def bench_dedup(modes=('all', 'custom-3-4'), size: int = 64, steps: int = 100):
+    """
+    Time sweeps with and without 'dedup' from the rows of 'dedup_initial_states'. That both produce the same grids
+    and images is checked by the tests (tests/test_sweep_planner.py).
+    :return: list of dict, one entry per mode and initial row, with the simulated pairs and both times.
+    """
+    results = []
+    with _Workspace():
+        for mode in modes:
+            for name, initial_state in dedup_initial_states(size).items():
+                plain_time, pairs = time_sweep(mode, size, steps, initial_state=initial_state)
+                dedup_time, simulated = time_sweep(mode, size, steps, initial_state=initial_state, dedup=True)
+                results.append({'mode': mode, 'row': name, 'pairs': pairs, 'simulated': simulated,
+                                'plain': plain_time, 'dedup': dedup_time})
+    return results
+
+def print_dedup(results):
+    print(paint('cyan', f"{'mode':>11} {'row':>12} {'pairs':>6} {'simulated':>10} {'plain (s)':>10} {'dedup (s)':>10} {'speedup':>8}"))
+    for row in results:
+        print(f"{row['mode']:>11} {row['row']:>12} {row['pairs']:>6} {row['simulated']:>10} {row['plain']:>10.3f} "
+              f"{row['dedup']:>10.3f} {row['plain'] / row['dedup']:>7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description='Cellular automaton benchmarks.')
+    parser.add_argument('suite', choices=['engines', 'packed', 'hashlife', 'general', 'classifier', 'regression', 'parallel', 'dedup'], nargs='?', default='engines')
+    parser.add_argument('--sizes', type=int, nargs='+', default=None)
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--rule', type=int, default=30)
+    parser.add_argument('--rule2', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, nargs='+', default=None, help='parallel suite: numbers of workers')
+    parser.add_argument('--quick', action='store_true', help='regression suite: smaller cases')
+    parser.add_argument('--json', default=None, help='regression suite: write the results to this JSON file')
+    parser.add_argument('--baseline', default=None, help='regression suite: JSON results to compare with '
+                                                         '(default: the committed benchmarks/baseline.json, or baseline-quick.json with --quick)')
+    parser.add_argument('--no-baseline', action='store_true', help='regression suite: do not compare with a baseline')
+    parser.add_argument('--threshold', type=float, default=THROUGHPUT_THRESHOLD, help='largest accepted throughput drop')
+    parser.add_argument('--memory-threshold', type=float, default=MEMORY_THRESHOLD, help='largest accepted peak memory growth')
+    args = parser.parse_args()
+
+    if args.suite == 'engines':
+        sizes = args.sizes or [100, 1000, 100000]
+        print_engines(bench_engines(sizes, args.steps, args.rule, args.rule2, args.repeat))
+
+    elif args.suite == 'packed':
+        sizes = args.sizes or [10**5, 10**6, 10**7]
+        print_packed(bench_packed(sizes, args.steps, args.rule, args.rule2, args.repeat))
+
+    elif args.suite == 'hashlife':
+        size = args.sizes[0] if args.sizes else 1024
+        print_hashlife(bench_hashlife(size=size))
+
+    elif args.suite == 'general':
+        sizes = args.sizes or [10**5, 10**6]
+        print_general(bench_general(sizes, args.steps, repeat=args.repeat))
+
+    elif args.suite == 'classifier':
+        print_classifier(bench_classifier())
+
+    elif args.suite == 'parallel':
+        size = args.sizes[0] if args.sizes else 10**8
+        print_parallel(bench_parallel(size, args.steps, args.workers, args.rule, args.rule2))
+
+    elif args.suite == 'dedup':
+        print_dedup(bench_dedup())
+
+    elif args.suite == 'regression':
+        results = bench_regression(args.quick, args.repeat)
+        comparison = None
+        if not args.no_baseline:
+            with open(args.baseline or default_baseline(args.quick)) as file:
+                comparison = compare_results(results, json.load(file), args.threshold, args.memory_threshold)
+        print_regression(results, comparison)
+        if args.json is not None:
+            write_results(results, args.json)
+
+        regressions = [row['name'] for row in comparison or [] if row['regressed']]
+        if regressions:
+            print(paint('red', f"[ERROR] {len(regressions)} case(s) regressed: {', '.join(regressions)}"))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
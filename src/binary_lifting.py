@@ -1,69 +1,299 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
+from cycles import CycleAnalysis
 from rules import rules
+from state_space import encode_state, decode_state, transition_table
+from symmetry import representatives, reduced_transitions, rule_group
+from table_cache import TableCache
+
+# Below this number of queries per process, 'find_steps' does not split a batch across processes
+MIN_QUERIES_PER_JOB = 2 ** 16
+
+# Default location and format version of the on-disk cache of jump tables
+DEFAULT_CACHE_DIR = '../cache/binary_lifting/'
+CACHE_VERSION = 1
+
+# Jump tables seen by the worker processes of 'find_steps' (inherited on fork, or set by the initializer)
+_shared_tables = None
+
+def lifting_levels(max_steps: int) -> int:
+    """
+    Number of jump tables needed to reach any step below 'max_steps', i.e. ceil(log2(max_steps)).
+    """
+    return max(1, (max_steps - 1).bit_length())
+
+def lift(tables, steps, states):
+    """
+    Resolve many (step, state) queries at once: for every level 'k', the queries whose step has
+    bit 'k' set jump through T[k] together, in one vectorized gather.
+    :param tables: np.ndarray, shape (levels, 2 ** size), the jump tables.
+    :param steps: np.ndarray (uint64), number of steps of each query.
+    :param states: np.ndarray, encoded initial state of each query.
+    :return: np.ndarray, encoded state reached by each query.
+    """
+    states = states.astype(tables.dtype)
+    for pot in range(len(tables)):
+        remaining = steps >> np.uint64(pot)
+        if not remaining.any():
+            break
+        jumping = np.flatnonzero(remaining & np.uint64(1))
+        states[jumping] = tables[pot][states[jumping]]
+    return states
+
+def lift_classes(tables, group_tables, multiplication, steps, classes, elements):
+    """
+    Same as 'lift', over symmetry classes: a query is the state act(element, representative[class]),
+    and at each jump the group element of the jump is composed with the one of the query.
+    :param tables: np.ndarray, shape (levels, n_classes), class reached after 2 ** k steps.
+    :param group_tables: np.ndarray, shape (levels, n_classes), group element of each jump.
+    :param multiplication: np.ndarray, multiplication table of the symmetry group.
+    :return: (classes, elements) reached by each query.
+    """
+    classes = classes.astype(tables.dtype)
+    elements = elements.astype(np.uint8)
+    for pot in range(len(tables)):
+        remaining = steps >> np.uint64(pot)
+        if not remaining.any():
+            break
+        jumping = np.flatnonzero(remaining & np.uint64(1))
+        current = classes[jumping]
+        elements[jumping] = multiplication[elements[jumping], group_tables[pot][current]]
+        classes[jumping] = tables[pot][current]
+    return classes, elements
 
-import math
+def _set_shared_tables(*tables):
+    global _shared_tables
+    # Um caminho indica tabelas em cache: cada processo abre o mesmo arquivo mapeado em memória
+    _shared_tables = [np.load(table, mmap_mode='r') if isinstance(table, str) else table for table in tables]
+
+def _lift_shared(steps, states, elements=None):
+    if elements is None:
+        return lift(_shared_tables[0], steps, states)
+    return lift_classes(*_shared_tables, steps, states, elements)
 
 class BinaryLifting:
-    def __init__(self, rule: int, size: int = 20, max_steps: int = 2**64):
+    def __init__(self, rule: int, size: int = 20, max_steps: int = 2**64, cache_dir: str = None, cache_max_bytes: int = None,
+                 reduce_cycles: bool = False, symmetry: bool = False):
+        """
+        Jump tables of a rule on a ring of 'size' cells: level 'k' maps every encoded state to
+        the state reached after 2 ** k steps, so any step is reached in at most 'levels' lookups.
+
+        Memory budget: levels * 2 ** size * itemsize bytes, with levels = ceil(log2(max_steps)) and
+        itemsize = 1, 2 or 4 bytes for size <= 8, <= 16 or <= 32. For example:
+        - size 20, max_steps 2**64: 64 levels of 4 MiB = 256 MiB;
+        - size 24, max_steps 2**32: 32 levels of 64 MiB = 2 GiB;
+        - size 26, max_steps 2**16: 16 levels of 256 MiB = 4 GiB.
+        With 'reduce_cycles', levels = size whatever the step, e.g. size 20: 20 levels = 80 MiB.
+        With 'symmetry', the tables hold one entry per rotation class (about 2 ** size / size entries,
+        half of that for left-right symmetric rules) plus one byte per entry for the group element,
+        e.g. size 26, max_steps 2**64: 64 levels of about 13 MiB = 830 MiB.
+
+        :param rule: int (0-255), the rule ID.
+        :param size: int, number of cells of the ring.
+        :param max_steps: int, the tables answer any step below this value.
+        :param cache_dir: str (optional), directory of the on-disk cache (e.g. DEFAULT_CACHE_DIR). When given, the
+                          tables are loaded memory-mapped from the cache, or computed and stored there once.
+        :param cache_max_bytes: int (optional), size cap of the cache; least recently used tables are evicted.
+        :param reduce_cycles: bool, analyse the cycles of the rule first, so any step count (even above 'max_steps')
+                              is reduced modulo the period of its cycle and only 'size' levels are needed.
+        :param symmetry: bool, store the tables over rotation classes (and reflection classes for left-right symmetric
+                         rules) instead of over all states. Not compatible with 'reduce_cycles'.
+        """
+        if reduce_cycles and symmetry:
+            raise ValueError("\033[31m[ERROR] 'reduce_cycles' and 'symmetry' cannot be used together.\033[0m")
+
         self.__size = size
         self.rule = rules[rule]
         self.max_steps = max_steps
-        self.all_possible_values = self.__set_possible_values()
-        # print(len(self.all_possible_values))
-        # print(2**size)
-        # self.mapping_possible_values = self.__generate_mapping_possible_values()
-        # print(self.mapping)
-        self.pre_processing = self.__generate_pre_processing()
-        # print(self.pre_processing)
+        self.cycles = CycleAnalysis(rule, size) if reduce_cycles else None
+        self.symmetry = rule_group(rule, size) if symmetry else None
+        self.representatives = None
+        self.group_tables = None
+
+        # Depois do transiente e do resto módulo o período, nenhum passo chega a 2 ** size
+        self.levels = lifting_levels(2 ** size) if reduce_cycles else lifting_levels(max_steps)
+        self.__cache = TableCache(cache_dir, CACHE_VERSION, cache_max_bytes) if cache_dir is not None else None
+        self.pre_processing = self.__load_pre_processing()
 
+    def __cache_keys(self):
+        key = f'rule_{self.rule.get_number()}_size_{self.__size}_levels_{self.levels}'
+        if self.symmetry is None:
+            return [key]
+        return [f'{key}_symmetric_{name}' for name in ('classes', 'tables', 'elements')]
 
+    def __load_pre_processing(self):
+        """
+        Return the jump tables from the cache when possible, computing (and caching) them otherwise.
+        """
+        keys = self.__cache_keys()
+        tables = [self.__cache.load(key) for key in keys] if self.__cache is not None else [None]
 
-    def __set_possible_values(self):
-        # Gerar todas as combinações possíveis de uma linha de tamanho 'size'
-        return [tuple(map(int, f"{i:0{self.__size}b}")) for i in range(2 ** self.__size)]
+        if any(table is None for table in tables):
+            tables = self.__generate_symmetric_pre_processing() if self.symmetry is not None else [self.__generate_pre_processing()]
+            if self.__cache is not None:
+                tables = [self.__cache.store(key, table) for key, table in zip(keys, tables)]
 
-    def __generate_mapping_possible_values(self):
-        mapping = {}
-        for row in self.all_possible_values:
-            next = []
-            for cell in range(self.__size):
-                left = row[(cell - 1) % self.__size]
-                center = row[cell]
-                right = row[(cell + 1) % self.__size]
+        if self.symmetry is not None:
+            self.representatives, tables, self.group_tables = tables
+            return tables
+        return tables[0]
 
-                neighbors = (left, center, right)
+    def __generate_symmetric_pre_processing(self):
+        """
+        Build the jump tables over symmetry classes. The group element of a jump of 2 ** k steps is
+        the product of the elements of its two halves: G[k] = G[k - 1] . G[k - 1][T[k - 1]].
+        """
+        classes = representatives(self.__size, self.symmetry)
+        targets, elements = reduced_transitions(self.rule.get_number(), self.__size, self.symmetry, classes)
+        multiplication = self.symmetry.get_multiplication()
 
-                next.append(self.rule.get_rule_dict()[neighbors])
-                #DEBUG
-                # print(self.rule.get_rule_dict()[neighbors])
+        tables = np.empty((self.levels, len(classes)), dtype=targets.dtype)
+        group_tables = np.empty((self.levels, len(classes)), dtype=np.uint8)
+        tables[0], group_tables[0] = targets, elements
 
-            mapping[row] = tuple(next)
+        for pot in range(1, self.levels):
+            np.take(tables[pot - 1], tables[pot - 1], out=tables[pot])
+            group_tables[pot] = multiplication[group_tables[pot - 1], group_tables[pot - 1][tables[pot - 1]]]
 
-        return mapping
+        return [classes, tables, group_tables]
 
     def __generate_pre_processing(self):
-        next = [self.__generate_mapping_possible_values()]
+        """
+        Build the jump tables, one row per level: T[k] = T[k - 1][T[k - 1]].
+        """
+        if self.cycles is not None:
+            table = self.cycles.get_transitions()
+        else:
+            table = transition_table(self.rule.get_number(), self.__size)
+        tables = np.empty((self.levels, len(table)), dtype=table.dtype)
+        tables[0] = table
+
+        for pot in range(1, self.levels):
+            np.take(tables[pot - 1], tables[pot - 1], out=tables[pot])
 
-        for pot in range(1, math.ceil(math.log2(self.max_steps))):
-            next.append({})
-            for value, pos in enumerate(self.all_possible_values):
-                aux = next[pot - 1][pos]
-                next[pot][pos] = next[pot - 1][aux]
+        return tables
 
-        return next
+    def get_nbytes(self):
+        """
+        Return the memory used by the jump tables, in bytes.
+        """
+        if self.symmetry is not None:
+            return self.pre_processing.nbytes + self.group_tables.nbytes + self.representatives.nbytes
+        return self.pre_processing.nbytes
 
     def find_step(self, step: int, initial_state: tuple = None):
+        """
+        Return the state reached after 'step' steps from 'initial_state'.
+        :param step: int, number of steps, below 2 ** levels (any step when the cycles are reduced).
+        :param initial_state: tuple of 0/1 or encoded int (optional). Random if not given.
+        :return: the state, with the same representation (tuple or int) as 'initial_state'.
+        """
         if initial_state is None:
             initial_state = tuple(np.random.randint(0, 2, self.__size))
 
-        actual = initial_state
-        looking_for = step
+        as_tuple = not isinstance(initial_state, (int, np.integer))
+        actual = encode_state(initial_state) if as_tuple else int(initial_state)
+
+        if self.cycles is not None and step >= 0:
+            step = self.cycles.reduce_steps(step, actual)
+        if step < 0 or step >> self.levels:
+            raise ValueError(f"\033[31m[ERROR] Step must be in the range 0-{2 ** self.levels - 1}.\033[0m")
+
+        if self.symmetry is not None:
+            actual = self.__lift_symmetric(np.array([step], dtype=np.uint64), np.array([actual]))[0]
+            return decode_state(actual, self.__size) if as_tuple else int(actual)
+
+        pot = 0
+        while step:
+            if step & 1:
+                actual = self.pre_processing[pot, actual]
+            step >>= 1
+            pot += 1
+
+        return decode_state(actual, self.__size) if as_tuple else int(actual)
+
+    def find_steps(self, steps, initial_states, jobs: int = None):
+        """
+        Answer many queries at once: entry 'i' of the result is the state reached after 'steps[i]'
+        steps from 'initial_states[i]'.
+        :param steps: array-like of int, number of steps of each query (below 2 ** levels), or a single int for all.
+        :param initial_states: array-like of encoded ints, shape (n,), or of rows of 0/1, shape (n, size).
+        :param jobs: int (optional), number of processes sharing a very large batch. The processes read the
+                     same jump tables (inherited copy-on-write where 'fork' is available).
+        :return: np.ndarray, the reached states, with the same representation as 'initial_states'.
+        """
+        initial_states = np.asarray(initial_states)
+        as_rows = initial_states.ndim == 2
+        if as_rows:
+            if initial_states.shape[1] != self.__size:
+                raise ValueError("\033[31m[ERROR] Initial states must have the same size as the ring.\033[0m")
+            weights = (1 << np.arange(self.__size - 1, -1, -1)).astype(np.uint64)
+            states = initial_states.astype(np.uint64) @ weights
+        else:
+            states = initial_states.astype(np.uint64)
+
+        steps = np.broadcast_to(np.asarray(steps, dtype=np.uint64), states.shape)
+        if self.cycles is not None:
+            steps = self.cycles.reduce_steps(steps, states)
+        if self.levels < 64 and (steps >> np.uint64(self.levels)).any():
+            raise ValueError(f"\033[31m[ERROR] Steps must be in the range 0-{2 ** self.levels - 1}.\033[0m")
+
+        if self.symmetry is not None:
+            result = self.__lift_symmetric(steps, states, jobs)
+        elif jobs is None or jobs < 2 or len(states) < 2 * MIN_QUERIES_PER_JOB:
+            result = lift(self.pre_processing, steps, states)
+        else:
+            result = self.__find_steps_parallel(steps, states, jobs)
+
+        if as_rows:
+            shifts = np.arange(self.__size - 1, -1, -1, dtype=np.uint64)
+            return ((result.astype(np.uint64)[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+        return result
+
+    def __lift_symmetric(self, steps, states, jobs: int = None):
+        """
+        Resolve encoded queries over the symmetry classes and map the results back to states.
+        """
+        canonical, elements = self.symmetry.canonicalize(states.astype(self.representatives.dtype))
+        classes = np.searchsorted(self.representatives, canonical)
+
+        if jobs is None or jobs < 2 or len(states) < 2 * MIN_QUERIES_PER_JOB:
+            classes, elements = lift_classes(self.pre_processing, self.group_tables, self.symmetry.get_multiplication(),
+                                             steps, classes, elements)
+        else:
+            classes, elements = self.__find_steps_parallel(steps, classes, jobs, elements)
+
+        return self.symmetry.act(elements, self.representatives[classes])
+
+    def __find_steps_parallel(self, steps, states, jobs, elements=None):
+        """
+        Split a batch of queries across 'jobs' processes.
+        """
+        jobs = min(jobs, len(states) // MIN_QUERIES_PER_JOB)
+        bounds = np.linspace(0, len(states), jobs + 1, dtype=np.intp)
+
+        tables = [self.pre_processing]
+        if self.symmetry is not None:
+            tables += [self.group_tables, self.symmetry.get_multiplication()]
 
-        for pot in range(math.ceil(math.log2(self.max_steps)), -1, -1):
-            if 2 ** pot <= looking_for:
-                actual = self.pre_processing[pot][actual]
-                looking_for -= 2 ** pot
+        # Com 'fork', os processos herdam as tabelas sem cópia; senão, o inicializador envia uma cópia
+        if 'fork' in multiprocessing.get_all_start_methods():
+            _set_shared_tables(*tables)
+            pool = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('fork'))
+        else:
+            shared = [table.filename if isinstance(table, np.memmap) else table for table in tables]
+            pool = ProcessPoolExecutor(max_workers=jobs, initializer=_set_shared_tables, initargs=shared)
 
-        return actual
+        with pool:
+            futures = [
+                pool.submit(_lift_shared, steps[a:b], states[a:b], None if elements is None else elements[a:b])
+                for a, b in zip(bounds[:-1], bounds[1:])
+            ]
+            results = [future.result() for future in futures]
 
+        if elements is None:
+            return np.concatenate(results)
+        return np.concatenate([classes for classes, _ in results]), np.concatenate([elements for _, elements in results])
@@ -76,3 +76,22 @@ PERIODIC = Class(2)
 CHAOTIC = Class(3)
 COMPLEX = Class(4)
 
+
+CLASSES = (HOMOGENEOUS, PERIODIC, CHAOTIC, COMPLEX)
+
+# Índice regra -> classe, montado uma única vez a partir das listas (consulta em O(1))
+RULE_CLASSES = [None] * 256
+for rule_class in CLASSES:
+    for rule in rule_class.get_rules():
+        RULE_CLASSES[rule] = rule_class
+RULE_CLASS_IDS = bytes(rule_class.get_id() for rule_class in RULE_CLASSES)
+
+def get_rule_class(rule):
+    """
+    Return the Class of an elementary rule, from the precomputed index.
+    :param rule: int (0-255), the rule.
+    :return: Class.
+    """
+    if not 0 <= rule < 256:
+        raise ValueError("\033[31m[ERROR] Invalid rule number. Must be in the range 0-255.\033[0m")
+    return RULE_CLASSES[rule]
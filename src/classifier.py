@@ -0,0 +1,178 @@
+# File: classifier.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Automatic Wolfram classification of rules and rule compositions. Many grids are
+#              simulated in batches and measured at once (entropies, compressibility, density
+#              variance, damage spread and transient length), and each one is assigned a class
+#              by thresholds on those metrics.
+
+import zlib
+
+import numpy as np
+
+from batch import BatchAutomaton
+from rules import neighborhood_index
+from table_cache import TableCache
+
+# Default simulation of the classifier: an odd ring, so the additive rules (60, 90, 150...) do
+# not die out as they do on rings whose size is a power of two
+CLASSIFIER_SIZE = 201
+CLASSIFIER_STEPS = 400
+CLASSIFIER_SAMPLES = 3
+
+# Thresholds of 'assign_classes'. With the defaults above, 249 or 250 of the 256 elementary rules
+# (depending on the seed) get the class of the reference lists (classes.py); the class IV rules 54,
+# 106, 120, 147, 169 and 225 are classified as III
+HOMOGENEOUS_ENTROPY = 0.05
+CHAOTIC_COMPRESSIBILITY = 0.6
+CHAOTIC_DAMAGE = 0.1
+COMPLEX_COMPRESSIBILITY = 0.25
+COMPLEX_DAMAGE = 0.2
+COMPLEX_PERIODIC_DAMAGE = 0.3
+COMPLEX_TRANSIENT = 0.3
+
+PAIR_TABLE_VERSION = 1
+
+def _block_entropy(indices, bits: int):
+    """
+    Normalized Shannon entropy (0 to 1) of the 'bits'-cell blocks of each grid, from a (n_grids, ...) array of
+    block indices, with a single bincount over every grid.
+    """
+    count = len(indices)
+    offsets = (np.arange(count, dtype=np.intp) << bits).reshape((count,) + (1,) * (indices.ndim - 1))
+    counts = np.bincount((indices + offsets).ravel(), minlength=count << bits).reshape(count, 1 << bits)
+    frequencies = counts / counts.sum(axis=1, keepdims=True)
+    logs = np.log2(frequencies, out=np.zeros_like(frequencies), where=frequencies > 0)
+    return -(frequencies * logs).sum(axis=1) / bits
+
+def grid_metrics(grids, perturbed=None, cycles=None):
+    """
+    Measure a stack of grids at once. Every metric is computed on the last half of the rows, after the transient:
+    - 'spatial_entropy': entropy of the 3-cell blocks of the rows.
+    - 'temporal_entropy': entropy of the 3-step histories of the cells.
+    - 'compressibility': zlib size of the bit-packed rows over their raw size (about 1 for random rows).
+    - 'density_variance': variance of the density of the rows over time.
+    - 'damage': fraction of cells, in the last quarter of the rows, that differ from the grid evolved from a
+      perturbed initial row (only with 'perturbed').
+    - 'transient': steps until the rows repeat, over the number of steps (only with 'cycles'; 1 when they do not repeat).
+
+    :param grids: np.ndarray (bool), shape (n_grids, rows, size).
+    :param perturbed: np.ndarray (bool) (optional), same shape, grids evolved from the perturbed initial rows.
+    :param cycles: list (optional), the cycle of each grid (see 'BatchAutomaton.get_cycle'), or None.
+    :return: dict mapping each metric to an np.ndarray (float) with one value per grid.
+    """
+    rows = grids.shape[1]
+    tail = grids[:, rows // 2:]
+    cells = tail.view(np.uint8)
+
+    metrics = {
+        'spatial_entropy': _block_entropy(neighborhood_index(tail), 3),
+        'temporal_entropy': _block_entropy((cells[:, :-2] << 2) | (cells[:, 1:-1] << 1) | cells[:, 2:], 3),
+        'compressibility': np.array([
+            len(zlib.compress(packed.tobytes(), 6)) / packed.nbytes for packed in np.packbits(tail, axis=-1)
+        ]),
+        'density_variance': cells.mean(axis=-1).var(axis=-1),
+    }
+    if perturbed is not None:
+        quarter = rows - rows // 4
+        metrics['damage'] = (grids[:, quarter:] != perturbed[:, quarter:]).mean(axis=(1, 2))
+    if cycles is not None:
+        metrics['transient'] = np.array([1.0 if cycle is None else cycle['transient'] / (rows - 1) for cycle in cycles])
+    return metrics
+
+def assign_classes(metrics):
+    """
+    Assign a Wolfram class (1 to 4) to each grid from its metrics (see 'grid_metrics', with damage and transient):
+    - I: the rows end homogeneous (no spatial or temporal entropy left).
+    - III: the rows stay incompressible and a perturbation spreads.
+    - IV: the rows are partly compressible and a perturbation spreads, or they are periodic but reached only after
+      a long transient during which a perturbation spreads.
+    - II: every other grid (the rows settle into a short cycle and a perturbation stays local).
+    :return: np.ndarray (uint8), the class of each grid.
+    """
+    compressibility, damage = metrics['compressibility'], metrics['damage']
+    classes = np.full(len(damage), 2, dtype=np.uint8)
+    classes[(compressibility >= COMPLEX_COMPRESSIBILITY) & (damage >= COMPLEX_DAMAGE)] = 4
+    classes[(compressibility < COMPLEX_COMPRESSIBILITY) & (damage >= COMPLEX_PERIODIC_DAMAGE)
+            & (metrics['transient'] >= COMPLEX_TRANSIENT)] = 4
+    classes[(compressibility >= CHAOTIC_COMPRESSIBILITY) & (damage >= CHAOTIC_DAMAGE)] = 3
+    classes[(metrics['spatial_entropy'] < HOMOGENEOUS_ENTROPY) & (metrics['temporal_entropy'] < HOMOGENEOUS_ENTROPY)] = 1
+    return classes
+
+def measure(rule_numbers, rule2_numbers=None, size: int = CLASSIFIER_SIZE, steps: int = CLASSIFIER_STEPS,
+            samples: int = CLASSIFIER_SAMPLES, seed: int = None, batch_size: int = 256):
+    """
+    Simulate rules (or rule compositions) from random initial rows, and from the same rows with the center cell
+    flipped, and return their metrics averaged over the samples.
+    :param rule_numbers: iterable of int, the rules.
+    :param rule2_numbers: iterable of int (optional), second rule of each composition, same length as 'rule_numbers'.
+    :param samples: int, number of random initial rows.
+    :param seed: int (optional), seed of the initial rows.
+    :param batch_size: int, number of rules simulated together.
+    :return: dict mapping each metric to an np.ndarray (float), one value per rule.
+    """
+    rule_numbers = list(rule_numbers)
+    rule2_numbers = None if rule2_numbers is None else list(rule2_numbers)
+    generator = np.random.default_rng(seed)
+    initial_states = generator.integers(0, 2, (samples, size)).astype(bool)
+    perturbed_states = initial_states.copy()
+    perturbed_states[:, size // 2] ^= True
+
+    chunks = []
+    for start in range(0, len(rule_numbers), batch_size):
+        chunk = rule_numbers[start:start + batch_size]
+        chunk2 = None if rule2_numbers is None else rule2_numbers[start:start + batch_size]
+
+        totals = {}
+        for initial_state, perturbed_state in zip(initial_states, perturbed_states):
+            batch = BatchAutomaton(size, steps, chunk, chunk2, initial_state=initial_state)
+            batch.run()
+            perturbed = BatchAutomaton(size, steps, chunk, chunk2, initial_state=perturbed_state)
+            perturbed.run()
+
+            cycles = [batch.get_cycle(index) for index in range(len(chunk))]
+            for name, values in grid_metrics(batch.get_grids(), perturbed.get_grids(), cycles).items():
+                totals[name] = totals.get(name, 0) + values / samples
+        chunks.append(totals)
+
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+def classify(rule_numbers=range(256), rule2_numbers=None, **settings):
+    """
+    Return the Wolfram class (1 to 4) of each rule, or of each composition with 'rule2_numbers'.
+    :param settings: simulation settings of 'measure' (size, steps, samples, seed, batch_size).
+    :return: np.ndarray (uint8).
+    """
+    return assign_classes(measure(rule_numbers, rule2_numbers, **settings))
+
+def classify_pairs(pairs, **settings):
+    """
+    Return the class of each (rule, rule2) pair; a pair whose rule2 is None is classified as the single rule.
+    """
+    pairs = list(pairs)
+    classes = np.empty(len(pairs), dtype=np.uint8)
+    single = [index for index, (_, rule2) in enumerate(pairs) if rule2 is None]
+    composed = [index for index, (_, rule2) in enumerate(pairs) if rule2 is not None]
+    if single:
+        classes[single] = classify([pairs[index][0] for index in single], **settings)
+    if composed:
+        classes[composed] = classify([pairs[index][0] for index in composed], [pairs[index][1] for index in composed], **settings)
+    return classes
+
+def pair_class_table(cache_dir: str = None, seed: int = 0, **settings):
+    """
+    Return the (256, 256) table of the classes of every composition (entry [rule, rule2]; the diagonal holds the
+    class of the rule composed with itself), so the class of a pair is an O(1) lookup. Classifying the 65,536
+    pairs takes minutes, so the table is kept in a TableCache when 'cache_dir' is given.
+    :param seed: int, seed of the initial rows (part of the cache key, with the other settings).
+    """
+    key = 'pair_classes_' + '_'.join(f'{name}{value}' for name, value in sorted({'seed': seed, **settings}.items()))
+    cache = TableCache(cache_dir, version=PAIR_TABLE_VERSION) if cache_dir is not None else None
+    if cache is not None:
+        table = cache.load(key)
+        if table is not None:
+            return table
+
+    rule_numbers, rule2_numbers = np.divmod(np.arange(256 * 256), 256)
+    table = classify(rule_numbers.tolist(), rule2_numbers.tolist(), seed=seed, **settings).reshape(256, 256)
+    return cache.store(key, table) if cache is not None else table
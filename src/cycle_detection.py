@@ -0,0 +1,192 @@
+# File: cycle_detection.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Early termination of a simulation that falls into a fixed point or a cycle. Every few
+#              steps the new row is compared with the recent rows, up to a rotation (a shifted cycle,
+#              e.g. rule 184 or rule 2); once a row repeats, the rest of the grid is the cycle tiled,
+#              not simulated.
+
+import numpy as np
+
+# Number of recent (checked) rows a new row is compared with, and steps between two checked rows.
+# Only the checked rows are compared, so a cycle of period p shows up as a repeat after lcm(p, CYCLE_STRIDE)
+# steps, i.e. p // gcd(p, CYCLE_STRIDE) checked rows: it is detected only when that is at most CYCLE_WINDOW
+# (every period up to 64, and the longer ones sharing a factor with the stride, e.g. 68 but not 67 or 65)
+CYCLE_WINDOW = 64
+CYCLE_STRIDE = 8
+
+# Base of the polynomial row hash (odd, so it is invertible modulo 2 ** 64)
+_HASH_BASE = 0x9E3779B97F4A7C15
+_HASH_BASE_INVERSE = pow(_HASH_BASE, -1, 2**64)
+
+def row_fingerprints(rows):
+    """
+    Return a fingerprint of every row that does not change when the row is rotated: the number of live
+    cells and the number of unequal pairs of cells at distance 1 and 2 (around the ring). Only rows with
+    the same fingerprint can be rotations of each other.
+    :param rows: np.ndarray (bool), one row or a stack of rows.
+    :return: np.ndarray (int), shape (3,) for one row or (n_rows, 3) for a stack.
+    """
+    cells = rows.view(np.uint8)
+    statistics = [cells.sum(axis=-1, dtype=np.int64)]
+    for distance in (1, 2):
+        inner = (cells[..., distance:] ^ cells[..., :-distance]).sum(axis=-1, dtype=np.int64)
+        around = (cells[..., -distance:] ^ cells[..., :distance]).sum(axis=-1, dtype=np.int64)
+        statistics.append(inner + around)
+    return np.stack(statistics, axis=-1)
+
+def _hash_powers(size: int):
+    """
+    Powers B ** i and B ** -i (i < size) of the hash base, and B ** size - 1, modulo 2 ** 64.
+    """
+    powers = np.full(size, _HASH_BASE, dtype=np.uint64)
+    inverse = np.full(size, _HASH_BASE_INVERSE, dtype=np.uint64)
+    powers[0] = inverse[0] = 1
+    return np.cumprod(powers), np.cumprod(inverse), np.uint64((pow(_HASH_BASE, size, 2**64) - 1) % 2**64)
+
+def rotation_hash(row, powers):
+    """
+    Return a hash of the row that is the same for all of its rotations: the smallest polynomial hash
+    (modulo 2 ** 64) over the rotations, all of them computed at once from the prefix sums of the row.
+    :param powers: tuple, '_hash_powers(len(row))'.
+    """
+    powers, inverse, wrap = powers
+    terms = row.astype(np.uint64) * powers
+    prefix = np.cumsum(terms, dtype=np.uint64)
+    total = prefix[-1]
+    prefix[1:] = prefix[:-1]
+    prefix[0] = 0
+
+    # Rotação por j: B^j * H = S + (B^N - 1) * P_j, com P_j a soma dos j primeiros termos
+    return int(((prefix * wrap + total) * inverse).min())
+
+def find_shift(previous, row):
+    """
+    Return the shift 'k' with np.roll(previous, k) == row (0 when the rows are equal), or None.
+    """
+    # 'row' é uma rotação de 'previous' se e somente se aparece em 'previous + previous'
+    doubled = np.concatenate([previous, previous]).view(np.uint8).tobytes()
+    position = doubled.find(row.view(np.uint8).tobytes())
+    return None if position < 0 else (len(row) - position) % len(row)
+
+def rotation_period(row):
+    """
+    Return the smallest shift 'q' > 0 with np.roll(row, q) == row (the size of the row when there is none smaller).
+    The shift of a cycle is only defined modulo this period.
+    """
+    doubled = np.concatenate([row, row]).view(np.uint8).tobytes()
+    return doubled.find(row.view(np.uint8).tobytes(), 1)
+
+def tile_cycle(grid, cycle, step: int):
+    """
+    Fill the rows of 'grid' after 'step' by repeating the cycle that ends at 'step'. Each block copied
+    doubles the rows already known, so the grid is filled with about log2(rows / period) copies.
+    :param grid: np.ndarray, shape (rows, size), simulated up to row 'step'.
+    :param cycle: dict, as returned by 'CycleDetector.observe' for row 'step'.
+    """
+    period, shift = cycle['period'], cycle['shift']
+    start = step - period
+    filled = step + 1
+    while filled < len(grid):
+        # Linha u = roll(linha u - L, (L / período) * deslocamento), para L múltiplo do período
+        span = (filled - start) // period * period
+        count = min(span, len(grid) - filled)
+        offset = span // period * shift % grid.shape[-1]
+        source = grid[filled - span:filled - span + count]
+        grid[filled:filled + count] = np.roll(source, offset, axis=-1) if offset else source
+        filled += count
+
+class CycleDetector:
+    def __init__(self, grids, window: int = CYCLE_WINDOW, stride: int = CYCLE_STRIDE):
+        """
+        Detect when the rows of one or several simulations start repeating, up to a rotation. One row every
+        'stride' steps is checked: the fingerprints of the last 'window' checked rows of each simulation are kept
+        in a ring buffer and compared with the new rows all at once; only on a match is the rotation hash of the
+        rows computed (and kept), and a repeat confirmed byte by byte. The repeat found is a multiple of the
+        period, so the period and the transient are then narrowed down on the rows already simulated. The rows
+        themselves are read back from the grids, so nothing else is copied.
+
+        :param grids: np.ndarray (bool), shape (n_grids, rows, size), the grids being simulated.
+        :param window: int, number of recent checked rows of each grid compared with a new row.
+        :param stride: int, steps between two checked rows.
+        """
+        self.__grids = grids
+        self.__window = window
+        self.__stride = stride
+        count = len(grids)
+        self.__fingerprints = np.full((count, window, 3), -1, dtype=np.int64)
+        self.__steps = np.full((count, window), -1, dtype=np.int64)
+        self.__hashes = {}
+        self.__powers = None
+
+    def __rotation_hash(self, position, step):
+        key = (position, step)
+        if key not in self.__hashes:
+            if self.__powers is None:
+                self.__powers = _hash_powers(self.__grids.shape[-1])
+            self.__hashes[key] = rotation_hash(self.__grids[position, step], self.__powers)
+        return self.__hashes[key]
+
+    def __find_cycle(self, position, step, slots):
+        """
+        Compare row 'step' of a grid with its recent rows that have the same fingerprint, most recent first.
+        """
+        current = self.__rotation_hash(position, step)
+        for previous_step in sorted(self.__steps[position, slots], reverse=True):
+            if self.__rotation_hash(position, previous_step) != current:
+                continue
+            if find_shift(self.__grids[position, previous_step], self.__grids[position, step]) is not None:
+                return self.__narrow_cycle(self.__grids[position], step, int(step - previous_step))
+        return None
+
+    @staticmethod
+    def __narrow_cycle(grid, step, repeat):
+        """
+        Find the period, shift and transient of a grid whose row 'step' repeats row 'step - repeat' (up to a rotation).
+        The period is the smallest divisor of 'repeat' that also repeats, and the transient the first row that the
+        period repeats (once a row repeats, every later row does, so it is found by bisection).
+        """
+        period = next(divisor for divisor in range(1, repeat + 1)
+                      if repeat % divisor == 0 and find_shift(grid[step - divisor], grid[step]) is not None)
+
+        low, high = 0, step - period
+        while low < high:
+            middle = (low + high) // 2
+            if find_shift(grid[middle], grid[middle + period]) is not None:
+                high = middle
+            else:
+                low = middle + 1
+        # O menor deslocamento válido, já que linhas com simetria de rotação admitem vários
+        shift = find_shift(grid[step - period], grid[step]) % rotation_period(grid[step])
+        return {'transient': low, 'period': period, 'shift': int(shift)}
+
+    def observe(self, step: int, positions=None):
+        """
+        Add row 'step' of the given grids and check whether it repeats a recent row of the same grid.
+        :param step: int, the step of the rows (steps must be observed in order, from 0). Only the steps that are
+                     multiples of the stride are checked; the others return at once.
+        :param positions: np.ndarray (int) (optional), the grids to check. Defaults to all of them.
+        :return: dict mapping the position of each grid whose rows repeat to its cycle: a dict with the 'transient'
+                 (first step of the cycle), the 'period' and the 'shift' (row 'step' is np.roll of row 'step - period'
+                 by 'shift', the smallest such shift).
+        """
+        if step % self.__stride:
+            return {}
+        positions = np.arange(len(self.__grids)) if positions is None else positions
+        fingerprints = row_fingerprints(self.__grids[positions, step])
+
+        cycles = {}
+        matches = (self.__fingerprints[positions] == fingerprints[:, None]).all(axis=-1)
+        for index in np.flatnonzero(matches.any(axis=-1)):
+            cycle = self.__find_cycle(positions[index], step, np.flatnonzero(matches[index]))
+            if cycle is not None:
+                cycles[int(positions[index])] = cycle
+
+        # A posição do passo no buffer circular substitui a linha mais antiga
+        slot = step // self.__stride % self.__window
+        self.__fingerprints[positions, slot] = fingerprints
+        self.__steps[positions, slot] = step
+        if self.__hashes and slot == self.__window - 1:
+            # Esquece os hashes das linhas que já saíram da janela
+            self.__hashes = {key: value for key, value in self.__hashes.items() if key[1] > step - self.__window * self.__stride}
+        return cycles
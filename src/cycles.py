@@ -0,0 +1,224 @@
+# File: cycles.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Functional-graph analysis of a rule on a finite ring: every state eventually
+#              falls into a cycle, so each state has a transient length and a period.
+
+import csv
+
+import numpy as np
+
+from state_space import transition_table
+
+class CycleAnalysis:
+    def __init__(self, rule: int, size: int, transitions=None):
+        """
+        Structure of the state transition graph of a rule on a ring of 'size' cells.
+        Every state 's' has exactly one successor T[s], so the graph is a set of cycles with
+        trees hanging from them. Every quantity is computed in time linear in the number of
+        states: whole-array passes over T, except for the walk around the cycles, which visits
+        each state of a cycle longer than 1 exactly once.
+
+        :param rule: int (0-255), the rule ID.
+        :param size: int, number of cells of the ring.
+        :param transitions: np.ndarray (optional), precomputed 'transition_table(rule, size)'.
+        """
+        self.__rule = rule
+        self.__size = size
+        self.__transitions = transitions if transitions is not None else transition_table(rule, size)
+
+        self.__on_cycle, levels = self.__find_cycle_states()
+        self.__attractors, self.__periods, self.__cycles = self.__label_cycles()
+        self.__transients = self.__measure_transients(levels)
+
+    #### ANALYSIS METHODS ####
+
+    def __find_cycle_states(self):
+        """
+        Peel the states that have no predecessor left, level by level (Kahn's algorithm).
+        The states that are never peeled are exactly the states on cycles. Each level costs time
+        proportional to its size (unbuffered scatters, no sort), so the whole peeling is linear.
+        :return: (on_cycle, levels), the cycle states mask and the states peeled at each level, in order.
+        """
+        transitions = self.__transitions
+        in_degree = np.bincount(transitions, minlength=len(transitions))
+        on_cycle = np.ones(len(transitions), dtype=bool)
+        last = np.full(len(transitions), -1, dtype=np.int64)
+
+        levels = []
+        frontier = np.flatnonzero(in_degree == 0)
+        while len(frontier):
+            on_cycle[frontier] = False
+            levels.append(frontier)
+            targets = transitions[frontier]
+            np.subtract.at(in_degree, targets, 1)
+            # Um sucessor que perdeu todos os predecessores aparece uma vez por predecessor: fica só a última ocorrência
+            freed = targets[in_degree[targets] == 0]
+            order = np.arange(len(freed))
+            np.maximum.at(last, freed, order)
+            frontier = freed[last[freed] == order]
+
+        return on_cycle, levels
+
+    def __label_cycles(self):
+        """
+        Identify each cycle by its smallest state, walking each cycle once. The fixed points are
+        labelled at once; the other cycle states are taken in increasing order, so the first one of
+        a cycle not labelled yet is its smallest state, and the cycle is followed from it until it
+        closes, labelling every state on the way.
+        :return: (ids, periods, cycles), the cycle id and period of every cycle state (-1 elsewhere),
+                 and a dict mapping each cycle id to its period.
+        """
+        transitions = self.__transitions
+        cycle_states = np.flatnonzero(self.__on_cycle)
+        fixed = transitions[cycle_states] == cycle_states
+        moving = cycle_states[~fixed]
+
+        # Caminhada em índices compactos (posição em 'moving'), com listas em vez de arrays, estado por estado
+        position = np.full(len(transitions), -1, dtype=np.int64)
+        position[moving] = np.arange(len(moving))
+        successors = position[transitions[moving]].tolist()
+        visited = bytearray(len(moving))
+        starts, lengths, members = [], [], []
+        for start in range(len(moving)):
+            if visited[start]:
+                continue
+            first, state = len(members), start
+            while not visited[state]:
+                visited[state] = 1
+                members.append(state)
+                state = successors[state]
+            starts.append(start)
+            lengths.append(len(members) - first)
+        starts, lengths, members = moving[starts], np.asarray(lengths, dtype=np.int64), moving[members]
+
+        ids = np.full(len(transitions), -1, dtype=np.int64)
+        periods = np.full(len(transitions), -1, dtype=np.int64)
+        ids[cycle_states[fixed]] = cycle_states[fixed]
+        periods[cycle_states[fixed]] = 1
+        ids[members] = np.repeat(starts, lengths)
+        periods[members] = np.repeat(lengths, lengths)
+
+        cycles = dict.fromkeys(cycle_states[fixed].tolist(), 1)
+        cycles.update(zip(starts.tolist(), lengths.tolist()))
+        return ids, periods, dict(sorted(cycles.items()))
+
+    def __measure_transients(self, levels):
+        """
+        Go through the peeled levels backwards: the successor of a state peeled at some level is on a
+        cycle or was peeled at a later level, so its transient, cycle id and period are already known
+        and the state inherits them (one more step for the transient). No predecessor lists are needed.
+        :param levels: list of np.ndarray, the states peeled at each level (see '__find_cycle_states').
+        :return: np.ndarray, the distance of every state to its cycle.
+        """
+        transitions = self.__transitions
+        transients = np.zeros(len(transitions), dtype=np.int64)
+
+        for frontier in reversed(levels):
+            successors = transitions[frontier]
+            transients[frontier] = transients[successors] + 1
+            self.__attractors[frontier] = self.__attractors[successors]
+            self.__periods[frontier] = self.__periods[successors]
+
+        return transients
+
+    #### STEP REDUCTION ####
+
+    def reduce_steps(self, steps, states):
+        """
+        Replace each step count by the smallest equivalent one: once a state has gone through its
+        transient, only the remainder modulo the period of its cycle matters. The result is always
+        below 2 ** size.
+        :param steps: int or np.ndarray (uint64), number of steps of each query.
+        :param states: int or np.ndarray, encoded initial state of each query.
+        :return: the reduced step counts, with the same shape as 'steps'.
+        """
+        if np.isscalar(steps) and np.isscalar(states):
+            transient = int(self.__transients[states])
+            if steps <= transient:
+                return steps
+            return transient + (steps - transient) % int(self.__periods[states])
+
+        steps = np.asarray(steps, dtype=np.uint64)
+        transients = self.__transients[states].astype(np.uint64)
+        periods = self.__periods[states].astype(np.uint64)
+        beyond = steps > transients
+        reduced = steps.copy()
+        reduced[beyond] = transients[beyond] + (steps[beyond] - transients[beyond]) % periods[beyond]
+        return reduced
+
+    #### GETTERS ####
+
+    def get_transitions(self):
+        return self.__transitions
+
+    def get_on_cycle(self):
+        """
+        Return a boolean array marking the states that lie on a cycle.
+        """
+        return self.__on_cycle
+
+    def get_attractors(self):
+        """
+        Return the id (smallest state) of the cycle every state falls into.
+        """
+        return self.__attractors
+
+    def get_transients(self):
+        """
+        Return the number of steps every state takes to reach its cycle.
+        """
+        return self.__transients
+
+    def get_periods(self):
+        """
+        Return the period of the cycle every state falls into.
+        """
+        return self.__periods
+
+    def get_cycles(self):
+        """
+        Return a dict mapping each cycle id to its period.
+        """
+        return self.__cycles
+
+    def get_basins(self):
+        """
+        Return a dict mapping each cycle id to the number of states that fall into it (its basin size).
+        """
+        cycles, sizes = np.unique(self.__attractors, return_counts=True)
+        return {int(cycle): int(size) for cycle, size in zip(cycles, sizes)}
+
+    def summary(self):
+        """
+        Return the statistics of the rule on this ring as a dict.
+        """
+        return {
+            'rule': self.__rule,
+            'size': self.__size,
+            'cycles': len(self.__cycles),
+            'cycle_states': int(self.__on_cycle.sum()),
+            'max_period': max(self.__cycles.values()),
+            'mean_period': float(self.__periods.mean()),
+            'max_transient': int(self.__transients.max()),
+            'mean_transient': float(self.__transients.mean()),
+            'largest_basin': max(self.get_basins().values()),
+        }
+
+def rule_statistics(size: int, rule_numbers=range(256)):
+    """
+    Analyse every rule in 'rule_numbers' on a ring of 'size' cells.
+    :return: list of dict, one 'CycleAnalysis.summary()' per rule.
+    """
+    return [CycleAnalysis(rule, size).summary() for rule in rule_numbers]
+
+def export_statistics(path: str, size: int, rule_numbers=range(256)):
+    """
+    Write the per-rule statistics of 'rule_statistics' to a CSV file.
+    """
+    statistics = rule_statistics(size, rule_numbers)
+    with open(path, 'w', newline='') as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(statistics[0].keys()))
+        writer.writeheader()
+        writer.writerows(statistics)
+    return statistics
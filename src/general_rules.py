@@ -0,0 +1,219 @@
+# File: general_rules.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Rules of radius r with k states, beyond the elementary (radius 1, 2 states) ones.
+#              A rule is either a full table (one next state per neighborhood, Wolfram code in base k)
+#              or totalistic (one next state per neighborhood sum). The table is compiled once per
+#              rule, and the neighborhood index of a whole row is a sliding-window convolution.
+
+import numpy as np
+
+# Largest full table compiled (k ** (2r + 1) entries), to keep the table in cache and in memory
+MAX_TABLE_ENTRIES = 2**24
+
+def _index_dtype(entries: int):
+    """
+    Smallest unsigned type that holds every neighborhood index of a table with 'entries' entries.
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if entries <= np.iinfo(dtype).max + 1:
+            return dtype
+    return np.uint64
+
+def window_index(state, radius: int, states: int = 2, totalistic: bool = False, dtype=None):
+    """
+    Compute the neighborhood index of every cell, using periodic boundary conditions along the last axis.
+    The index is the convolution of the row with the kernel (k ** 2r, ..., k, 1) (the leftmost neighbor is the
+    most significant digit in base k, as in 'rules.neighborhood_index'), or with a kernel of ones (the
+    neighborhood sum) for totalistic rules. It is accumulated one window offset at a time (Horner's scheme),
+    on slices of a wrapped copy of the row, so no shifted copies are allocated.
+
+    :param state: np.ndarray (bool or uint8), one row or a stack of rows, with values below 'states'.
+    :param radius: int, number of neighbors on each side.
+    :param states: int, number of cell states (k).
+    :param totalistic: bool, whether to sum the neighborhood instead of reading it as a base-k number.
+    :param dtype: numpy type of the index (optional). Defaults to the smallest type that holds every index.
+    :return: np.ndarray, neighborhood index of each cell.
+    """
+    width = 2 * radius + 1
+    if dtype is None:
+        dtype = _index_dtype(width * (states - 1) + 1 if totalistic else states ** width)
+
+    cells = state.view(np.uint8) if state.dtype == np.bool_ else state
+    size = cells.shape[-1]
+    # Linha estendida com 'radius' células de cada lado, copiadas da outra ponta do anel
+    if radius <= size:
+        wrapped = np.concatenate((cells[..., size - radius:], cells, cells[..., :radius]), axis=-1)
+    else:
+        wrapped = np.take(cells, np.arange(-radius, size + radius) % size, axis=-1)
+
+    index = wrapped[..., :size].astype(dtype)
+    for offset in range(1, width):
+        if not totalistic:
+            index *= dtype(states)
+        index += wrapped[..., offset:offset + size]
+    return index
+
+class GeneralRule:
+    def __init__(self, number: int = None, radius: int = 1, states: int = 2, totalistic: bool = False, table=None):
+        """
+        Rule of radius 'radius' with 'states' states, given by its number or by its table.
+        The number is the Wolfram code: digit i (in base 'states') of the number is the next state of the
+        neighborhood with index i, so GeneralRule(n) has the same table as the elementary rule n. For a totalistic
+        rule, digit s is the next state of the neighborhoods whose cells sum to s.
+
+        :param number: int (optional), Wolfram code of the rule.
+        :param radius: int, number of neighbors on each side.
+        :param states: int, number of cell states (k).
+        :param totalistic: bool, whether the rule depends only on the sum of the neighborhood.
+        :param table: array-like (optional), next state of each neighborhood index (or sum), instead of 'number'.
+        """
+        self.__radius = self.__validate_radius(radius)
+        self.__states = self.__validate_states(states)
+        self.__totalistic = totalistic
+        self.__entries = self.__count_entries()
+        self.__index_dtype = _index_dtype(self.__entries)
+
+        if (number is None) == (table is None):
+            raise ValueError("\033[31m[ERROR] Give either the rule number or its table.\033[0m")
+        self.__table = self.__compile_table(number) if table is None else self.__validate_table(table)
+        self.__table.flags.writeable = False
+        self.__number = number if number is not None else self.__table_number()
+        self.__label = self.__set_label()
+
+    #### VALIDATION METHODS ####
+
+    @staticmethod
+    def __validate_radius(radius):
+        if not isinstance(radius, (int, np.integer)) or radius < 1:
+            raise ValueError("\033[31m[ERROR] Radius must be a positive integer.\033[0m")
+        return int(radius)
+
+    @staticmethod
+    def __validate_states(states):
+        if not isinstance(states, (int, np.integer)) or not 2 <= states <= 256:
+            raise ValueError("\033[31m[ERROR] Number of states must be in the range 2-256.\033[0m")
+        return int(states)
+
+    def __count_entries(self):
+        """
+        Number of entries of the table: k ** (2r + 1) neighborhoods, or (2r + 1)(k - 1) + 1 sums.
+        """
+        width = 2 * self.__radius + 1
+        if self.__totalistic:
+            return width * (self.__states - 1) + 1
+
+        entries = self.__states ** width
+        if entries > MAX_TABLE_ENTRIES:
+            raise ValueError(f"\033[31m[ERROR] A full table of {entries} entries is too large. Use a totalistic rule.\033[0m")
+        return entries
+
+    def __validate_table(self, table):
+        table = np.array(table, dtype=np.uint8)
+        if table.shape != (self.__entries,):
+            raise ValueError(f"\033[31m[ERROR] Rule table must have {self.__entries} entries.\033[0m")
+        if table.max(initial=0) >= self.__states:
+            raise ValueError(f"\033[31m[ERROR] Rule table values must be in the range 0-{self.__states - 1}.\033[0m")
+        return table
+
+    #### TABLE COMPILATION ####
+
+    def __compile_table(self, number):
+        """
+        Expand the Wolfram code into the table of next states (digit i of the number in base k is entry i).
+        """
+        if not isinstance(number, (int, np.integer)) or not 0 <= number < self.__states ** self.__entries:
+            raise ValueError(f"\033[31m[ERROR] Invalid rule number. Must be in the range 0-{self.__states ** self.__entries - 1}.\033[0m")
+
+        number = int(number)
+        if self.__states == 2:
+            # Base 2: os dígitos são os bits do número, em ordem little-endian
+            packed = np.frombuffer(number.to_bytes((self.__entries + 7) // 8, 'little'), dtype=np.uint8)
+            return np.unpackbits(packed, count=self.__entries, bitorder='little')
+
+        table = np.empty(self.__entries, dtype=np.uint8)
+        for index in range(self.__entries):
+            number, table[index] = divmod(number, self.__states)
+        return table
+
+    def __table_number(self):
+        """
+        Wolfram code of the table (the inverse of '__compile_table').
+        """
+        if self.__states == 2:
+            return int.from_bytes(np.packbits(self.__table, bitorder='little').tobytes(), 'little')
+
+        number = 0
+        for value in self.__table[::-1]:
+            number = number * self.__states + int(value)
+        return number
+
+    def __set_label(self):
+        kind = 'Totalistic rule' if self.__totalistic else 'Rule'
+        if self.__radius == 1 and self.__states == 2 and not self.__totalistic:
+            return f"{kind} {self.__number}"
+        return f"{kind} {self.__number} (r={self.__radius}, k={self.__states})"
+
+    #### SIMULATION METHODS ####
+
+    def neighborhood_index(self, state):
+        """
+        Return the neighborhood index (or sum) of every cell of a row or stack of rows.
+        """
+        return window_index(state, self.__radius, self.__states, self.__totalistic, self.__index_dtype)
+
+    def apply(self, state):
+        """
+        Apply the rule to a whole row (or stack of rows) at once.
+        :param state: np.ndarray (bool or uint8), current state, with values below the number of states.
+        :return: np.ndarray (uint8), next state.
+        """
+        return self.__table[self.neighborhood_index(state)]
+
+    def run(self, initial_state, steps: int):
+        """
+        Simulate the rule on a ring.
+        :param initial_state: array-like (int), initial row, with values below the number of states.
+        :param steps: int, number of steps to simulate.
+        :return: np.ndarray (uint8), grid of shape (steps + 1, size), starting with the initial state.
+        """
+        initial_state = np.asarray(initial_state, dtype=np.uint8)
+        if initial_state.max(initial=0) >= self.__states:
+            raise ValueError(f"\033[31m[ERROR] Initial state values must be in the range 0-{self.__states - 1}.\033[0m")
+
+        grid = np.empty((steps + 1, len(initial_state)), dtype=np.uint8)
+        grid[0] = initial_state
+        for step in range(steps):
+            grid[step + 1] = self.apply(grid[step])
+        return grid
+
+    #### GETTERS ####
+
+    def get_number(self):
+        return self.__number
+
+    def get_radius(self):
+        return self.__radius
+
+    def get_states(self):
+        return self.__states
+
+    def is_totalistic(self):
+        return self.__totalistic
+
+    def get_lookup_table(self):
+        return self.__table
+
+    def get_label(self):
+        return self.__label
+
+def get_general_rule(number: int, radius: int = 1, states: int = 2, totalistic: bool = False):
+    """
+    Return the (cached) GeneralRule with this number, so each table is compiled only once.
+    """
+    key = (int(number), radius, states, totalistic)
+    if key not in general_rules:
+        general_rules[key] = GeneralRule(number, radius, states, totalistic)
+    return general_rules[key]
+
+general_rules = {}
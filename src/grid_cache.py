@@ -0,0 +1,96 @@
+# File: grid_cache.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Content-addressed cache of simulated grids. A grid depends only on the rule pair,
+#              the initial row and the number of steps, so it is stored under a hash of those and
+#              reused by later runs (and reruns) with the same configuration.
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+from table_cache import TableCache
+
+CACHE_VERSION = 1
+
+def grid_key(rule: int, rule2: int, initial_state, steps: int):
+    """
+    Return the cache key of a simulation: SHA-256 of the rule pair, the number of steps, the size and
+    the bit-packed initial row.
+    """
+    initial_state = np.asarray(initial_state, dtype=bool)
+    digest = hashlib.sha256()
+    digest.update(f'{rule}:{-1 if rule2 is None else rule2}:{steps}:{len(initial_state)}:'.encode())
+    digest.update(np.packbits(initial_state).tobytes())
+    return digest.hexdigest()
+
+class GridCache:
+    def __init__(self, max_bytes: int = 256 * 2**20, path: str = None, disk_max_bytes: int = None):
+        """
+        Two-tier cache of grids: an in-memory LRU tier and, when 'path' is given, an on-disk tier
+        (a TableCache, shared by every process using the same directory). Grids are kept bit-packed.
+
+        :param max_bytes: int, size cap of the in-memory tier, in bytes.
+        :param path: str (optional), directory of the on-disk tier.
+        :param disk_max_bytes: int (optional), size cap of the on-disk tier, in bytes.
+        """
+        self.__max_bytes = max_bytes
+        self.__memory = OrderedDict()
+        self.__nbytes = 0
+        self.__disk = TableCache(path, version=CACHE_VERSION, max_bytes=disk_max_bytes) if path is not None else None
+        self.__hits = 0
+        self.__misses = 0
+
+    def __remember(self, key, packed):
+        if packed.nbytes > self.__max_bytes:
+            return
+        if key in self.__memory:
+            self.__nbytes -= self.__memory.pop(key).nbytes
+        self.__memory[key] = packed
+        self.__nbytes += packed.nbytes
+
+        while self.__nbytes > self.__max_bytes:
+            _, evicted = self.__memory.popitem(last=False)
+            self.__nbytes -= evicted.nbytes
+
+    def get(self, key: str, size: int):
+        """
+        Return the cached grid for 'key' as a (rows, size) boolean array, or None.
+        """
+        packed = self.__memory.get(key)
+        if packed is not None:
+            self.__memory.move_to_end(key)
+        elif self.__disk is not None:
+            packed = self.__disk.load(key)
+            if packed is not None:
+                packed = np.array(packed)
+                self.__remember(key, packed)
+
+        if packed is None:
+            self.__misses += 1
+            return None
+        self.__hits += 1
+        return np.unpackbits(packed, axis=1, count=size).astype(bool)
+
+    def put(self, key: str, grid):
+        """
+        Store a grid under 'key', in memory and on disk.
+        """
+        packed = np.packbits(grid, axis=1)
+        self.__remember(key, packed)
+        if self.__disk is not None:
+            self.__disk.store(key, packed)
+
+    def __getstate__(self):
+        # O nível em memória é de cada processo: só a configuração e o nível em disco vão para os workers
+        state = self.__dict__.copy()
+        state['_GridCache__memory'] = OrderedDict()
+        state['_GridCache__nbytes'] = 0
+        return state
+
+    def get_stats(self):
+        """
+        Return the hits, misses and in-memory size of the cache as a dict.
+        """
+        return {'hits': self.__hits, 'misses': self.__misses, 'entries': len(self.__memory), 'nbytes': self.__nbytes}
@@ -0,0 +1,249 @@
+# File: hashlife.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Hashlife for one-dimensional rules. The line is a binary tree of hash-consed
+#              nodes (equal segments share one node) and the future centre of every node is
+#              memoized, so repetitive space-time patterns (class II and IV rules) are computed
+#              once and reused; generation 10^12 of a ring costs about log2(10^12) passes.
+
+import numpy as np
+
+from rules import rules
+
+# Leaves hold 2 ** LEAF_LEVEL cells as a Python int (leftmost cell in the most significant bit)
+LEAF_LEVEL = 6
+LEAF_CELLS = 1 << LEAF_LEVEL
+LEAF_MASK = (1 << LEAF_CELLS) - 1
+
+def _int_step(cells, rule: int, mask: int):
+    """
+    One generation of 'rule' on a segment stored in an int, as a sum of minterms. The cells at the two
+    ends see the zero padding, so only the inner cells are meaningful.
+    """
+    left, right = cells >> 1, (cells << 1) & mask
+    not_left, not_center, not_right = ~left & mask, ~cells & mask, ~right & mask
+    result = 0
+    for index in range(8):
+        if (rule >> index) & 1:
+            term = left if index & 4 else not_left
+            term &= cells if index & 2 else not_center
+            term &= right if index & 1 else not_right
+            result |= term
+    return result
+
+class HashlifeAutomaton:
+    def __init__(self, size: int, rule: int, rule2: int = None, initial_state=None, max_nodes: int = 2**22):
+        """
+        Ring of 'size' cells evolved with Hashlife. The ring is unrolled into a periodic line: a node of
+        level 'k' holds 2 ** k cells, and its result is the centre half of the segment after 2 ** (k - 1 - radius)
+        steps (the cells the light cone still determines). Results are built from the results of the
+        children (two half-speed passes), so each distinct segment is evolved only once. Below the leaf
+        level the cells are evolved directly, with bitwise operations on ints.
+
+        :param size: int, number of cells of the ring.
+        :param rule: int (0-255), the rule.
+        :param rule2: int (optional), second rule: each generation applies 'rule' and then 'rule2' (radius 2),
+                      as the composite tables of rules.py.
+        :param initial_state: np.ndarray (bool) (optional), initial row. Random if not given.
+        :param max_nodes: int, node count above which the tables are cleared between jumps, to bound memory.
+        """
+        if rule not in rules or (rule2 is not None and rule2 not in rules):
+            raise ValueError("\033[31m[ERROR] Invalid rule number. Must be in the range 0-255.\033[0m")
+        self.__rules = (rule,) if rule2 is None else (rule, rule2)
+        self.__radius = len(self.__rules)
+        self.__size = size
+        self.__max_nodes = max_nodes
+        self.__generation = 0
+
+        if initial_state is None:
+            initial_state = np.random.randint(0, 2, size, dtype=bool)
+        self.set_state(initial_state)
+        self.clear()
+
+    #### NODE TABLES ####
+
+    def clear(self):
+        """
+        Drop every node and memoized result (the current row is kept).
+        """
+        # Folhas: filhos -1 e o valor das células em 'values'
+        self.__left = []
+        self.__right = []
+        self.__level = []
+        self.__values = []
+        self.__nodes = {}
+        self.__leaves = {}
+        self.__results = {}
+
+    def __new(self, left, right, level, value):
+        node = len(self.__level)
+        self.__left.append(left)
+        self.__right.append(right)
+        self.__level.append(level)
+        self.__values.append(value)
+        return node
+
+    def __leaf(self, value):
+        node = self.__leaves.get(value)
+        if node is None:
+            node = self.__new(-1, -1, LEAF_LEVEL, value)
+            self.__leaves[value] = node
+        return node
+
+    def __node(self, left, right):
+        """
+        Return the (unique) node with these children.
+        """
+        key = (left, right)
+        node = self.__nodes.get(key)
+        if node is None:
+            node = self.__new(left, right, self.__level[left] + 1, None)
+            self.__nodes[key] = node
+        return node
+
+    def __centre(self, node):
+        """
+        Centre half of a node, without evolving it.
+        """
+        left, right = self.__left[node], self.__right[node]
+        if self.__level[node] == LEAF_LEVEL + 1:
+            half = LEAF_CELLS // 2
+            return self.__leaf(((self.__values[left] << half) | (self.__values[right] >> half)) & LEAF_MASK)
+        return self.__node(self.__right[left], self.__left[right])
+
+    #### EVOLUTION ####
+
+    def __evolve_cells(self, node, speed):
+        """
+        Result of a node just above the leaves, evolving its 2 * LEAF_CELLS cells directly.
+        """
+        cells = (self.__values[self.__left[node]] << LEAF_CELLS) | self.__values[self.__right[node]]
+        mask = (1 << 2 * LEAF_CELLS) - 1
+        for _ in range(1 << speed):
+            for rule in self.__rules:
+                cells = _int_step(cells, rule, mask)
+        return self.__leaf((cells >> LEAF_CELLS // 2) & LEAF_MASK)
+
+    def __result(self, node, speed):
+        """
+        Centre half of a node of level 'k' after 2 ** speed steps, with speed <= k - 1 - radius.
+        """
+        key = (node, speed)
+        result = self.__results.get(key)
+        if result is not None:
+            return result
+
+        level = self.__level[node]
+        if level == LEAF_LEVEL + 1:
+            result = self.__evolve_cells(node, speed)
+        else:
+            left, right = self.__left[node], self.__right[node]
+            middle = self.__node(self.__right[left], self.__left[right])
+
+            # Três metades sobrepostas; na velocidade máxima cada uma já avança metade dos passos
+            if speed == level - 1 - self.__radius:
+                first = [self.__result(child, speed - 1) for child in (left, middle, right)]
+                speed -= 1
+            else:
+                first = [self.__centre(child) for child in (left, middle, right)]
+
+            result = self.__node(
+                self.__result(self.__node(first[0], first[1]), speed),
+                self.__result(self.__node(first[1], first[2]), speed),
+            )
+
+        self.__results[key] = result
+        return result
+
+    def __build(self, level, start, built):
+        """
+        Node of 'level' whose first cell is cell 'start' of the ring (the ring repeated along the line).
+        """
+        key = (level, start)
+        node = built.get(key)
+        if node is None:
+            if level == LEAF_LEVEL:
+                cells = self.__state[(start + np.arange(LEAF_CELLS)) % self.__size]
+                node = self.__leaf(int.from_bytes(np.packbits(cells).tobytes(), 'big'))
+            else:
+                half = 1 << (level - 1)
+                node = self.__node(self.__build(level - 1, start, built), self.__build(level - 1, (start + half) % self.__size, built))
+            built[key] = node
+        return node
+
+    def __read(self, node, count):
+        """
+        First 'count' cells of a node, as a bool array.
+        """
+        values = []
+        stack = [node]
+        while stack and len(values) * LEAF_CELLS < count:
+            node = stack.pop()
+            if self.__level[node] == LEAF_LEVEL:
+                values.append(self.__values[node])
+            else:
+                stack.append(self.__right[node])
+                stack.append(self.__left[node])
+        packed = b''.join(value.to_bytes(LEAF_CELLS // 8, 'big') for value in values)
+        return np.unpackbits(np.frombuffer(packed, dtype=np.uint8), count=count).astype(bool)
+
+    def __jump(self, speed):
+        """
+        Advance the ring by 2 ** speed steps.
+        """
+        # O resultado (metade central do nó) tem que conter uma volta inteira do anel
+        level = max(speed + 1 + self.__radius, (self.__size - 1).bit_length() + 1, LEAF_LEVEL + 1)
+        quarter = 1 << (level - 2)
+
+        # O resultado começa na posição 'quarter' da linha, que corresponde à célula 0 do anel
+        top = self.__build(level, -quarter % self.__size, {})
+        self.__state = self.__read(self.__result(top, speed), self.__size)
+        self.__generation += 1 << speed
+
+        if len(self.__level) > self.__max_nodes:
+            self.clear()
+
+    def advance(self, steps: int):
+        """
+        Advance the ring by 'steps' generations (any non-negative integer, e.g. 10 ** 12).
+        :return: np.ndarray (bool), the new row.
+        """
+        if steps < 0:
+            raise ValueError("\033[31m[ERROR] 'steps' must be non-negative.\033[0m")
+        for speed in range(int(steps).bit_length() - 1, -1, -1):
+            if (steps >> speed) & 1:
+                self.__jump(speed)
+        return self.__state
+
+    def rows_at(self, generations):
+        """
+        Return the rows at the given generations (a downsampled space-time picture), advancing in increasing order.
+        :param generations: iterable of int, generations >= the current one.
+        :return: np.ndarray (bool), shape (len(generations), size), in the order given.
+        """
+        generations = [int(generation) for generation in generations]
+        rows = np.empty((len(generations), self.__size), dtype=bool)
+        for position in sorted(range(len(generations)), key=generations.__getitem__):
+            if generations[position] < self.__generation:
+                raise ValueError("\033[31m[ERROR] Generations before the current one cannot be computed.\033[0m")
+            rows[position] = self.advance(generations[position] - self.__generation)
+        return rows
+
+    #### GETTERS AND SETTERS ####
+
+    def set_state(self, state):
+        """
+        Replace the current row (the generation counter is kept).
+        """
+        if len(state) != self.__size:
+            raise ValueError("\033[31m[ERROR] Initial state must have the same size as the ring.\033[0m")
+        self.__state = np.array(state, dtype=bool)
+
+    def get_state(self):
+        return self.__state
+
+    def get_generation(self):
+        return self.__generation
+
+    def get_node_count(self):
+        return len(self.__level)
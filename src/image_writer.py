@@ -0,0 +1,152 @@
+# File: image_writer.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Background writer of the simulation images. Upscaling, PNG encoding and disk
+#              writes run in a thread pool (zlib and the NumPy copies release the GIL), so
+#              the next rule is simulated while the previous images are being written.
+
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from instrumentation import NO_INSTRUMENTATION
+
+# Number of grid rows upscaled at a time, bounding the temporary memory of 'grid_image'
+IMAGE_ROW_BLOCK = 1024
+
+def grid_image(grid, scale: int = 1):
+    """
+    Return the grid as a 1-bit image (live cells in black), each cell drawn as a 'scale' x 'scale' square.
+    The pixels are bit-packed directly (8 per byte), so the only full-size buffer is the packed image itself.
+    """
+    grid = np.asarray(grid, dtype=bool)
+    height, width = grid.shape
+    row_bytes = (width * scale + 7) // 8
+    packed = np.empty((height, scale, row_bytes), dtype=np.uint8)
+
+    for start in range(0, height, IMAGE_ROW_BLOCK):
+        block = grid[start:start + IMAGE_ROW_BLOCK]
+        if scale > 1:
+            block = np.repeat(block, scale, axis=1)
+        # Cada linha da grade vira 'scale' linhas idênticas da imagem, por broadcast
+        packed[start:start + len(block)] = np.packbits(block, axis=1)[:, None, :]
+
+    # '1;I': bits 1 são pretos (células vivas), bits 0 são brancos
+    return Image.frombuffer('1', (width * scale, height * scale), packed, 'raw', '1;I', 0, 1)
+
+def save_grid_image(grid, path: str, scale: int = 1, compress_level: int = 6, instrumentation=NO_INSTRUMENTATION, key=None):
+    """
+    Save the grid as a PNG file. With an enabled instrumentation, the image is encoded in memory first, so the
+    rendering, the PNG encoding and the disk write are timed as separate phases (and the bytes written counted).
+    :param instrumentation: Instrumentation (optional), where the phases are recorded, for the pair 'key'.
+    """
+    if not instrumentation.is_enabled():
+        grid_image(grid, scale).save(path, 'PNG', compress_level=compress_level)
+        return
+
+    with instrumentation.phase('render', key):
+        image = grid_image(grid, scale)
+    with instrumentation.phase('encode', key):
+        buffer = io.BytesIO()
+        image.save(buffer, 'PNG', compress_level=compress_level)
+    with instrumentation.phase('write', key):
+        with open(path, 'wb') as file:
+            file.write(buffer.getbuffer())
+    instrumentation.count('images', key=key)
+    instrumentation.count('bytes_written', buffer.tell(), key=key)
+
+class ImageWriter:
+    def __init__(self, threads: int = 2, max_pending: int = 8, compress_level: int = 6, instrumentation=NO_INSTRUMENTATION):
+        """
+        Thread pool that encodes and saves grids as PNG files.
+        At most 'max_pending' images wait in the queue: 'submit' blocks when it is full, so a fast
+        simulation cannot pile up grids in memory faster than the disk can take them (backpressure).
+
+        :param threads: int, number of writer threads.
+        :param max_pending: int, maximum number of images queued or being written.
+        :param compress_level: int (0-9), zlib compression level of the PNG files (0 is fastest, 9 is smallest).
+        :param instrumentation: Instrumentation (optional), where the writer threads record their phases.
+        """
+        if not isinstance(compress_level, int) or not 0 <= compress_level <= 9:
+            raise ValueError("\033[31m[ERROR] Invalid 'compress_level'. Must be an integer between 0 and 9.\033[0m")
+
+        self.__compress_level = compress_level
+        self.__instrumentation = instrumentation
+        self.__executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='image-writer')
+        self.__slots = threading.BoundedSemaphore(max_pending)
+        self.__pending = set()
+        self.__lock = threading.Lock()
+        self.__directories = set()
+        self.__errors = []
+
+    def submit(self, grid, path: str, scale: int = 1, callback=None, key=None):
+        """
+        Queue a grid to be saved to 'path'. The grid is copied, so the caller may reuse its buffer.
+        :param callback: callable (optional), called with 'path' by the writer thread once the file is written.
+        :param key: tuple (optional), the (rule, rule2) pair the phases of this image are recorded for.
+        """
+        self.__raise_errors()
+        self.__slots.acquire()
+        try:
+            future = self.__executor.submit(self.__write, np.array(grid, dtype=bool), path, scale, callback, key)
+        except BaseException:
+            self.__slots.release()
+            raise
+
+        with self.__lock:
+            self.__pending.add(future)
+        future.add_done_callback(self.__done)
+
+    def __write(self, grid, path, scale, callback, key):
+        directory = os.path.dirname(path)
+        if directory not in self.__directories:
+            # Cada diretório é verificado uma única vez, não a cada imagem
+            with self.__instrumentation.phase('write', key):
+                os.makedirs(directory, exist_ok=True)
+            self.__directories.add(directory)
+        save_grid_image(grid, path, scale, self.__compress_level, self.__instrumentation, key)
+        if callback is not None:
+            callback(path)
+
+    def __done(self, future):
+        with self.__lock:
+            self.__pending.discard(future)
+            if future.exception() is not None:
+                self.__errors.append(future.exception())
+        self.__slots.release()
+
+    def __raise_errors(self):
+        with self.__lock:
+            if self.__errors:
+                error = self.__errors[0]
+                self.__errors.clear()
+                raise error
+
+    def flush(self):
+        """
+        Wait until every queued image has been written. Raise the first error of a writer thread, if any.
+        """
+        with self.__lock:
+            pending = list(self.__pending)
+        for future in pending:
+            future.exception()
+        self.__raise_errors()
+
+    def close(self):
+        """
+        Flush the queue and stop the writer threads.
+        """
+        try:
+            self.flush()
+        finally:
+            self.__executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
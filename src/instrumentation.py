@@ -0,0 +1,343 @@
+# File: instrumentation.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Instrumentation of the simulations. Records the time spent in each phase of a sweep
+#              (evolution, labels and paths, rendering, PNG encoding, disk writes...), counters and
+#              peak memory, in total and per rule pair, and exports them as a JSON summary or a
+#              Prometheus textfile. A simulation without instrumentation uses NO_INSTRUMENTATION,
+#              whose methods do nothing.
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Phases recorded by the simulation, in the order they happen for a run
+PHASES = ('label', 'evolution', 'derive', 'queue', 'render', 'encode', 'write', 'store')
+
+# Prefix of the Prometheus metric names
+METRIC_PREFIX = 'cellular_automaton'
+
+class _PhaseTimer:
+    """
+    Context manager adding the time of its block to a phase.
+    """
+    __slots__ = ('instrumentation', 'name', 'key', 'start')
+
+    def __init__(self, instrumentation, name, key):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.add_time(self.name, time.perf_counter() - self.start, self.key)
+
+class Instrumentation:
+    def __init__(self, memory: bool = False):
+        """
+        Collector of the metrics of a simulation: seconds and calls of each phase, counters (runs, cells updated,
+        images, bytes written...) and peak memory, in total and per (rule, rule2) pair. It is safe to use from the
+        image writer threads, whose phases are added up with the others (so the phase total can exceed the wall time).
+
+        :param memory: bool, trace the memory allocations (tracemalloc) to record the peak memory of each pair. This
+                       slows the simulation down; without it only the peak resident memory of the process is reported.
+        """
+        self.__memory = memory
+        self.__lock = threading.Lock()
+        self.__phases = {}
+        self.__counters = {}
+        self.__pairs = {}
+        self.__peak_bytes = 0
+        self.__wall = 0.0
+        self.__started = None
+        self.__tracing = False
+
+    def __reduce__(self):
+        # Enviada a um worker, segue vazia (só a configuração); o worker devolve o seu estado com 'get_state'
+        return Instrumentation, (self.__memory,)
+
+    #### RECORDING ####
+
+    def start(self):
+        """
+        Start the wall clock of a run (and the memory tracing, if enabled).
+        """
+        self.__started = time.perf_counter()
+        if self.__memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__tracing = True
+
+    def stop(self):
+        """
+        Stop the wall clock of a run (and the memory tracing started by 'start').
+        """
+        if self.__started is not None:
+            self.__wall += time.perf_counter() - self.__started
+            self.__started = None
+        if self.__tracing:
+            self.__peak_bytes = max(self.__peak_bytes, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            self.__tracing = False
+
+    def __pair(self, key):
+        pair = self.__pairs.get(key)
+        if pair is None:
+            pair = self.__pairs[key] = {'phases': {}, 'counters': {}, 'peak_bytes': 0}
+        return pair
+
+    def phase(self, name: str, key=None):
+        """
+        Return a context manager that adds the time of its block to the phase 'name' (and to the pair 'key').
+        """
+        return _PhaseTimer(self, name, key)
+
+    def add_time(self, name: str, seconds: float, key=None):
+        """
+        Add 'seconds' to the phase 'name', in total and for the (rule, rule2) pair 'key' (if given).
+        """
+        with self.__lock:
+            total = self.__phases.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+            if key is not None:
+                phases = self.__pair(key)['phases']
+                phases[name] = phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1, key=None):
+        """
+        Add 'value' to the counter 'name', in total and for the pair 'key' (if given).
+        """
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + value
+            if key is not None:
+                counters = self.__pair(key)['counters']
+                counters[name] = counters.get(name, 0) + value
+
+    def begin_pairs(self):
+        """
+        Mark the start of the simulation of one pair (or one batch of pairs), for 'end_pairs'.
+        """
+        if self.__tracing:
+            tracemalloc.reset_peak()
+
+    def end_pairs(self, keys):
+        """
+        Record the peak traced memory since 'begin_pairs' for the given pairs (every pair of a batch gets the peak of
+        the batch). The peak is that of the whole process, writer threads included.
+        """
+        if not self.__tracing:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        with self.__lock:
+            self.__peak_bytes = max(self.__peak_bytes, peak)
+            for key in keys:
+                pair = self.__pair(key)
+                pair['peak_bytes'] = max(pair['peak_bytes'], peak)
+
+    #### MERGING (WORKERS) ####
+
+    def get_state(self):
+        """
+        Return the raw metrics, to be sent from a worker process and merged with 'merge'.
+        """
+        with self.__lock:
+            return {'phases': self.__phases, 'counters': self.__counters, 'pairs': self.__pairs, 'peak_bytes': self.__peak_bytes}
+
+    def merge(self, state):
+        """
+        Add the metrics of another Instrumentation (see 'get_state') to these.
+        """
+        with self.__lock:
+            for name, (seconds, calls) in state['phases'].items():
+                total = self.__phases.setdefault(name, [0.0, 0])
+                total[0] += seconds
+                total[1] += calls
+            for name, value in state['counters'].items():
+                self.__counters[name] = self.__counters.get(name, 0) + value
+            for key, other in state['pairs'].items():
+                pair = self.__pair(key)
+                for group in ('phases', 'counters'):
+                    for name, value in other[group].items():
+                        pair[group][name] = pair[group].get(name, 0) + value
+                pair['peak_bytes'] = max(pair['peak_bytes'], other['peak_bytes'])
+            self.__peak_bytes = max(self.__peak_bytes, state['peak_bytes'])
+
+    #### EXPORT ####
+
+    @staticmethod
+    def __max_rss():
+        """
+        Peak resident memory of this process (and of its finished worker processes), in bytes.
+        """
+        if resource is None:
+            return None
+        # ru_maxrss está em KiB no Linux
+        return max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)) * 1024
+
+    def summary(self):
+        """
+        Return the metrics as a dict (the JSON summary):
+        - 'wall_seconds': time between 'start' and 'stop';
+        - 'phases': seconds and calls of each phase;
+        - 'counters': runs, cells updated, images, bytes written...;
+        - 'rates': cells updated per second of evolution, runs per wall second;
+        - 'peak_bytes' (traced, None without 'memory') and 'max_rss_bytes';
+        - 'pairs': the phases, counters and peak memory of each (rule, rule2) pair.
+        """
+        with self.__lock:
+            phases = {name: {'seconds': seconds, 'calls': calls} for name, (seconds, calls) in self.__phases.items()}
+            counters = dict(self.__counters)
+            pairs = [
+                {'rule': rule, 'rule2': rule2, 'phases': dict(pair['phases']), 'counters': dict(pair['counters']),
+                 'peak_bytes': pair['peak_bytes'] if self.__memory else None}
+                for (rule, rule2), pair in sorted(self.__pairs.items(), key=lambda item: (item[0][0], -1 if item[0][1] is None else item[0][1]))
+            ]
+
+        evolution = phases.get('evolution', {}).get('seconds', 0.0)
+        return {
+            'wall_seconds': self.__wall,
+            'phases': phases,
+            'counters': counters,
+            'rates': {
+                'cells_per_second': counters.get('cells', 0) / evolution if evolution else None,
+                'runs_per_second': counters.get('runs', 0) / self.__wall if self.__wall else None,
+            },
+            'peak_bytes': self.__peak_bytes if self.__memory else None,
+            'max_rss_bytes': self.__max_rss(),
+            'pairs': pairs,
+        }
+
+    @staticmethod
+    def __write_atomically(path, text):
+        # O coletor de textfile do Prometheus não pode ler um arquivo pela metade
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as file:
+            file.write(text)
+        os.replace(temporary, path)
+
+    def write_json(self, path: str):
+        """
+        Write the summary (see 'summary') as a JSON file.
+        """
+        self.__write_atomically(path, json.dumps(self.summary(), indent=2))
+
+    def prometheus_text(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        summary = self.summary()
+        lines = []
+
+        def metric(name, kind, help, samples):
+            lines.append(f'# HELP {METRIC_PREFIX}_{name} {help}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_{name} {kind}')
+            for labels, value in samples:
+                label_text = ','.join(f'{label}="{text}"' for label, text in labels.items())
+                lines.append(f'{METRIC_PREFIX}_{name}{{{label_text}}} {value}' if labels else f'{METRIC_PREFIX}_{name} {value}')
+
+        metric('wall_seconds', 'gauge', 'Wall time of the simulation.', [({}, summary['wall_seconds'])])
+        metric('phase_seconds_total', 'counter', 'Time spent in each phase of the simulation.',
+               [({'phase': name}, phase['seconds']) for name, phase in summary['phases'].items()])
+        metric('phase_calls_total', 'counter', 'Number of times each phase ran.',
+               [({'phase': name}, phase['calls']) for name, phase in summary['phases'].items()])
+        for name, value in summary['counters'].items():
+            metric(f'{name}_total', 'counter', f"Counter '{name}' of the simulation.", [({}, value)])
+        for name, value in summary['rates'].items():
+            if value is not None:
+                metric(name, 'gauge', f"Rate '{name}' of the simulation.", [({}, value)])
+        for name in ('peak_bytes', 'max_rss_bytes'):
+            if summary[name] is not None:
+                metric(name, 'gauge', f"Memory '{name}' of the simulation.", [({}, summary[name])])
+
+        def pair_labels(pair, **labels):
+            return {'rule': pair['rule'], 'rule2': 'none' if pair['rule2'] is None else pair['rule2'], **labels}
+
+        metric('pair_phase_seconds', 'gauge', 'Time spent in each phase for each rule pair.',
+               [(pair_labels(pair, phase=name), seconds) for pair in summary['pairs'] for name, seconds in pair['phases'].items()])
+        metric('pair_counter', 'gauge', 'Counters of each rule pair.',
+               [(pair_labels(pair, counter=name), value) for pair in summary['pairs'] for name, value in pair['counters'].items()])
+        if self.__memory:
+            metric('pair_peak_bytes', 'gauge', 'Peak traced memory while each rule pair was simulated.',
+                   [(pair_labels(pair), pair['peak_bytes']) for pair in summary['pairs']])
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """
+        Write the metrics as a Prometheus textfile (e.g. for the node_exporter textfile collector).
+        """
+        self.__write_atomically(path, self.prometheus_text())
+
+    def report(self):
+        """
+        Return a short human-readable report of the phases and counters.
+        """
+        summary = self.summary()
+        total = sum(phase['seconds'] for phase in summary['phases'].values()) or 1.0
+        lines = [f"[INFO] Wall time: {summary['wall_seconds']:.3f} s"]
+        for name in sorted(summary['phases'], key=lambda name: PHASES.index(name) if name in PHASES else len(PHASES)):
+            phase = summary['phases'][name]
+            lines.append(f"[INFO] {name:<10} {phase['seconds']:>10.3f} s {phase['seconds'] / total:>6.1%} ({phase['calls']} calls)")
+        lines.extend(f"[INFO] {name:<10} {value:>10}" for name, value in summary['counters'].items())
+        if summary['rates']['cells_per_second'] is not None:
+            lines.append(f"[INFO] {summary['rates']['cells_per_second'] / 1e6:.1f} Mcells/s of evolution")
+        return '\n'.join(lines)
+
+    #### GETTERS ####
+
+    def is_enabled(self):
+        return True
+
+    def is_tracing_memory(self):
+        return self.__memory
+
+class NullInstrumentation:
+    """
+    Instrumentation that records nothing, used when a simulation is not instrumented (each call is a no-op).
+    """
+    __context = nullcontext()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def phase(self, name: str, key=None):
+        return self.__context
+
+    def add_time(self, name: str, seconds: float, key=None):
+        pass
+
+    def count(self, name: str, value: int = 1, key=None):
+        pass
+
+    def begin_pairs(self):
+        pass
+
+    def end_pairs(self, keys):
+        pass
+
+    def get_state(self):
+        return None
+
+    def merge(self, state):
+        pass
+
+    def is_enabled(self):
+        return False
+
+    def is_tracing_memory(self):
+        return False
+
+NO_INSTRUMENTATION = NullInstrumentation()
@@ -0,0 +1,143 @@
+# File: manifest.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Manifest of a sweep, written as the runs finish, so an interrupted sweep can be
+#              resumed: the runs already recorded (with an intact output) are skipped.
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+def file_hash(path: str):
+    """
+    Return the SHA-256 of a file, or None if the file does not exist.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as handle:
+            for block in iter(lambda: handle.read(1 << 20), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def packed_hash(packed):
+    """
+    Return the SHA-256 of a bit-packed grid, for outputs that are not files (e.g. runs in a result store).
+    """
+    return hashlib.sha256(np.ascontiguousarray(packed).tobytes()).hexdigest()
+
+def grid_hash(grid):
+    """
+    Return the SHA-256 of a grid, packed as in 'packed_hash'.
+    """
+    return packed_hash(np.packbits(grid, axis=1))
+
+class SweepManifest:
+    def __init__(self, path: str):
+        """
+        JSON Lines manifest of a sweep. The first line describes the sweep (first execution ID, initial
+        state and settings); every other line records a finished run: rule pair, execution, seed, output
+        and hash of the output. Lines are appended and flushed one by one (in O_APPEND mode, so worker
+        processes can share the file), and a line cut short by an interruption is ignored when reading.
+
+        :param path: str, manifest file.
+        """
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__handle = None
+
+    def __write(self, entry):
+        line = json.dumps(entry) + '\n'
+        with self.__lock:
+            if self.__handle is None:
+                self.__handle = open(self.__path, 'a')
+                if self.__handle.tell() > 0 and not self.__ends_with_newline():
+                    # Termina a linha cortada por uma interrupção, para não corromper a próxima
+                    self.__handle.write('\n')
+            self.__handle.write(line)
+            self.__handle.flush()
+
+    def __ends_with_newline(self):
+        with open(self.__path, 'rb') as handle:
+            handle.seek(-1, os.SEEK_END)
+            return handle.read(1) == b'\n'
+
+    def __read(self):
+        if not os.path.exists(self.__path):
+            return []
+        entries = []
+        with open(self.__path) as handle:
+            for line in handle:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return entries
+
+    #### WRITING ####
+
+    def start(self, first_exec: int, initial_state, **settings):
+        """
+        Start a new manifest (replacing an old one) for a sweep.
+        :param first_exec: int, first execution ID of the sweep.
+        :param initial_state: np.ndarray (bool), initial state shared by every run of the sweep.
+        :param settings: JSON-serializable settings that a resumed sweep must match.
+        """
+        directory = os.path.dirname(self.__path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.__lock:
+            if self.__handle is not None:
+                self.__handle.close()
+            self.__handle = open(self.__path, 'w')
+        self.__write({
+            'type': 'sweep', 'first_exec': first_exec, 'size': len(initial_state),
+            'initial_state': np.packbits(initial_state).tobytes().hex(), 'settings': settings,
+        })
+
+    def record(self, rule: int, rule2: int, exec: int, seed: int = None, output: str = None, digest: str = None):
+        """
+        Record a finished run.
+        :param output: str (optional), output file of the run; its hash is computed when 'digest' is not given.
+        :param digest: str (optional), hash of the output (e.g. 'grid_hash' for runs kept in a result store).
+        """
+        if digest is None and output is not None:
+            digest = file_hash(output)
+        self.__write({'type': 'run', 'rule': rule, 'rule2': rule2, 'exec': exec, 'seed': seed, 'output': output, 'hash': digest})
+
+    def close(self):
+        with self.__lock:
+            if self.__handle is not None:
+                self.__handle.close()
+                self.__handle = None
+
+    #### READING ####
+
+    def get_sweep(self):
+        """
+        Return the sweep description (with the initial state decoded), or None for a missing manifest.
+        """
+        for entry in self.__read():
+            if entry.get('type') == 'sweep':
+                packed = np.frombuffer(bytes.fromhex(entry['initial_state']), dtype=np.uint8)
+                return {**entry, 'initial_state': np.unpackbits(packed, count=entry['size']).astype(bool)}
+        return None
+
+    def completed(self, verify: bool = True):
+        """
+        Return the set of (rule, rule2, exec) runs that are done.
+        :param verify: bool, whether to check that each output file still exists with the recorded hash
+                       (missing or stale outputs are simulated again).
+        """
+        done = set()
+        for entry in self.__read():
+            if entry.get('type') != 'run':
+                continue
+            if verify and entry['output'] is not None and file_hash(entry['output']) != entry['hash']:
+                continue
+            done.add((entry['rule'], entry['rule2'], entry['exec']))
+        return done
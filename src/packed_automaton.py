@@ -0,0 +1,189 @@
+from rules import rules
+
+import numpy as np
+
+WORD_BITS = 64
+
+def pack_rows(rows):
+    """
+    Pack boolean rows into uint64 words, 64 cells per word.
+    Cell 'i' is stored in bit 'i % 64' of word 'i // 64'; unused bits of the last word are zero.
+    :param rows: np.ndarray (bool), one row or a stack of rows.
+    :return: np.ndarray (uint64), packed rows.
+    """
+    rows = np.asarray(rows, dtype=bool)
+    n_words = -(-rows.shape[-1] // WORD_BITS)
+    packed = np.packbits(rows, axis=-1, bitorder='little')
+
+    buffer = np.zeros(rows.shape[:-1] + (n_words * 8,), dtype=np.uint8)
+    buffer[..., :packed.shape[-1]] = packed
+    return buffer.view('<u8').astype(np.uint64, copy=False)
+
+def unpack_rows(words, size):
+    """
+    Unpack uint64 words produced by 'pack_rows' back into boolean rows.
+    :param words: np.ndarray (uint64), packed rows.
+    :param size: int, number of cells per row.
+    :return: np.ndarray (bool), unpacked rows.
+    """
+    as_bytes = np.ascontiguousarray(words).astype('<u8', copy=False).view(np.uint8)
+    return np.unpackbits(as_bytes, axis=-1, count=size, bitorder='little').astype(bool)
+
+class PackedCellularAutomaton:
+    def __init__(self, size: int, steps: int, rule: int, rule2: int=None, begin_type: str='random'):
+        """
+        Constructor for the PackedCellularAutomaton class.
+        Each row is stored as packed uint64 words (64 cells per word), which uses 8x less
+        memory than a boolean row and updates 64 cells per bitwise operation.
+
+        :param size: int, number of cells (grid width).
+        :param steps: int, number of steps (time stamps) to simulate.
+        :param rule: int, maps the current state of the cell and its neighbors to the next state.
+        :param rule2: int (optional), a second rule applied after the first one (composition).
+        :param begin_type: str, initial state of the cells, 'random' or 'center'.
+        """
+
+        self.__size = self.__validate_size(size)
+        self.__steps = steps + 1
+        self.__n_words = -(-size // WORD_BITS)
+        self.__rule = self.__get_rule_obj(rule)
+        self.__rule2 = self.__get_rule_obj(rule2) if rule2 is not None else None
+        self.__begin_type = self.__validate_begin_type(begin_type)
+
+        # Position of the last cell, used for the wraparound and the padding mask
+        self.__last_word, self.__last_bit = divmod(size - 1, WORD_BITS)
+        self.__mask = np.uint64((1 << (self.__last_bit + 1)) - 1)
+
+        ## GRID INITIALIZATION ##
+        self.__grid = self.__initialize_grid()
+
+
+    #### VALIDATION METHODS ####
+
+    @staticmethod
+    def __validate_size(size):
+        """
+        Validate the size of the grid.
+        """
+        if not isinstance(size, int) or size < 1:
+            raise ValueError("\033[31m[ERROR] Size must be an integer greater than 0.\033[0m")
+        return size
+
+    @staticmethod
+    def __validate_begin_type(begin_type):
+        """
+        Validate the beginning type.
+        """
+        if begin_type not in ['random', 'center']:
+            raise ValueError("\033[31m[ERROR] Invalid begin_type. Use 'random' or 'center'.\033[0m")
+        return begin_type
+
+    @staticmethod
+    def __get_rule_obj(rule):
+        """
+        Return the rule object for a rule number.
+        """
+        if rule not in rules:
+            raise ValueError("\033[31m[ERROR] Invalid rule number. Must be in the range 0-255.\033[0m")
+        return rules[rule]
+
+
+    #### SIMULATION METHODS ####
+
+    def __neighbors(self, words):
+        """
+        Return the left and right neighbor words of a packed row, with periodic boundary conditions.
+        """
+        left = (words << 1) | (np.roll(words, 1) >> 63)
+        right = (words >> 1) | (np.roll(words, -1) << 63)
+
+        # A última palavra pode estar incompleta: as pontas do anel são corrigidas explicitamente
+        first_cell = words[0] & 1
+        last_cell = (words[self.__last_word] >> self.__last_bit) & 1
+        left[0] = (left[0] & ~np.uint64(1)) | last_cell
+        right[self.__last_word] = (right[self.__last_word] & ~(np.uint64(1) << self.__last_bit)) | (first_cell << self.__last_bit)
+
+        return left, right
+
+    def __apply(self, rule, words):
+        """
+        Apply one rule to a packed row.
+        """
+        left, right = self.__neighbors(words)
+        next_state = rule.apply_bitwise(left, words, right)
+        next_state[-1] &= self.__mask
+        return next_state
+
+    def __evolve(self, step):
+        """
+        Calculate the next packed row of the automaton for a given step.
+        :param step: int, the current step in the simulation.
+        """
+        next_state = self.__apply(self.__rule, self.__grid[step])
+        if self.__rule2 is not None:
+            next_state = self.__apply(self.__rule2, next_state)
+        self.__grid[step + 1] = next_state
+
+    def run(self):
+        """
+        Run the simulation.
+        """
+        for step in range(self.__steps - 1):
+            self.__evolve(step)
+
+
+    ### INITIALIZATION METHODS ###
+
+    def __initialize_grid(self):
+        """
+        Initialize the packed grid with a state.
+        """
+        grid = np.zeros((self.__steps, self.__n_words), dtype=np.uint64)
+        if self.__begin_type == 'random':
+            grid[0] = pack_rows(np.random.randint(0, 2, self.__size, dtype=bool))
+        elif self.__begin_type == 'center':
+            init = np.zeros(self.__size, dtype=bool)
+            init[self.__size // 2] = 1
+            grid[0] = pack_rows(init)
+        return grid
+
+    def set_initial_state(self, initial_state):
+        """
+        Set the initial state of the grid.
+        """
+        if len(initial_state) != self.__size:
+            raise ValueError("\033[31m[ERROR] Initial state must have the same size as the grid.\033[0m")
+        self.__grid[0] = pack_rows(initial_state)
+
+    def get_initial_state(self):
+        """
+        Return the initial state of the grid, unpacked.
+        """
+        return unpack_rows(self.__grid[0], self.__size)
+
+
+    ### GETTERS ###
+
+    def get_packed_grid(self):
+        """
+        Return the packed grid, shape (steps + 1, ceil(size / 64)).
+        """
+        return self.__grid
+
+    def get_grid(self):
+        """
+        Return the grid unpacked to booleans, shape (steps + 1, size).
+        """
+        return unpack_rows(self.__grid, self.__size)
+
+    def get_row(self, step):
+        """
+        Return one row of the grid, unpacked.
+        """
+        return unpack_rows(self.__grid[step], self.__size)
+
+    def get_nbytes(self):
+        """
+        Return the memory used by the packed grid, in bytes.
+        """
+        return self.__grid.nbytes
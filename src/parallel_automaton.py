@@ -0,0 +1,280 @@
+# File: parallel_automaton.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: One very wide ring (e.g. 10^9 cells) evolved by several processes at once. The ring
+#              is split into contiguous shards, one worker process per shard, over two rows held in
+#              shared memory (the current one and the next one). Each worker reads its shard plus a
+#              halo of neighbor cells, so one synchronization covers several generations.
+
+import multiprocessing
+import queue
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from rules import rules, get_composite_rule, table_radius
+
+# Generations advanced between two synchronizations of the workers: each worker reads a halo of
+# HALO_STEPS * radius cells on each side of its shard, and recomputes it (redundantly) every block
+HALO_STEPS = 64
+# Cells evolved at a time (plus their halo) through the generations of a block, so the working set
+# stays in the CPU cache instead of sweeping the whole shard once per generation
+TILE_CELLS = 2**15
+# Longest wait (in seconds) of a worker for the others at the end of a block, before giving up; a
+# worker that dies is detected by the main process much sooner, through POLL_INTERVAL
+SYNC_TIMEOUT = 600
+# Interval (in seconds) at which the main process checks that the workers are still alive
+POLL_INTERVAL = 0.5
+
+def _open_step(cells, table, radius: int):
+    """
+    One generation of a segment, without boundary conditions: the result has 2 * radius cells less
+    (the cells at both ends, whose neighbors are outside the segment, are dropped).
+    """
+    width = len(cells) - 2 * radius
+    index = cells[:width].copy()
+    for offset in range(1, 2 * radius + 1):
+        index <<= 1
+        index |= cells[offset:offset + width]
+    return table.take(index)
+
+def _ring_slice(row, start: int, end: int):
+    """
+    Cells 'start' to 'end' (exclusive) of a ring, indices taken modulo its size; a view when no wrap is needed.
+    """
+    if 0 <= start and end <= len(row):
+        return row[start:end]
+    return row.take(np.arange(start, end) % len(row))
+
+def evolve_shard(source, target, start: int, end: int, steps: int, table, tile_cells: int = TILE_CELLS):
+    """
+    Write to target[start:end] the cells start to end of the ring 'source' after 'steps' generations. Only the
+    cells up to steps * radius away from the shard are read, tile by tile.
+    :param source: np.ndarray (uint8), the current row of the whole ring.
+    :param target: np.ndarray (uint8), the row that receives the shard (not 'source').
+    :param table: np.ndarray (uint8), lookup table of the rule (8 entries) or of the composite rule (32 entries).
+    """
+    radius = table_radius(table)
+    margin = steps * radius
+    for tile_start in range(start, end, tile_cells):
+        tile_end = min(tile_start + tile_cells, end)
+        cells = _ring_slice(source, tile_start - margin, tile_end + margin)
+        for _ in range(steps):
+            cells = _open_step(cells, table, radius)
+        target[tile_start:tile_end] = cells
+
+def _shard_worker(name, size, start, end, table, halo_steps, tile_cells, barrier, commands, done, timeout):
+    """
+    Worker process of one shard: for each command (steps, parity), evolve the shard block by block, reading the
+    row 'parity' of the shared memory and writing the other one, and wait for the other workers after each block.
+    Each command is answered on 'done' with (start, None), or (start, error) if the worker fails; a failing worker
+    breaks the barrier first, so the other workers stop instead of waiting for it forever.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        buffers = np.ndarray((2, size), dtype=np.uint8, buffer=memory.buf)
+        for steps, parity in iter(commands.get, None):
+            while steps:
+                block = min(halo_steps, steps)
+                evolve_shard(buffers[parity], buffers[1 - parity], start, end, block, table, tile_cells)
+                # Nenhum worker começa o próximo bloco (que sobrescreve a linha lida agora) antes de todos terminarem
+                barrier.wait(timeout)
+                parity, steps = 1 - parity, steps - block
+            done.put((start, None))
+        del buffers
+    except BaseException as error:
+        barrier.abort()
+        done.put((start, repr(error)))
+        raise
+    finally:
+        memory.close()
+
+def _release(processes, commands, memory):
+    """
+    Stop the workers and free the shared memory.
+    """
+    for commands_queue in commands:
+        commands_queue.put(None)
+    for process in processes:
+        process.join(POLL_INTERVAL * 10)
+        # Um worker travado (ou que não responde) é encerrado
+        if process.is_alive():
+            process.terminate()
+            process.join()
+    memory.close()
+    memory.unlink()
+
+class ParallelCellularAutomaton:
+    def __init__(self, size: int, rule: int, rule2: int = None, workers: int = None, initial_state=None,
+                 halo_steps: int = HALO_STEPS, tile_cells: int = TILE_CELLS, timeout: float = SYNC_TIMEOUT):
+        """
+        Ring of 'size' cells evolved by 'workers' processes, each one owning a contiguous shard of the ring. The two
+        rows (current and next, 1 byte per cell) live in shared memory, so the workers exchange only their halos,
+        read directly from the neighbor shards: every 'halo_steps' generations, each worker reads its shard plus
+        halo_steps * radius cells on each side, evolves them 'halo_steps' generations (the halo shrinks by 'radius'
+        cells per generation, so the shard stays exact), writes its shard, and waits for the others. The result is
+        the same as the serial engines, whatever the number of workers and the halo.
+
+        :param size: int, number of cells of the ring.
+        :param rule: int (0-255), the rule.
+        :param rule2: int (optional), second rule: each generation applies 'rule' and then 'rule2' (radius 2).
+        :param workers: int (optional), number of worker processes. Defaults to the number of CPUs. With 1 worker,
+                        the ring is evolved in this process.
+        :param initial_state: np.ndarray (bool) (optional), initial row. Random if not given.
+        :param halo_steps: int, generations per block (between two synchronizations).
+        :param tile_cells: int, cells evolved at a time through the generations of a block.
+        :param timeout: float, longest wait of a worker for the others at the end of a block, in seconds. If a worker
+                        fails or dies, 'advance' raises a ValueError and the automaton is closed.
+        """
+        if rule not in rules or (rule2 is not None and rule2 not in rules):
+            raise ValueError("\033[31m[ERROR] Invalid rule number. Must be in the range 0-255.\033[0m")
+        if not isinstance(size, int) or size < 1:
+            raise ValueError("\033[31m[ERROR] Size must be a positive integer.\033[0m")
+        for name, value in (('workers', workers), ('halo_steps', halo_steps), ('tile_cells', tile_cells)):
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise ValueError(f"\033[31m[ERROR] Invalid '{name}' specified. Must be an integer greater than 0.\033[0m")
+
+        self.__size = size
+        self.__rules = (rule, rule2)
+        self.__table = (rules[rule] if rule2 is None else get_composite_rule(rule, rule2)).get_lookup_table()
+        self.__workers = min(workers or multiprocessing.cpu_count(), size)
+        self.__halo_steps = halo_steps
+        self.__tile_cells = tile_cells
+        self.__timeout = timeout
+        self.__generation = 0
+        self.__parity = 0
+
+        self.__memory = shared_memory.SharedMemory(create=True, size=2 * size)
+        self.__buffers = np.ndarray((2, size), dtype=np.uint8, buffer=self.__memory.buf)
+        if initial_state is None:
+            initial_state = np.random.randint(0, 2, size, dtype=bool)
+        self.set_state(initial_state)
+
+        # Fronteiras dos shards: tamanhos iguais, a menos de uma célula
+        self.__bounds = [size * worker // self.__workers for worker in range(self.__workers + 1)]
+        self.__processes = []
+        self.__commands = []
+        self.__done = None
+        self.__barrier = None
+        if self.__workers > 1:
+            self.__start_workers()
+        self.__finalizer = weakref.finalize(self, _release, self.__processes, self.__commands, self.__memory)
+
+    def __start_workers(self):
+        context = multiprocessing.get_context()
+        self.__barrier = context.Barrier(self.__workers)
+        self.__done = context.Queue()
+        for start, end in zip(self.__bounds, self.__bounds[1:]):
+            commands = context.SimpleQueue()
+            process = context.Process(
+                target=_shard_worker, daemon=True,
+                args=(self.__memory.name, self.__size, start, end, self.__table, self.__halo_steps, self.__tile_cells,
+                      self.__barrier, commands, self.__done, self.__timeout),
+            )
+            process.start()
+            self.__processes.append(process)
+            self.__commands.append(commands)
+
+    #### EVOLUTION ####
+
+    def advance(self, steps: int):
+        """
+        Advance the ring by 'steps' generations.
+        :return: np.ndarray (bool), the new row (a copy).
+        """
+        if steps < 0:
+            raise ValueError("\033[31m[ERROR] 'steps' must be non-negative.\033[0m")
+        if not self.__finalizer.alive:
+            raise ValueError("\033[31m[ERROR] The automaton was closed.\033[0m")
+
+        if self.__workers == 1:
+            remaining = steps
+            while remaining:
+                block = min(self.__halo_steps, remaining)
+                source, target = self.__buffers[self.__parity], self.__buffers[1 - self.__parity]
+                evolve_shard(source, target, 0, self.__size, block, self.__table, self.__tile_cells)
+                self.__parity, remaining = 1 - self.__parity, remaining - block
+        elif steps:
+            for commands in self.__commands:
+                commands.put((steps, self.__parity))
+            self.__wait_workers()
+            # Cada bloco troca a linha corrente
+            blocks = -(-steps // self.__halo_steps)
+            self.__parity = (self.__parity + blocks) % 2
+
+        self.__generation += steps
+        return self.get_state()
+
+    def __wait_workers(self):
+        """
+        Wait until every worker has finished the command, checking that they are still alive. If a worker fails or
+        dies, break the barrier (so the others stop), close the automaton and raise a ValueError.
+        """
+        pending = len(self.__processes)
+        try:
+            while pending:
+                try:
+                    start, error = self.__done.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    dead = [process for process in self.__processes if not process.is_alive()]
+                    if dead:
+                        raise ValueError(f"\033[31m[ERROR] A shard worker died (exit code {dead[0].exitcode}).\033[0m")
+                    continue
+                if error is not None:
+                    raise ValueError(f"\033[31m[ERROR] The shard worker starting at cell {start} failed: {error}\033[0m")
+                pending -= 1
+        except BaseException:
+            # Inclui o Ctrl-C no processo principal: os workers param e a memória compartilhada é liberada
+            self.__barrier.abort()
+            self.close()
+            raise
+
+    def rows_at(self, generations):
+        """
+        Return the rows at the given generations, advancing in increasing order.
+        :param generations: iterable of int, generations >= the current one.
+        :return: np.ndarray (bool), shape (len(generations), size), in the order given.
+        """
+        generations = [int(generation) for generation in generations]
+        rows = np.empty((len(generations), self.__size), dtype=bool)
+        for position in sorted(range(len(generations)), key=generations.__getitem__):
+            if generations[position] < self.__generation:
+                raise ValueError("\033[31m[ERROR] Generations before the current one cannot be computed.\033[0m")
+            rows[position] = self.advance(generations[position] - self.__generation)
+        return rows
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared memory (also done when the automaton is garbage collected).
+        """
+        self.__buffers = None
+        self.__finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    #### GETTERS AND SETTERS ####
+
+    def set_state(self, state):
+        """
+        Replace the current row (the generation counter is kept).
+        """
+        if len(state) != self.__size:
+            raise ValueError("\033[31m[ERROR] Initial state must have the same size as the ring.\033[0m")
+        self.__buffers[self.__parity] = np.asarray(state, dtype=bool)
+
+    def get_state(self):
+        return self.__buffers[self.__parity].astype(bool)
+
+    def get_generation(self):
+        return self.__generation
+
+    def get_workers(self):
+        return self.__workers
+
+    def get_rules(self):
+        return self.__rules
@@ -0,0 +1,141 @@
+# File: registry.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Registry of the simulation executions. Execution IDs (the 'exec_N' folders) are
+#              handed out by an SQLite counter inside a write transaction, so concurrent runs
+#              never get the same ID and no directory has to be listed to find the next one.
+#              Each run also records its settings for later lookup.
+
+import json
+import os
+import sqlite3
+import time
+
+REGISTRY_FILE = 'registry.sqlite'
+
+# Registries already opened by this process, by path (a connection must not cross a fork)
+_registries = {}
+
+def get_registry(results_dir: str = '../results/'):
+    """
+    Return the registry of a results directory, opening it once per process (and again if its file was deleted).
+    """
+    key = (os.path.abspath(results_dir), os.getpid())
+    # Reabre o registro se o diretório de resultados foi apagado desde a última abertura
+    if key not in _registries or not os.path.exists(os.path.join(results_dir, REGISTRY_FILE)):
+        _registries[key] = ExecRegistry(results_dir)
+    return _registries[key]
+
+class ExecRegistry:
+    def __init__(self, results_dir: str = '../results/'):
+        """
+        Execution registry of a results directory. The database is opened on first use, and only created (with the
+        results directory) when an ID is reserved: 'peek' on a directory without a registry reads nothing but the
+        directory. A new registry starts counting after the 'exec_N' folders already in the directory, which is the
+        only time the directory is listed.
+
+        :param results_dir: str, directory holding the 'exec_N' folders.
+        """
+        self.__results_dir = results_dir
+        self.__path = os.path.join(results_dir, REGISTRY_FILE)
+        self.__connection = None
+
+    def __connect(self):
+        """
+        Return the connection to the database, opening (and creating) it if needed.
+        """
+        if self.__connection is None:
+            os.makedirs(self.__results_dir, exist_ok=True)
+            self.__connection = sqlite3.connect(self.__path, timeout=60, isolation_level=None)
+            self.__create()
+        return self.__connection
+
+    def __create(self):
+        with self.__transaction() as cursor:
+            cursor.execute('CREATE TABLE IF NOT EXISTS counter (id INTEGER PRIMARY KEY CHECK (id = 0), next_exec INTEGER NOT NULL)')
+            cursor.execute(
+                'CREATE TABLE IF NOT EXISTS runs (exec INTEGER PRIMARY KEY, count INTEGER NOT NULL, '
+                'created REAL NOT NULL, metadata TEXT NOT NULL)'
+            )
+            if cursor.execute('SELECT next_exec FROM counter').fetchone() is None:
+                cursor.execute('INSERT INTO counter VALUES (0, ?)', (self.__count_exec_dirs(),))
+
+    def __count_exec_dirs(self):
+        """
+        Number of 'exec' folders already in the results directory (the IDs used before the registry).
+        """
+        if not os.path.isdir(self.__results_dir):
+            return 0
+        return sum(
+            1 for item in os.listdir(self.__results_dir)
+            if os.path.isdir(os.path.join(self.__results_dir, item)) and 'exec' in item
+        )
+
+    def __transaction(self):
+        return _Transaction(self.__connect())
+
+    #### EXECUTION IDS ####
+
+    def peek(self):
+        """
+        Return the next execution ID, without reserving it. Read-only: without a registry file, the ID is the number
+        of 'exec' folders, and no file is created.
+        """
+        if self.__connection is None and not os.path.exists(self.__path):
+            return self.__count_exec_dirs()
+        return self.__connect().execute('SELECT next_exec FROM counter').fetchone()[0]
+
+    def reserve(self, count: int = 1, **metadata):
+        """
+        Atomically reserve 'count' consecutive execution IDs and record the run that uses them.
+        :param count: int, number of IDs (executions) of the run.
+        :param metadata: JSON-serializable settings of the run (simulation type, size, seed...).
+        :return: int, the first reserved ID.
+        """
+        with self.__transaction() as cursor:
+            first = cursor.execute('SELECT next_exec FROM counter').fetchone()[0]
+            cursor.execute('UPDATE counter SET next_exec = ?', (first + count,))
+            cursor.execute('INSERT INTO runs VALUES (?, ?, ?, ?)', (first, count, time.time(), json.dumps(metadata)))
+        return first
+
+    #### LOOKUP ####
+
+    def get_run(self, exec: int):
+        """
+        Return the run that owns an execution ID as a dict, or None if the ID was not handed out by the registry.
+        """
+        row = self.__connect().execute(
+            'SELECT exec, count, created, metadata FROM runs WHERE exec <= ? AND ? < exec + count',
+            (exec, exec),
+        ).fetchone()
+        return None if row is None else self.__as_dict(row)
+
+    def get_runs(self):
+        """
+        Return every recorded run, oldest first.
+        """
+        rows = self.__connect().execute('SELECT exec, count, created, metadata FROM runs ORDER BY exec').fetchall()
+        return [self.__as_dict(row) for row in rows]
+
+    @staticmethod
+    def __as_dict(row):
+        exec, count, created, metadata = row
+        return {'exec': exec, 'count': count, 'created': created, **json.loads(metadata)}
+
+    def close(self):
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+class _Transaction:
+    """Write transaction that takes the database lock on entry (BEGIN IMMEDIATE)"""
+    def __init__(self, connection):
+        self.__connection = connection
+
+    def __enter__(self):
+        cursor = self.__connection.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        return cursor
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__connection.execute('ROLLBACK' if exc_type is not None else 'COMMIT')
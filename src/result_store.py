@@ -0,0 +1,251 @@
+# File: result_store.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Chunked, memory-mappable store of simulation results. Each run is kept as a
+#              bit-packed grid inside fixed-size '.npy' chunks, with a binary index of its
+#              rules, execution, seed and classes, so any run can be read back (or rendered
+#              as a PNG later) without going through the image files.
+
+import json
+import os
+
+import numpy as np
+
+from automaton import CellularAutomaton
+from classes import RULE_CLASS_IDS
+
+STORE_VERSION = 1
+
+# One record per run; 'rule2', 'exec' and 'seed' are -1 when not set
+INDEX_DTYPE = np.dtype([
+    ('rule', np.uint8), ('rule2', np.int16), ('class1', np.uint8), ('class2', np.uint8),
+    ('exec', np.int32), ('seed', np.int64),
+])
+
+
+def _record(rule, rule2, exec, seed):
+    return (
+        rule, -1 if rule2 is None else rule2,
+        RULE_CLASS_IDS[rule], 0 if rule2 is None else RULE_CLASS_IDS[rule2],
+        -1 if exec is None else exec, -1 if seed is None else seed,
+    )
+
+class ResultBuffer:
+    def __init__(self):
+        """
+        In-memory list of results with the same 'append' as ResultStore. Worker processes fill a
+        buffer and send it back, so only the main process writes to the store.
+        """
+        self.__records = []
+
+    def append(self, grid, rule: int, rule2: int = None, exec: int = 0, seed: int = None):
+        self.__records.append((np.packbits(grid, axis=1), _record(rule, rule2, exec, seed)))
+
+    def extend(self, records):
+        """
+        Add the runs collected by another ResultBuffer (see 'get_records'), as 'ResultStore.extend'.
+        """
+        self.__records.extend(records)
+
+    def get_records(self):
+        return self.__records
+
+class ResultStore:
+    def __init__(self, path: str, size: int = None, rows: int = None, chunk_runs: int = 1024):
+        """
+        Open (or create) a result store in the directory 'path'.
+        Grids are stored bit-packed (8 cells per byte), 'chunk_runs' runs per chunk file. A chunk is
+        created at full size and filled in place through a memory map; the index is written after the
+        grids it points to, so an interrupted run never leaves the index pointing to missing data.
+
+        :param path: str, directory of the store.
+        :param size: int (optional), number of cells of each grid. Required to create a new store.
+        :param rows: int (optional), number of rows (steps + 1) of each grid. Required to create a new store.
+        :param chunk_runs: int, number of runs per chunk file (new stores only).
+        """
+        self.__path = path
+        self.__meta = self.__load_meta(size, rows, chunk_runs)
+        self.__shape = (self.__meta['rows'], self.__meta['row_bytes'])
+        self.__index = self.__load_index()
+        self.__pending = []
+        self.__chunks = {}
+
+    #### FILE LAYOUT ####
+
+    def __file(self, name):
+        return os.path.join(self.__path, name)
+
+    def __chunk_file(self, chunk):
+        return self.__file(f'chunk_{chunk:06d}.npy')
+
+    def __load_meta(self, size, rows, chunk_runs):
+        """
+        Read the store metadata, or write it if the store is new.
+        """
+        meta_file = self.__file('meta.json')
+        if os.path.exists(meta_file):
+            with open(meta_file) as handle:
+                meta = json.load(handle)
+            if meta['version'] != STORE_VERSION:
+                raise ValueError(f"\033[31m[ERROR] Unsupported result store version {meta['version']}.\033[0m")
+            if (size is not None and size != meta['size']) or (rows is not None and rows != meta['rows']):
+                raise ValueError(
+                    f"\033[31m[ERROR] The store at '{self.__path}' holds {meta['rows']}x{meta['size']} grids.\033[0m"
+                )
+            return meta
+
+        if size is None or rows is None:
+            raise ValueError("\033[31m[ERROR] 'size' and 'rows' are required to create a result store.\033[0m")
+
+        os.makedirs(self.__path, exist_ok=True)
+        meta = {'version': STORE_VERSION, 'size': size, 'rows': rows, 'row_bytes': (size + 7) // 8, 'chunk_runs': chunk_runs}
+        with open(meta_file, 'w') as handle:
+            json.dump(meta, handle)
+        return meta
+
+    def __load_index(self):
+        index_file = self.__file('index.bin')
+        if not os.path.exists(index_file):
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.fromfile(index_file, dtype=INDEX_DTYPE)
+
+    def __chunk(self, chunk, writable=False):
+        """
+        Memory map of a chunk file, created at full size when written for the first time.
+        """
+        mapped = self.__chunks.get(chunk)
+        if mapped is not None and (not writable or mapped.mode in ('r+', 'w+')):
+            return mapped
+
+        file = self.__chunk_file(chunk)
+        if not writable:
+            mapped = np.load(file, mmap_mode='r')
+        elif os.path.exists(file):
+            mapped = np.load(file, mmap_mode='r+')
+        else:
+            mapped = np.lib.format.open_memmap(file, mode='w+', dtype=np.uint8, shape=(self.__meta['chunk_runs'], *self.__shape))
+        self.__chunks[chunk] = mapped
+        return mapped
+
+    #### WRITING ####
+
+    def append(self, grid, rule: int, rule2: int = None, exec: int = 0, seed: int = None):
+        """
+        Add a run to the store.
+        :param grid: np.ndarray (bool), the (rows, size) grid of the run.
+        """
+        self.__append_packed(np.packbits(grid, axis=1), _record(rule, rule2, exec, seed))
+
+    def extend(self, records):
+        """
+        Add the runs collected by a ResultBuffer (see 'ResultBuffer.get_records').
+        """
+        for packed, record in records:
+            self.__append_packed(packed, record)
+
+    def __append_packed(self, packed, record):
+        if packed.shape != self.__shape:
+            raise ValueError(f"\033[31m[ERROR] Packed grid must have shape {self.__shape}.\033[0m")
+
+        run = len(self)
+        chunk, slot = divmod(run, self.__meta['chunk_runs'])
+        self.__chunk(chunk, writable=True)[slot] = packed
+        self.__pending.append(record)
+
+        if slot == self.__meta['chunk_runs'] - 1:
+            self.flush()
+            del self.__chunks[chunk]
+
+    def flush(self):
+        """
+        Write the open chunks to disk, then the index entries of the runs they hold.
+        """
+        if not self.__pending:
+            return
+        for mapped in self.__chunks.values():
+            if mapped.mode in ('r+', 'w+'):
+                mapped.flush()
+
+        records = np.array(self.__pending, dtype=INDEX_DTYPE)
+        with open(self.__file('index.bin'), 'ab') as handle:
+            records.tofile(handle)
+        self.__index = np.concatenate([self.__index, records])
+        self.__pending = []
+
+    def close(self):
+        """
+        Flush the store and release the memory maps.
+        """
+        self.flush()
+        self.__chunks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    #### READING ####
+
+    def __len__(self):
+        return len(self.__index) + len(self.__pending)
+
+    def get_index(self):
+        """
+        Return the index of the flushed runs, a structured array with the fields of INDEX_DTYPE.
+        """
+        return self.__index
+
+    def select(self, rule: int = None, rule2: int = None, exec: int = None, class1: int = None, class2: int = None):
+        """
+        Return the positions of the runs matching every given field (rule2=-1 selects the single rules).
+        """
+        selected = np.ones(len(self.__index), dtype=bool)
+        for field, value in (('rule', rule), ('rule2', rule2), ('exec', exec), ('class1', class1), ('class2', class2)):
+            if value is not None:
+                selected &= self.__index[field] == value
+        return np.flatnonzero(selected)
+
+    def get_packed_grid(self, run: int):
+        """
+        Return the bit-packed grid of a run, as a read-only view of its chunk.
+        """
+        if not 0 <= run < len(self.__index):
+            raise IndexError(f"\033[31m[ERROR] Run {run} is not in the store ({len(self.__index)} runs).\033[0m")
+        chunk, slot = divmod(run, self.__meta['chunk_runs'])
+        return self.__chunk(chunk)[slot]
+
+    def get_grid(self, run: int):
+        """
+        Return the grid of a run as a (rows, size) boolean array.
+        """
+        return np.unpackbits(self.get_packed_grid(run), axis=1, count=self.__meta['size']).astype(bool)
+
+    def get_size(self):
+        return self.__meta['size']
+
+    def get_rows(self):
+        return self.__meta['rows']
+
+    #### POST-PROCESSING ####
+
+    def render(self, runs=None, scale: int = 1, writer=None):
+        """
+        Save selected runs as PNG images, in the same '../results/exec_N/...' tree used by the simulation.
+        :param runs: iterable of int (optional), positions of the runs (e.g. from 'select'). All runs if None.
+        :param scale: int, scale of the images.
+        :param writer: ImageWriter (optional), background writer used to save the images.
+        """
+        runs = range(len(self.__index)) if runs is None else runs
+        ca = CellularAutomaton(self.get_size(), self.get_rows() - 1, rule=0, begin_type='fixed')
+        ca.set_previous_execs(0)
+        for run in runs:
+            record = self.__index[run]
+            rule2 = None if record['rule2'] < 0 else int(record['rule2'])
+            exec = None if record['exec'] < 0 else int(record['exec'])
+            ca.reset(rule=int(record['rule']), rule2=rule2, begin_type='fixed', index=exec)
+            if writer is not None:
+                writer.submit(self.get_grid(run), ca.get_label(), scale)
+            else:
+                ca.set_grid(self.get_grid(run))
+                ca.save_image(scale=scale)
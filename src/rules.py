@@ -1,8 +1,11 @@
+import numpy as np
+
 class Rule:
     def __init__(self, number):
         self.__number = number
         self.__label = self.__set_label()
         self.__rule_dict = self.__set_rule_dict(number)
+        self.__lookup_table = self.__set_lookup_table(number)
 
     @staticmethod
     def __set_rule_dict(rule_number):
@@ -26,6 +29,20 @@ class Rule:
             for i, combo in enumerate(combinations)
         }
 
+    @staticmethod
+    def __set_lookup_table(rule_number):
+        """
+            Generate the 8-entry lookup table for a given rule number.
+            The table is indexed by the neighborhood value 4 * left + 2 * center + right,
+            which is the same ordering used by the rule dictionary.
+            :param rule_number: Integer (0-255), the rule ID.
+            :return: np.ndarray (uint8), next state for each neighborhood index.
+        """
+        table = (rule_number >> np.arange(8, dtype=np.uint8)) & 1
+        table = table.astype(np.uint8)
+        table.flags.writeable = False
+        return table
+
     def __set_label(self):
         """
         Set the label of the rule based on its number.
@@ -34,11 +51,178 @@ class Rule:
     
     def get_rule_dict(self):
         return self.__rule_dict
+
+    def get_lookup_table(self):
+        return self.__lookup_table
+
+    def apply_bitwise(self, left, center, right):
+        """
+        Apply the rule as a boolean formula (sum of minterms) on bit-parallel words.
+        Each bit of 'left', 'center' and 'right' holds one neighborhood, so a single
+        call updates as many cells as there are bits in the operands.
+        :param left: np.ndarray (unsigned int), left neighbor of every cell.
+        :param center: np.ndarray (unsigned int), the cells themselves.
+        :param right: np.ndarray (unsigned int), right neighbor of every cell.
+        :return: np.ndarray (unsigned int), next state of every cell.
+        """
+        # Quando a regra tem mais uns do que zeros, é mais barato negar a soma dos mintermos nulos
+        invert = bin(self.__number).count('1') > 4
+        bit = 0 if invert else 1
+
+        not_left, not_center, not_right = ~left, ~center, ~right
+        result = np.zeros_like(center)
+        for index in range(8):
+            if (self.__number >> index) & 1 != bit:
+                continue
+            term = left if index & 4 else not_left
+            term = term & (center if index & 2 else not_center)
+            term &= right if index & 1 else not_right
+            result |= term
+
+        return ~result if invert else result
     
     def get_number(self):
         return self.__number
+
+    def get_mirror_number(self):
+        """
+        Return the number of the left-right reflection of the rule, f'(l, c, r) = f(r, c, l).
+        """
+        return sum(int(self.__lookup_table[(right << 2) | (center << 1) | left]) << ((left << 2) | (center << 1) | right)
+                   for left in (0, 1) for center in (0, 1) for right in (0, 1))
+
+    def get_complement_number(self):
+        """
+        Return the number of the 0/1 complement (conjugate) of the rule, f'(l, c, r) = 1 - f(1 - l, 1 - c, 1 - r).
+        """
+        return sum((1 - int(self.__lookup_table[7 - index])) << index for index in range(8))
+
+    def is_mirror_symmetric(self):
+        """
+        Return whether the rule commutes with the left-right reflection of the ring.
+        """
+        return self.get_mirror_number() == self.__number
     
     def get_label(self):
         return self.__label
 
-rules = {i: Rule(i) for i in range(256)}
\ No newline at end of file
+class CompositeRule:
+    def __init__(self, rule, rule2, lookup_table):
+        """
+        Radius-2 rule equivalent to applying 'rule' and then 'rule2' in the same generation.
+        Use 'get_composite_rule' instead of building it directly, so the tables are shared.
+        :param rule: Rule, the rule applied first.
+        :param rule2: Rule, the rule applied to the result of the first one.
+        :param lookup_table: np.ndarray (uint8), 32-entry table indexed by the 5-cell neighborhood.
+        """
+        self.__rule = rule
+        self.__rule2 = rule2
+        self.__label = f"{rule.get_label()} + {rule2.get_label()}"
+        self.__lookup_table = lookup_table
+
+    def get_rules(self):
+        return self.__rule, self.__rule2
+
+    def get_lookup_table(self):
+        return self.__lookup_table
+
+    def get_label(self):
+        return self.__label
+
+def neighborhood_index(state, radius: int = 1):
+    """
+    Compute the neighborhood index of every cell, using periodic boundary conditions along the last axis.
+    The leftmost neighbor is the most significant bit, so for radius 1 the index is 4 * left + 2 * center + right.
+    :param state: np.ndarray (bool or uint8), one row or a stack of rows.
+    :param radius: int, number of neighbors on each side (1 or 2).
+    :return: np.ndarray (uint8), neighborhood index of each cell.
+    """
+    center = state.view(np.uint8) if state.dtype == np.bool_ else state.astype(np.uint8)
+    index = np.zeros_like(center)
+    for offset in range(radius, -radius - 1, -1):
+        index <<= 1
+        index |= np.roll(center, offset, axis=-1) if offset else center
+    return index
+
+def table_radius(table):
+    """
+    Return the radius of a lookup table with 2 ** (2 * radius + 1) entries (8 -> 1, 32 -> 2).
+    """
+    return (table.shape[-1].bit_length() - 2) // 2
+
+def apply_lookup_table(state, table):
+    """
+    Apply a rule lookup table to a whole row (or stack of rows) at once.
+    :param state: np.ndarray (bool or uint8), current state.
+    :param table: np.ndarray (uint8), 8-entry table of a rule or 32-entry table of a composite rule.
+    :return: np.ndarray (uint8), next state.
+    """
+    return table[neighborhood_index(state, table_radius(table))]
+
+def apply_lookup_tables(states, tables):
+    """
+    Apply a different rule lookup table to each row of a stack of rows, in a single pass.
+    :param states: np.ndarray (bool or uint8), shape (n_rows, size), current states.
+    :param tables: np.ndarray (uint8), shape (n_rows, 8) or (n_rows, 32), one lookup table per row.
+    :return: np.ndarray (uint8), shape (n_rows, size), next states.
+    """
+    offsets = np.arange(0, tables.size, tables.shape[1], dtype=np.intp)[:, None]
+    return tables.ravel()[neighborhood_index(states, table_radius(tables)) + offsets]
+
+def lookup_tables(rule_numbers):
+    """
+    Stack the lookup tables of several rules.
+    :param rule_numbers: iterable of int, rule IDs.
+    :return: np.ndarray (uint8), shape (n_rules, 8).
+    """
+    return np.stack([rules[number].get_lookup_table() for number in rule_numbers])
+
+def composite_lookup_tables():
+    """
+    Return the 32-entry composite tables of all 65,536 (rule, rule2) pairs, shape (256, 256, 32).
+    Entry [rule, rule2, index] is the result of applying 'rule' to the three 3-cell windows of
+    the 5-cell neighborhood 'index', and then 'rule2' to those three results.
+    The tables are computed once (2 MB) and shared by every CompositeRule.
+    """
+    global _composite_tables
+    if _composite_tables is None:
+        tables = lookup_tables(range(256))
+        index = np.arange(32, dtype=np.uint8)
+
+        # Resultado da primeira regra nas posições esquerda, central e direita da vizinhança de raio 2
+        left = tables[:, index >> 2]
+        center = tables[:, (index >> 1) & 7]
+        right = tables[:, index & 7]
+        first = (left << 2) | (center << 1) | right
+
+        composite = tables[np.arange(256)[None, :, None], first[:, None, :]]
+        composite.flags.writeable = False
+        _composite_tables = composite
+
+    return _composite_tables
+
+def get_composite_rule(rule: int, rule2: int):
+    """
+    Return the (cached) CompositeRule equivalent to 'rule' followed by 'rule2'.
+    :param rule: int (0-255), the rule applied first.
+    :param rule2: int (0-255), the rule applied second.
+    :return: CompositeRule.
+    """
+    key = (rule, rule2)
+    if key not in composite_rules:
+        composite_rules[key] = CompositeRule(rules[rule], rules[rule2], composite_lookup_tables()[rule, rule2])
+    return composite_rules[key]
+
+def composite_tables_for(pairs):
+    """
+    Stack the composite tables of several (rule, rule2) pairs.
+    :param pairs: iterable of (int, int).
+    :return: np.ndarray (uint8), shape (n_pairs, 32).
+    """
+    rule_numbers, rule2_numbers = zip(*pairs)
+    return composite_lookup_tables()[list(rule_numbers), list(rule2_numbers)]
+
+_composite_tables = None
+
+rules = {i: Rule(i) for i in range(256)}
+composite_rules = {}
\ No newline at end of file
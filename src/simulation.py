@@ -1,16 +1,62 @@
-import os
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
 from automaton import CellularAutomaton
+from batch import BatchAutomaton
+from cycle_detection import rotation_period
+from grid_cache import grid_key
+from image_writer import ImageWriter
+from instrumentation import NO_INSTRUMENTATION, Instrumentation
+from manifest import SweepManifest, grid_hash, packed_hash
+from registry import get_registry
+from result_store import ResultBuffer, ResultStore
+from simulation_settings import SimulationSettings
 from simulation_type import SimulationType
+from sweep_planner import plan_sweep, derive_grid, row_symmetries, symmetric_row
 from utils import paint
 from classes import HOMOGENEOUS, PERIODIC, CHAOTIC, COMPLEX
 
+# Number of cell updates a worker task should amount to, so the cost of sending the
+# task to a worker process stays small compared to the simulation itself
+CELLS_PER_TASK = 5 * 10**7
+# Minimum number of tasks per worker, to keep the pool balanced near the end of the sweep
+TASKS_PER_WORKER = 4
+
+def _run_pairs_worker(sim_type, settings, pairs, exec, previous_execs, initial_state, seed, save, debug):
+    """Simulate a chunk of (rule, rule2) pairs in a worker process"""
+    np.random.seed(seed)
+    simulation = Simulation(sim_type, settings)
+    simulation.run_pairs(pairs, exec, previous_execs, initial_state, save=save, debug=debug)
+    metrics = simulation.get_instrumentation().get_state()
+    # Com um ResultStore, os resultados voltam ao processo principal, o único que escreve no store
+    if settings.store is not None:
+        return settings.store.get_records(), simulation.get_cycles(), metrics
+    return len(pairs), simulation.get_cycles(), metrics
+
 class Simulation:
-    def __init__(self, sim_type:SimulationType, scale: int = 4, size:int = 100, steps: int = 200):
+    def __init__(self, sim_type:SimulationType, settings: SimulationSettings = None, **options):
+        """
+        Constructor for the Simulation class.
+
+        :param sim_type: SimulationType, which rules (or rule compositions) are simulated.
+        :param settings: SimulationSettings (optional), how they are simulated and where the results go (size, steps,
+                         batches, workers, image writer, result store, manifest...).
+        :param options: keyword arguments of SimulationSettings (e.g. size=100, steps=200), overriding 'settings'.
+        """
         self.__sim_type = self.__validate_sim_type(sim_type)
+        self.__settings = settings.replace(**options) if settings is not None else SimulationSettings(**options)
         self.__ca = None
-        self.__scale = scale
-        self.__size = size
-        self.__steps = steps
+        self.__writer = None
+        self.__store = None
+        self.__manifest = None
+        self.__done = set()
+        self.__cycles = {}
+        self.__given_instrumentation = self.__settings.instrumentation or NO_INSTRUMENTATION
+        self.__instrumentation = self.__given_instrumentation
 
         #self.__rule = rule # Rule to be simulated, if sim_type is 'single'
 
@@ -25,7 +71,6 @@ class Simulation:
         else:
             return sim_type
 
-
     @staticmethod
     def __validate_image_output(show: bool, save: bool, debug: bool):
         """Validate the show and save parameters"""
@@ -40,20 +85,102 @@ class Simulation:
         self.__validate_image_output(show, save, debug)
 
         if show:
-            self.__ca.show_image(scale=self.__scale)
-            if debug:
-                print(paint('yellow', '[INFO] Image opened:' + os.path.basename(self.__ca.get_label())))
+            self.__ca.show_image(scale=self.__settings.scale)
         if save:
-            self.__ca.save_image(scale=self.__scale)
-            if debug:
-                print(paint('yellow', '[INFO] Image saved:' + self.__ca.get_label()))
+            rule, rule2 = self.__ca.get_rules()
+            index = self.__ca.get_index()
+            if self.__store is not None:
+                with self.__instrumentation.phase('store', (rule, rule2)):
+                    self.__store.append(self.__ca.get_grid(), rule, rule2, self.__ca.get_exec(), self.__settings.seed)
+                self.__instrumentation.count('bytes_written', len(self.__ca.get_grid()) * ((self.__settings.size + 7) // 8), (rule, rule2))
+                # Com um ResultBuffer (worker), o registro é feito pelo processo principal ao gravar no store
+                if isinstance(self.__store, ResultStore):
+                    self.__record(rule, rule2, index, digest=grid_hash(self.__ca.get_grid()))
+            elif self.__writer is not None:
+                callback = partial(self.__record, rule, rule2, index) if self.__manifest is not None else None
+                # Inclui a espera por uma vaga na fila do writer (contrapressão)
+                with self.__instrumentation.phase('queue', (rule, rule2)):
+                    self.__writer.submit(self.__ca.get_grid(), self.__ca.get_label(), self.__settings.scale, callback=callback, key=(rule, rule2))
+            else:
+                self.__ca.save_image(scale=self.__settings.scale, instrumentation=self.__instrumentation)
+                self.__record(rule, rule2, index, output=self.__ca.get_label())
+
+    def __record(self, rule, rule2, index, output=None, digest=None):
+        """Record a finished run in the manifest, if there is one"""
+        if self.__manifest is not None:
+            self.__manifest.record(rule, rule2, index, self.__settings.seed, output=output, digest=digest)
+
+    def __prepare_execs(self, execs):
+        """Reserve the execution IDs of the run, or recover them (and the initial state) from the manifest being resumed"""
+        if self.__settings.manifest is None:
+            return self.__reserve_execs(execs)
+
+        self.__manifest = SweepManifest(self.__settings.manifest)
+        settings = {'sim_type': self.__sim_type.name, 'execs': execs, 'size': self.__settings.size, 'steps': self.__settings.steps, 'scale': self.__settings.scale}
+        sweep = self.__manifest.get_sweep() if self.__settings.resume else None
+
+        if sweep is None:
+            first_exec = self.__reserve_execs(execs)
+            self.__manifest.start(first_exec, self.__ca.get_initial_state(), **settings)
+            return first_exec
+
+        if sweep['settings'] != settings:
+            raise ValueError(paint('red', f"[ERROR] The manifest '{self.__settings.manifest}' belongs to another sweep: {sweep['settings']}."))
+        self.__ca.set_initial_state(sweep['initial_state'])
+        self.__done = self.__manifest.completed()
+        return sweep['first_exec']
+
+    def __pending_pairs(self, pairs, exec):
+        """Drop the pairs of an execution that the resumed manifest already has"""
+        if not self.__done:
+            return pairs
+        return [(rule, rule2) for rule, rule2 in pairs if (rule, rule2, exec) not in self.__done]
+
+    def __open_sinks(self, save: bool):
+        """Open the result store, or start the background image writer, if enabled"""
+        if not save:
+            return
+        if isinstance(self.__settings.store, str):
+            self.__store = ResultStore(self.__settings.store, size=self.__settings.size, rows=self.__settings.steps + 1)
+        elif self.__settings.store is not None:
+            self.__store = self.__settings.store
+        elif self.__settings.writer_threads is not None:
+            self.__writer = ImageWriter(self.__settings.writer_threads, self.__settings.max_pending_images, self.__settings.compress_level, self.__instrumentation)
+
+    def __close_sinks(self):
+        """Wait for the queued images to be written and close the result store"""
+        if self.__writer is not None:
+            writer, self.__writer = self.__writer, None
+            writer.close()
+        if self.__store is not None:
+            store, self.__store = self.__store, None
+            if isinstance(self.__settings.store, str):
+                store.close()
+            elif isinstance(store, ResultStore):
+                store.flush()
+        if self.__manifest is not None:
+            self.__manifest.close()
 
 
     def run(self, show: bool = False, save: bool = True, debug: bool = False, begin_type: str = 'random'):
         """Run the simulation"""
         self.__validate_image_output(show, save, debug)
 
-        self.__ca = CellularAutomaton(self.__size, self.__steps, rule=0, rule2=None, begin_type='fixed')
+        # Sem instrumentação própria, cada execução com 'debug' mede só a si mesma (nada acumula entre execuções)
+        if not self.__given_instrumentation.is_enabled():
+            self.__instrumentation = Instrumentation() if debug else NO_INSTRUMENTATION
+        self.__instrumentation.start()
+
+        if self.__settings.seed is not None:
+            np.random.seed(self.__settings.seed)
+
+        self.__ca = CellularAutomaton(self.__settings.size, self.__settings.steps, rule=0, rule2=None, begin_type='fixed', engine=self.__settings.engine,
+                                          cycle_window=self.__settings.cycle_window)
+        if self.__settings.initial_state is not None:
+            self.__ca.set_initial_state(self.__settings.initial_state)
+        elif self.__settings.dedup:
+            # Uma linha aleatória quase nunca é simétrica: sem ela, o planejador não derivaria nenhuma grade
+            self.__ca.set_initial_state(symmetric_row(self.__settings.size))
         # self.__ca.calculate_previous_execs()
 
         # Write some debug information on the console
@@ -61,51 +188,271 @@ class Simulation:
 
         # Get the number of executions
         execs = self.__sim_type.get_execs()
+        if save:
+            self.__ca.set_previous_execs(self.__prepare_execs(execs))
+        self.__validate_dedup()
 
-        for exec in range(execs):
-            if debug:
-                print(paint('yellow', '========== DEBUG INFO =========='))
-                print(paint('yellow', '[INFO] Executing simulation ' + str(exec + 1) + ' of ' + str(execs)))
-                print(paint('yellow', '==============================='))
+        self.__open_sinks(save)
+        try:
+            if self.__settings.workers is not None and self.__sim_type.name != 'single':
+                self.__run_parallel(execs, show, save, debug)
+            else:
+                self.__run_execs(execs, show, save, debug, begin_type)
+        finally:
+            self.__close_sinks()
+            self.__instrumentation.stop()
+
+        if debug:
+            print(paint('yellow', self.__instrumentation.report()))
+
+    def __validate_dedup(self):
+        """Check that 'dedup' can derive grids from the initial state of the sweep, instead of silently simulating every pair"""
+        if not self.__settings.dedup or self.__sim_type.name == 'single':
+            return
+        if not row_symmetries(self.__ca.get_initial_state()):
+            raise ValueError(paint('red', "[ERROR] 'dedup' cannot derive any grid from this initial state: it is not mirror or "
+                                          "complement symmetric up to a rotation. Leave 'initial_state' unset, or use "
+                                          "'sweep_planner.symmetric_row'."))
+
+    def __reserve_execs(self, execs):
+        """Reserve the execution IDs of this run in the registry and record its settings"""
+        # O modo 'single' grava todas as execuções na mesma pasta 'exec_N'
+        count = 1 if self.__sim_type.name == 'single' else execs
+        return get_registry('../results/').reserve(
+            count, sim_type=self.__sim_type.name, execs=execs, **self.__settings.registry_metadata()
+        )
 
+    def __run_execs(self, execs, show, save, debug, begin_type):
+        """Run every execution of the simulation in this process"""
+        for exec in range(execs):
             if self.__sim_type.name == 'single':
                 # @FIXME: O path que a imagem é salva não está bom - a organização de pastas fica feia - podre
                 # Get the rule to be simulated
                 rule = self.__sim_type.get_rule()
 
-                # Run the simulation
-                self.__ca.reset(rule=rule, rule2=None, begin_type=begin_type, index=exec)
-                self.__ca.run()
-                self.__handle_image_output(show, save, debug)
+                # Run the simulation (unless the resumed manifest already has it)
+                if (rule, None, exec) not in self.__done:
+                    with self.__instrumentation.phase('label', (rule, None)):
+                        self.__ca.reset(rule=rule, rule2=None, begin_type=begin_type, index=exec)
+                    self.__evolve_one(rule, None)
+                    self.__record_cycle(rule, None, exec, self.__ca.get_cycle(), self.__ca.get_grid())
+                    self.__handle_image_output(show, save, debug)
                 prev = self.__ca.get_previous_execs()
                 self.__ca.set_previous_execs(prev-1)
 
-            elif self.__sim_type.name == 'all':
-                for i in range(256):
-                    self.__ca.reset(rule=i, begin_type='fixed', index=exec)
-                    self.__ca.run()
-                    self.__handle_image_output(show, save, debug)
+            else:
+                self.__run_rules(self.__pending_pairs(self.__rule_pairs(), exec), exec, show, save, debug)
+
+    def __rule_pairs(self):
+        """Return the (rule, rule2) pairs simulated by the 'all', 'complete' and 'custom-n-m' modes"""
+        if self.__sim_type.name == 'all':
+            return [(i, None) for i in range(256)]
+
+        elif self.__sim_type.name == 'complete':
+            return [(i, j) for i in range(256) for j in range(256) if i != j]
+
+        elif self.__sim_type.name[:7] == 'custom-' and self.__sim_type.name[8] == '-':
+            c1, c2 = self.__sim_type.get_chosen_classes()
+            return [(rule1, rule2) for rule1 in c1.get_rules() for rule2 in c2.get_rules() if rule1 != rule2]
+
+        return []
+
+    def __chunk_size(self, n_pairs):
+        """Number of pairs sent to a worker at once"""
+        per_worker = math.ceil(n_pairs / (self.__settings.workers * TASKS_PER_WORKER))
+        per_cells = math.ceil(CELLS_PER_TASK / (self.__settings.size * (self.__settings.steps + 1)))
+        return max(1, min(per_worker, per_cells))
+
+    def __run_parallel(self, execs, show, save, debug):
+        """Split the rule pairs and the executions of the sweep across a pool of worker processes"""
+        if show:
+            raise ValueError(paint('red', "[ERROR] 'show' is not supported with 'workers'. Save the images instead."))
+
+        pairs = self.__rule_pairs()
+        chunk_size = self.__chunk_size(len(pairs))
+        previous_execs = self.__ca.get_previous_execs()
+        initial_state = self.__ca.get_initial_state().copy()
+        base_seed = self.__settings.seed if self.__settings.seed is not None else int(np.random.randint(2**31))
+        # Cada worker recebe uma instrumentação vazia e devolve as suas métricas
+        settings = self.__settings.for_worker(
+            store=ResultBuffer() if self.__settings.store is not None and save else None,
+            instrumentation=self.__instrumentation if self.__instrumentation.is_enabled() else None,
+        )
+        if self.__settings.dedup:
+            # Cada par equivalente fica logo após o seu representante, para que o worker refaça o mesmo plano
+            pairs = [pair for simulated, derived in plan_sweep(pairs, initial_state)
+                     for pair in [simulated] + [equivalent for equivalent, _, _ in derived]]
+
+        with ProcessPoolExecutor(max_workers=self.__settings.workers) as executor:
+            futures = []
+            for exec in range(execs):
+                pending = self.__pending_pairs(pairs, exec)
+                for start in range(0, len(pending), chunk_size):
+                    # A semente de cada tarefa depende apenas da sua posição na varredura, não do worker que a executa
+                    seed = int(np.random.SeedSequence([base_seed, exec, start]).generate_state(1)[0])
+                    futures.append(executor.submit(
+                        _run_pairs_worker, self.__sim_type, settings, pending[start:start + chunk_size],
+                        exec, previous_execs, initial_state, seed, save, debug
+                    ))
+
+            for future in futures:
+                result, cycles, metrics = future.result()
+                self.__cycles.update(cycles)
+                if metrics is not None:
+                    self.__instrumentation.merge(metrics)
+                if self.__store is not None:
+                    self.__store.extend(result)
+                    for packed, (rule, rule2, _, _, exec_id, _) in result:
+                        self.__record(rule, None if rule2 < 0 else rule2, exec_id - previous_execs, digest=packed_hash(packed))
+
+    def run_pairs(self, pairs, exec: int, previous_execs: int, initial_state, show: bool = False, save: bool = True, debug: bool = False):
+        """Simulate a list of (rule, rule2) pairs of one execution, from a given initial state"""
+        self.__validate_image_output(show, save, debug)
+
+        if self.__ca is None:
+            self.__ca = CellularAutomaton(self.__settings.size, self.__settings.steps, rule=0, rule2=None, begin_type='fixed', engine=self.__settings.engine,
+                                          cycle_window=self.__settings.cycle_window)
+        self.__ca.set_previous_execs(previous_execs)
+        self.__ca.set_initial_state(initial_state)
+        if self.__settings.manifest is not None and save:
+            self.__manifest = SweepManifest(self.__settings.manifest)
+
+        self.__instrumentation.start()
+        self.__open_sinks(save)
+        try:
+            self.__run_rules(pairs, exec, show, save, debug)
+        finally:
+            self.__close_sinks()
+            self.__instrumentation.stop()
+
+    def __run_rules(self, pairs, exec, show, save, debug):
+        """Simulate every (rule, rule2) pair of an execution, one at a time or in batches"""
+        # Todas as regras partem do mesmo estado inicial fixo do autômato
+        initial_state = self.__ca.get_initial_state().copy()
+        if self.__settings.dedup:
+            plan = plan_sweep(pairs, initial_state)
+        else:
+            plan = [(pair, []) for pair in pairs]
+
+        if self.__settings.batch_size is None:
+            for (rule, rule2), derived in plan:
+                with self.__instrumentation.phase('label', (rule, rule2)):
+                    self.__ca.reset(rule=rule, rule2=rule2, begin_type='fixed', index=exec)
+                grid = self.__cached_grid(rule, rule2, initial_state)
+                if grid is not None:
+                    self.__ca.set_grid(grid)
+                    self.__instrumentation.count('cache_hits', key=(rule, rule2))
+                else:
+                    self.__evolve_one(rule, rule2)
+                    self.__cache_grid(rule, rule2, initial_state, self.__ca.get_grid())
+                    self.__record_cycle(rule, rule2, exec, self.__ca.get_cycle(), self.__ca.get_grid(), derived)
+                self.__handle_image_output(show, save, debug)
+                if derived and (show or save):
+                    self.__output_derived(self.__ca.get_grid().copy(), derived, exec, show, save, debug)
+            return
+
+        for start in range(0, len(plan), self.__settings.batch_size):
+            chunk = plan[start:start + self.__settings.batch_size]
+            grids = [self.__cached_grid(rule, rule2, initial_state) for (rule, rule2), _ in chunk]
+
+            # Só os pares que não estão no cache são simulados
+            missing = [index for index, grid in enumerate(grids) if grid is None]
+            if missing:
+                rules2 = [chunk[index][0][1] for index in missing]
+                batch = BatchAutomaton(
+                    self.__settings.size, self.__settings.steps,
+                    rule_numbers=[chunk[index][0][0] for index in missing],
+                    rule2_numbers=None if rules2[0] is None else rules2,
+                    initial_state=initial_state, cycle_window=self.__settings.cycle_window,
+                )
+                self.__evolve_batch(batch, [chunk[index][0] for index in missing])
+                for position, index in enumerate(missing):
+                    grids[index] = batch.get_grid(position)
+                    self.__cache_grid(*chunk[index][0], initial_state, grids[index])
+                    self.__record_cycle(*chunk[index][0], exec, batch.get_cycle(position), grids[index], chunk[index][1])
+
+            if not (show or save):
+                continue
+
+            for ((rule, rule2), derived), grid in zip(chunk, grids):
+                with self.__instrumentation.phase('label', (rule, rule2)):
+                    self.__ca.reset(rule=rule, rule2=rule2, begin_type='fixed', index=exec)
+                self.__ca.set_grid(grid)
+                self.__handle_image_output(show, save, debug)
+                self.__output_derived(grid, derived, exec, show, save, debug)
+
+    def __evolve_one(self, rule, rule2):
+        """Simulate the pair loaded in the automaton, recording its evolution time, cells and peak memory"""
+        key = (rule, rule2)
+        self.__instrumentation.begin_pairs()
+        with self.__instrumentation.phase('evolution', key):
+            self.__ca.run()
+        self.__instrumentation.end_pairs([key])
+        self.__instrumentation.count('runs', key=key)
+        self.__instrumentation.count('cells', self.__settings.size * self.__settings.steps, key=key)
+
+    def __evolve_batch(self, batch, keys):
+        """Simulate a batch of pairs; its evolution time is split evenly between the pairs"""
+        if not self.__instrumentation.is_enabled():
+            batch.run()
+            return
+
+        self.__instrumentation.begin_pairs()
+        start = time.perf_counter()
+        batch.run()
+        elapsed = time.perf_counter() - start
+        self.__instrumentation.end_pairs(keys)
+        for key in keys:
+            self.__instrumentation.add_time('evolution', elapsed / len(keys), key)
+            self.__instrumentation.count('runs', key=key)
+            self.__instrumentation.count('cells', self.__settings.size * self.__settings.steps, key=key)
+
+    def __cached_grid(self, rule, rule2, initial_state):
+        """Return the grid of a pair from the grid cache, or None"""
+        if self.__settings.cache is None:
+            return None
+        return self.__settings.cache.get(grid_key(rule, rule2, initial_state, self.__settings.steps), self.__settings.size)
+
+    def __cache_grid(self, rule, rule2, initial_state, grid):
+        """Store the grid of a pair in the grid cache, if there is one"""
+        if self.__settings.cache is not None:
+            self.__settings.cache.put(grid_key(rule, rule2, initial_state, self.__settings.steps), grid)
+
+    def __record_cycle(self, rule, rule2, exec, cycle, grid, derived=()):
+        """Keep the cycle found for a simulated pair, and for the pairs derived from it"""
+        if cycle is None:
+            return
+        self.__cycles[(rule, rule2, exec)] = cycle
+        for (equivalent, equivalent2), transform, _ in derived:
+            # O espelhamento inverte o sentido do deslocamento; o complemento não o altera
+            mirrored = transform in ('mirror', 'mirror_complement')
+            shift = -cycle['shift'] % rotation_period(grid[-1]) if mirrored else cycle['shift']
+            self.__cycles[(equivalent, equivalent2, exec)] = {**cycle, 'shift': shift}
+
+    def get_cycles(self):
+        """
+        Return the fixed points and cycles found by the simulations run so far, as a dict mapping each
+        (rule, rule2, exec) to its 'transient', 'period' and 'shift'. Runs that did not repeat within the
+        window (or whose grid came from the grid cache) are missing.
+        """
+        return self.__cycles
+
+    def get_instrumentation(self):
+        """
+        Return the Instrumentation of the simulation (NO_INSTRUMENTATION when it is not instrumented), whose 'summary',
+        'write_json' and 'write_prometheus' export the metrics of the runs so far (worker processes included); for the
+        one created by a 'debug' run, the metrics of that run only.
+        """
+        return self.__instrumentation
 
-            elif self.__sim_type.name == 'complete':
-                for i in range(256):
-                    for j in range(256):
-                        if i == j:
-                            continue
-                        else:
-                            self.__ca.reset(rule=i, rule2=j, index=exec, begin_type='fixed')
-                            self.__ca.run()
-                            self.__handle_image_output(show, save, debug)
-
-            elif self.__sim_type.name[:7] == 'custom-' and self.__sim_type.name[8] == '-':
-                c1, c2 = self.__sim_type.get_chosen_classes()
-                for rule1 in c1.get_rules():
-                    for rule2 in c2.get_rules():
-                        if rule1 == rule2:
-                            continue
-                        else:
-                            self.__ca.reset(rule=rule1, rule2=rule2, begin_type='fixed', index=exec)
-                            self.__ca.run()
-                            self.__handle_image_output(show, save, debug)
+    def __output_derived(self, grid, derived, exec, show, save, debug):
+        """Output the grids of the pairs equivalent to a simulated one, without simulating them"""
+        for (rule, rule2), transform, shift in derived:
+            with self.__instrumentation.phase('label', (rule, rule2)):
+                self.__ca.reset(rule=rule, rule2=rule2, begin_type='fixed', index=exec)
+            with self.__instrumentation.phase('derive', (rule, rule2)):
+                self.__ca.set_grid(derive_grid(grid, transform, shift))
+            self.__handle_image_output(show, save, debug)
 
 
     # DEBUG METHODS
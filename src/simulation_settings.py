@@ -0,0 +1,107 @@
+# File: simulation_settings.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Options of a Simulation besides the rules it simulates, in a single object: the
+#              automaton, the evolution strategy, the outputs and the instrumentation. A new option
+#              is declared here once, and reaches the worker processes and the registry with it.
+
+import dataclasses
+
+from cycle_detection import CYCLE_WINDOW
+from utils import paint
+
+@dataclasses.dataclass
+class SimulationSettings:
+    """
+    Settings of a Simulation.
+
+    Automaton:
+    :param scale: int, scale of the generated images.
+    :param size: int, number of cells (grid width).
+    :param steps: int, number of steps (time stamps) to simulate.
+    :param engine: str, evolution engine of the automaton, 'numpy' or 'dict'.
+    :param seed: int (optional), seed of the random initial state and of the worker tasks, for reproducible runs.
+    :param initial_state: np.ndarray (bool) (optional), fixed initial state of the sweep. None draws a random one.
+
+    Evolution:
+    :param batch_size: int (optional), number of rules (or rule pairs) evolved together by a BatchAutomaton
+                       in the 'all', 'complete' and 'custom-n-m' modes. None runs them one at a time.
+    :param workers: int (optional), number of worker processes sharing the rule pairs and executions
+                    of the 'all', 'complete' and 'custom-n-m' modes. None runs everything in this process.
+    :param dedup: bool, simulate one rule (or rule pair) per mirror/complement class and derive the grids of
+                  the equivalent ones. Grids can only be derived from a symmetric initial state (see sweep_planner),
+                  so without 'initial_state' the random one is drawn symmetric ('sweep_planner.symmetric_row'),
+                  and a given 'initial_state' from which nothing can be derived raises a ValueError.
+    :param cache: GridCache (optional), cache of simulated grids; pairs already simulated from the same initial
+                  state (in this sweep or in earlier runs, through its disk tier) are not simulated again.
+    :param cycle_window: int, number of recent checked rows (one every CYCLE_STRIDE steps) each new checked row is
+                         compared with to detect fixed points and (shifted) cycles. On by default: a run whose rows
+                         repeat is completed by tiling the cycle instead of simulating the remaining rows. A period p
+                         is detected when p // gcd(p, CYCLE_STRIDE) <= cycle_window. 0 disables it.
+                         The cycles found are returned by 'Simulation.get_cycles'.
+
+    Outputs:
+    :param writer_threads: int (optional), number of background threads encoding and saving the images while the
+                           next rules are simulated. None saves each image synchronously.
+    :param max_pending_images: int, maximum number of images waiting to be written before the simulation blocks.
+    :param compress_level: int (0-9), zlib compression level of the saved PNG files.
+    :param store: str (optional), directory of a ResultStore. When given, saved runs are appended to the store
+                  (bit-packed grids and their metadata) instead of being written as PNG files, which can be
+                  rendered later with 'ResultStore.render'. A ResultStore or ResultBuffer object is also accepted.
+    :param manifest: str (optional), path of a SweepManifest recording every finished run (rule pair, execution,
+                     seed and output hash) as the sweep goes.
+    :param resume: bool, continue the sweep of an existing 'manifest' (same execution IDs and initial state),
+                   simulating only the runs that are missing or whose output changed.
+
+    :param instrumentation: Instrumentation (optional), records the time of each phase of the sweep (evolution, labels
+                            and paths, rendering, PNG encoding, disk writes...), counters and peak memory, in total and
+                            per rule pair; see 'Simulation.get_instrumentation'. Running with 'debug' without one
+                            records that run alone in a new Instrumentation (kept until the next run) and prints its
+                            report at the end of the run.
+    """
+    scale: int = 4
+    size: int = 100
+    steps: int = 200
+    engine: str = 'numpy'
+    seed: int = None
+    initial_state: object = None
+    batch_size: int = None
+    workers: int = None
+    dedup: bool = False
+    cache: object = None
+    cycle_window: int = CYCLE_WINDOW
+    writer_threads: int = 2
+    max_pending_images: int = 8
+    compress_level: int = 6
+    store: object = None
+    manifest: str = None
+    resume: bool = False
+    instrumentation: object = None
+
+    def __post_init__(self):
+        for name in ('batch_size', 'workers'):
+            value = getattr(self, name)
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise ValueError(paint('red', f"[ERROR] Invalid '{name}' specified. Must be an integer greater than 0."))
+
+    def replace(self, **options):
+        """
+        Return a copy of the settings with some options changed.
+        """
+        return dataclasses.replace(self, **options)
+
+    def for_worker(self, store, instrumentation):
+        """
+        Settings of a worker process of a parallel sweep: it runs the pairs it is given in-process (no workers of its
+        own, no resume), from the initial state and seed it is given, into its own store and instrumentation.
+        """
+        return self.replace(workers=None, seed=None, initial_state=None, resume=False, store=store, instrumentation=instrumentation)
+
+    def registry_metadata(self):
+        """
+        Settings recorded in the execution registry with the IDs of a run (the JSON-serializable ones).
+        """
+        return {
+            'size': self.size, 'steps': self.steps, 'scale': self.scale, 'engine': self.engine, 'seed': self.seed,
+            'dedup': self.dedup, 'store': self.store if isinstance(self.store, str) else None,
+        }
@@ -0,0 +1,71 @@
+# File: state_space.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Integer encoding of the rows of a finite ring and the transition table of a rule
+#              over all of them, shared by the binary lifting and the cycle analysis.
+
+import numpy as np
+
+from rules import rules
+
+# Number of states processed at once when building the transition table, to bound temporary arrays
+TRANSITION_BLOCK = 2 ** 20
+
+def state_dtype(size: int):
+    """
+    Return the smallest unsigned dtype able to hold a state of 'size' cells.
+    """
+    if size <= 8:
+        return np.uint8
+    if size <= 16:
+        return np.uint16
+    if size <= 32:
+        return np.uint32
+    raise ValueError("\033[31m[ERROR] Size must be at most 32 cells.\033[0m")
+
+def encode_state(state) -> int:
+    """
+    Encode a row as an integer, the first cell being the most significant bit.
+    (0, 1, 1) -> 3, which is the position of the row in the list of all rows of that size.
+    """
+    value = 0
+    for cell in state:
+        value = (value << 1) | int(cell)
+    return value
+
+def decode_state(value: int, size: int) -> tuple:
+    """
+    Decode an integer produced by 'encode_state' back into a row.
+    """
+    return tuple((int(value) >> (size - 1 - cell)) & 1 for cell in range(size))
+
+def successors(rule: int, size: int, states):
+    """
+    Compute the encoded successor of each encoded state in 'states'.
+    Cell 'j' is bit 'size - 1 - j' of the state, so the neighbors of every cell are obtained at once
+    by rotating the integer one bit each way, and the rule is applied as a bitwise formula.
+    :param rule: int (0-255), the rule ID.
+    :param size: int, number of cells of the ring.
+    :param states: np.ndarray (of 'state_dtype(size)'), encoded states.
+    :return: np.ndarray, encoded successors.
+    """
+    mask = states.dtype.type((1 << size) - 1)
+    left = (states >> 1) | ((states & 1) << (size - 1))
+    right = ((states << 1) & mask) | (states >> (size - 1))
+    return rules[rule].apply_bitwise(left, states, right) & mask
+
+def transition_table(rule: int, size: int):
+    """
+    Compute the next state of every one of the 2 ** size states of a ring, for a given rule.
+    :param rule: int (0-255), the rule ID.
+    :param size: int, number of cells of the ring.
+    :return: np.ndarray, shape (2 ** size,), entry 's' is the encoded successor of the encoded state 's'.
+    """
+    dtype = state_dtype(size)
+    table = np.empty(2 ** size, dtype=dtype)
+
+    for start in range(0, 2 ** size, TRANSITION_BLOCK):
+        states = np.arange(start, min(start + TRANSITION_BLOCK, 2 ** size), dtype=dtype)
+        table[start:start + len(states)] = successors(rule, size, states)
+
+    return table
@@ -0,0 +1,194 @@
+# File: streaming.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Sinks for the row stream of 'CellularAutomaton.stream'. Every sink consumes the
+#              evolution block by block with O(size) memory: an incremental 1-bit PNG writer,
+#              running statistics, and a gzip-compressed file of bit-packed rows.
+
+import gzip
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Compressed data accumulated before an IDAT chunk is written
+PNG_CHUNK_BYTES = 1 << 16
+
+ROWS_MAGIC = b'CAROWS1\n'
+
+def consume(blocks, *sinks):
+    """
+    Feed every block of a row stream to each sink, then close the sinks.
+    :param blocks: iterable of np.ndarray (bool), blocks of shape (n, size) (see 'CellularAutomaton.stream').
+    :return: the sinks, for chaining (e.g. reading the statistics afterwards).
+    """
+    try:
+        for block in blocks:
+            for sink in sinks:
+                sink.write(block)
+    finally:
+        for sink in sinks:
+            sink.close()
+    return sinks
+
+class PngRowWriter:
+    def __init__(self, path: str, size: int, rows: int, scale: int = 1, compress_level: int = 6):
+        """
+        Write a 1-bit grayscale PNG (live cells in black) row by row. The scanlines go straight into a
+        zlib stream, so neither the image nor the grid is ever held in memory.
+
+        :param path: str, output file.
+        :param size: int, number of cells of each row.
+        :param rows: int, total number of rows that will be written (steps + 1); the PNG header needs it upfront.
+        :param scale: int, each cell is drawn as a 'scale' x 'scale' square.
+        :param compress_level: int (0-9), zlib compression level.
+        """
+        self.__size = size
+        self.__rows = rows
+        self.__scale = scale
+        self.__written = 0
+        self.__compressor = zlib.compressobj(compress_level)
+        self.__buffer = []
+        self.__buffered = 0
+
+        self.__file = open(path, 'wb')
+        self.__file.write(PNG_SIGNATURE)
+        # Largura, altura, profundidade de 1 bit, tons de cinza, compressão, filtro e entrelaçamento padrão
+        self.__chunk(b'IHDR', struct.pack('>IIBBBBB', size * scale, rows * scale, 1, 0, 0, 0, 0))
+
+    def __chunk(self, kind, data):
+        self.__file.write(struct.pack('>I', len(data)) + kind + data)
+        self.__file.write(struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    def __push(self, data):
+        if data:
+            self.__buffer.append(data)
+            self.__buffered += len(data)
+        if self.__buffered >= PNG_CHUNK_BYTES:
+            self.__chunk(b'IDAT', b''.join(self.__buffer))
+            self.__buffer, self.__buffered = [], 0
+
+    def write(self, block):
+        """
+        Append a block of rows (shape (n, size), bool) to the image.
+        """
+        if self.__written + len(block) > self.__rows:
+            raise ValueError(f"\033[31m[ERROR] The image only has {self.__rows} rows.\033[0m")
+
+        cells = ~block
+        if self.__scale > 1:
+            cells = np.repeat(cells, self.__scale, axis=1)
+        packed = np.packbits(cells, axis=1)
+
+        # Cada linha da imagem começa com o byte de filtro 0 (sem filtro)
+        scanlines = np.zeros((len(block), self.__scale, packed.shape[1] + 1), dtype=np.uint8)
+        scanlines[:, :, 1:] = packed[:, None, :]
+        self.__push(self.__compressor.compress(scanlines.tobytes()))
+        self.__written += len(block)
+
+    def close(self):
+        """
+        Finish the zlib stream and the file.
+        """
+        if self.__file.closed:
+            return
+        try:
+            if self.__written != self.__rows:
+                raise ValueError(f"\033[31m[ERROR] Expected {self.__rows} rows, got {self.__written}.\033[0m")
+            self.__push(self.__compressor.flush())
+            if self.__buffer:
+                self.__chunk(b'IDAT', b''.join(self.__buffer))
+            self.__chunk(b'IEND', b'')
+        finally:
+            self.__file.close()
+
+class RowStatistics:
+    def __init__(self, size: int):
+        """
+        Running statistics of a row stream, kept in O(size) memory: density of live cells (mean and
+        variance over the rows), fraction of cells that change from one row to the next, and how often
+        each cell is alive.
+
+        :param size: int, number of cells of each row.
+        """
+        self.__size = size
+        self.__rows = 0
+        self.__density_sum = 0.0
+        self.__density_squares = 0.0
+        self.__changes = 0
+        self.__alive = np.zeros(size, dtype=np.int64)
+        self.__last = None
+
+    def write(self, block):
+        densities = block.mean(axis=1)
+        self.__density_sum += densities.sum()
+        self.__density_squares += (densities ** 2).sum()
+        self.__alive += block.sum(axis=0)
+
+        # Mudanças entre linhas consecutivas, incluindo a fronteira com o bloco anterior
+        if self.__last is not None:
+            self.__changes += np.count_nonzero(block[0] != self.__last)
+        self.__changes += np.count_nonzero(block[1:] != block[:-1])
+        self.__last = block[-1].copy()
+        self.__rows += len(block)
+
+    def close(self):
+        pass
+
+    def get_cell_frequencies(self):
+        """
+        Return the fraction of rows in which each cell is alive.
+        """
+        return self.__alive / max(self.__rows, 1)
+
+    def summary(self):
+        """
+        Return the statistics of the stream as a dict.
+        """
+        mean = self.__density_sum / max(self.__rows, 1)
+        return {
+            'rows': self.__rows,
+            'mean_density': float(mean),
+            'density_variance': float(max(self.__density_squares / max(self.__rows, 1) - mean ** 2, 0.0)),
+            'change_rate': float(self.__changes / max((self.__rows - 1) * self.__size, 1)),
+        }
+
+class CompressedRowWriter:
+    def __init__(self, path: str, size: int, compress_level: int = 6):
+        """
+        Write the rows bit-packed (8 cells per byte) into a gzip file, read back with 'read_compressed_rows'.
+        :param path: str, output file.
+        :param size: int, number of cells of each row.
+        :param compress_level: int (1-9), gzip compression level.
+        """
+        self.__size = size
+        self.__file = gzip.open(path, 'wb', compresslevel=compress_level)
+        self.__file.write(ROWS_MAGIC + struct.pack('<Q', size))
+
+    def write(self, block):
+        if block.shape[1] != self.__size:
+            raise ValueError(f"\033[31m[ERROR] Rows must have {self.__size} cells.\033[0m")
+        self.__file.write(np.packbits(block, axis=1).tobytes())
+
+    def close(self):
+        self.__file.close()
+
+def read_compressed_rows(path: str, block_rows: int = 1024):
+    """
+    Read a file written by CompressedRowWriter, block by block.
+    :return: generator of np.ndarray (bool), blocks of at most 'block_rows' rows.
+    """
+    with gzip.open(path, 'rb') as handle:
+        header = handle.read(len(ROWS_MAGIC) + 8)
+        if header[:len(ROWS_MAGIC)] != ROWS_MAGIC:
+            raise ValueError(f"\033[31m[ERROR] '{path}' is not a compressed row file.\033[0m")
+        size = struct.unpack('<Q', header[len(ROWS_MAGIC):])[0]
+        row_bytes = (size + 7) // 8
+
+        while True:
+            data = handle.read(block_rows * row_bytes)
+            if not data:
+                return
+            packed = np.frombuffer(data, dtype=np.uint8).reshape(-1, row_bytes)
+            yield np.unpackbits(packed, axis=1, count=size).astype(bool)
@@ -0,0 +1,113 @@
+# File: sweep_planner.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Deduplication of rule sweeps through the equivalences of the elementary rules.
+#              Reflecting (mirror) or inverting (complement) the rows maps the space-time diagram
+#              of a rule to the diagram of its equivalent rule, so only one rule per class has to
+#              be simulated, as long as the initial row is itself symmetric (up to a rotation). A
+#              random row almost never is, so dedup sweeps draw a random symmetric one instead.
+
+import numpy as np
+
+from rules import rules
+
+# Transformations of the rows, with the equivalent-rule map of each one
+TRANSFORMS = ('mirror', 'complement', 'mirror_complement')
+
+def transform_rule(rule: int, transform: str) -> int:
+    """
+    Return the rule equivalent to 'rule' under a transformation of the rows.
+    """
+    if transform == 'mirror':
+        return rules[rule].get_mirror_number()
+    if transform == 'complement':
+        return rules[rule].get_complement_number()
+    return rules[rules[rule].get_mirror_number()].get_complement_number()
+
+def transform_pair(pair, transform: str):
+    """
+    Return the (rule, rule2) pair equivalent to 'pair'. Both transformations commute with the
+    composition, so each rule of the pair is transformed independently.
+    """
+    rule, rule2 = pair
+    return transform_rule(rule, transform), None if rule2 is None else transform_rule(rule2, transform)
+
+def transform_rows(rows, transform: str):
+    """
+    Apply a transformation to a row (or to every row of a grid).
+    """
+    if transform in ('mirror', 'mirror_complement'):
+        rows = rows[..., ::-1]
+    if transform in ('complement', 'mirror_complement'):
+        rows = ~rows
+    return rows
+
+def row_symmetries(initial_state):
+    """
+    Find the transformations that map the initial row to one of its rotations.
+    :param initial_state: np.ndarray (bool), the initial row of the sweep.
+    :return: dict mapping each such transformation to the shift 'k' with transform(row) == np.roll(row, k).
+    """
+    initial_state = np.asarray(initial_state, dtype=bool)
+    size = len(initial_state)
+    doubled = np.concatenate([initial_state, initial_state]).view(np.uint8).tobytes()
+
+    symmetries = {}
+    for transform in TRANSFORMS:
+        # 't(row)' é uma rotação de 'row' se e somente se aparece em 'row + row'
+        position = doubled.find(transform_rows(initial_state, transform).view(np.uint8).tobytes())
+        if position >= 0:
+            symmetries[transform] = (size - position) % size
+    return symmetries
+
+def symmetric_row(size: int):
+    """
+    Draw a random row the planner can derive grids from: a random palindrome followed by its complement, which is
+    mirror and complement symmetric up to a rotation. For an odd size, a row and its complement never have the same
+    number of live cells, so no row is complement symmetric and a random palindrome (mirror symmetric) is drawn.
+    Drawn with np.random, so it follows the seed of the simulation.
+    :return: np.ndarray (bool), the row.
+    """
+    if size % 2:
+        return _random_palindrome(size)
+    palindrome = _random_palindrome(size // 2)
+    return np.concatenate([palindrome, ~palindrome])
+
+def _random_palindrome(size: int):
+    half = np.random.randint(0, 2, (size + 1) // 2, dtype=bool)
+    return np.concatenate([half, half[:size // 2][::-1]])
+
+def derive_grid(grid, transform: str, shift: int):
+    """
+    Build the grid of the equivalent rule from the grid of the simulated one.
+    If transform(x0) == roll(x0, k), the rule t(R) started from x0 evolves as t(roll(grid_R(x0), k)).
+    """
+    return transform_rows(np.roll(grid, shift, axis=-1), transform)
+
+def plan_sweep(pairs, initial_state):
+    """
+    Split the (rule, rule2) pairs of a sweep into the ones to simulate and the ones derived from them.
+    :param pairs: list of (int, int or None), the pairs of the sweep, in order.
+    :param initial_state: np.ndarray (bool), the initial row shared by every pair.
+    :return: list of (pair, derived), where 'pair' is simulated and 'derived' is a list of
+             (equivalent_pair, transform, shift) whose grids are obtained with 'derive_grid'.
+    """
+    symmetries = row_symmetries(initial_state)
+    wanted = set(pairs)
+    covered = set()
+    plan = []
+
+    for pair in pairs:
+        if pair in covered:
+            continue
+        covered.add(pair)
+
+        derived = []
+        for transform, shift in symmetries.items():
+            equivalent = transform_pair(pair, transform)
+            if equivalent in wanted and equivalent not in covered:
+                covered.add(equivalent)
+                derived.append((equivalent, transform, shift))
+        plan.append((pair, derived))
+
+    return plan
@@ -0,0 +1,144 @@
+# File: symmetry.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Rotation/reflection equivalence classes of the rows of a ring. An elementary rule
+#              commutes with the rotations of a periodic ring (and with the reflection, when the rule
+#              is left-right symmetric), so the image of a rotated row is the rotated image and the
+#              state space can be reduced to one representative per class.
+
+import numpy as np
+
+from rules import rules
+from state_space import TRANSITION_BLOCK, state_dtype, successors
+
+class SymmetryGroup:
+    def __init__(self, size: int, reflections: bool = False):
+        """
+        Rotations (and optionally reflections) of a ring of 'size' cells, acting on encoded states.
+        Element 'g = f * size + k' reflects the row when 'f' is 1 and then rotates it by 'k' cells.
+
+        :param size: int, number of cells of the ring.
+        :param reflections: bool, whether the reflections belong to the group (left-right symmetric rules).
+        """
+        self.__size = size
+        self.__order = 2 * size if reflections else size
+        self.__mask = (1 << size) - 1
+        self.__multiplication, self.__inverse = self.__build_tables()
+
+    def __permutation(self, element):
+        """
+        Return 'p' such that (element . row)[j] = row[p[j]].
+        """
+        reflect, shift = divmod(element, self.__size)
+        cells = (np.arange(self.__size) - shift) % self.__size
+        return self.__size - 1 - cells if reflect else cells
+
+    def __build_tables(self):
+        """
+        Multiplication table (a . b, as an index) and inverse of every element.
+        """
+        permutations = [self.__permutation(element) for element in range(self.__order)]
+        index = {}
+        for element, permutation in enumerate(permutations):
+            index.setdefault(tuple(permutation), element)
+
+        multiplication = np.empty((self.__order, self.__order), dtype=np.uint8)
+        for a in range(self.__order):
+            for b in range(self.__order):
+                multiplication[a, b] = index[tuple(permutations[b][permutations[a]])]
+
+        inverse = np.argmax(multiplication == index[tuple(range(self.__size))], axis=1).astype(np.uint8)
+        return multiplication, inverse
+
+    #### ACTION ON STATES ####
+
+    def __reflect(self, states):
+        reflected = np.zeros_like(states)
+        for bit in range(self.__size):
+            reflected |= ((states >> bit) & 1) << (self.__size - 1 - bit)
+        return reflected
+
+    def __rotate(self, states, shift):
+        if shift == 0:
+            return states.copy()
+        mask = states.dtype.type(self.__mask)
+        return ((states >> shift) | (states << (self.__size - shift))) & mask
+
+    def act(self, elements, states):
+        """
+        Apply group elements to encoded states.
+        :param elements: int or np.ndarray, one element for all the states or one per state.
+        :param states: np.ndarray, encoded states.
+        :return: np.ndarray, the transformed states.
+        """
+        states = np.asarray(states)
+        if np.isscalar(elements):
+            reflect, shift = divmod(int(elements), self.__size)
+            return self.__rotate(self.__reflect(states) if reflect else states, shift)
+
+        result = np.empty_like(states)
+        for element in np.unique(elements):
+            selected = elements == element
+            result[selected] = self.act(int(element), states[selected])
+        return result
+
+    def canonicalize(self, states):
+        """
+        Map each state to the smallest state of its class.
+        :param states: np.ndarray, encoded states.
+        :return: (canonical, elements), with states == act(elements, canonical).
+        """
+        canonical = states.copy()
+        best = np.zeros(len(states), dtype=np.uint8)
+        reflected = self.__reflect(states) if self.__order > self.__size else None
+
+        for element in range(1, self.__order):
+            reflect, shift = divmod(element, self.__size)
+            candidate = self.__rotate(reflected if reflect else states, shift)
+            smaller = candidate < canonical
+            canonical[smaller] = candidate[smaller]
+            best[smaller] = element
+
+        return canonical, self.__inverse[best]
+
+    #### GETTERS ####
+
+    def get_order(self):
+        return self.__order
+
+    def get_multiplication(self):
+        return self.__multiplication
+
+def representatives(size: int, group: SymmetryGroup):
+    """
+    Return the canonical state of every class, sorted (necklaces, or bracelets with reflections).
+    """
+    dtype = state_dtype(size)
+    found = []
+    for start in range(0, 2 ** size, TRANSITION_BLOCK):
+        states = np.arange(start, min(start + TRANSITION_BLOCK, 2 ** size), dtype=dtype)
+        canonical, _ = group.canonicalize(states)
+        found.append(states[canonical == states])
+    return np.concatenate(found)
+
+def reduced_transitions(rule: int, size: int, group: SymmetryGroup, classes):
+    """
+    Transition table between classes: the successor of representative 'classes[c]' is
+    act(elements[c], classes[targets[c]]).
+    :param classes: np.ndarray, sorted representatives (see 'representatives').
+    :return: (targets, elements), class index and group element of the successor of every class.
+    """
+    targets = np.empty(len(classes), dtype=np.uint32)
+    elements = np.empty(len(classes), dtype=np.uint8)
+    for start in range(0, len(classes), TRANSITION_BLOCK):
+        block = classes[start:start + TRANSITION_BLOCK]
+        canonical, element = group.canonicalize(successors(rule, size, block))
+        targets[start:start + len(block)] = np.searchsorted(classes, canonical)
+        elements[start:start + len(block)] = element
+    return targets, elements
+
+def rule_group(rule: int, size: int):
+    """
+    Return the largest symmetry group the rule commutes with on a ring of 'size' cells.
+    """
+    return SymmetryGroup(size, reflections=rules[rule].is_mirror_symmetric())
@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+
+class TableCache:
+    def __init__(self, path: str, version: int = 1, max_bytes: int = None):
+        """
+        Versioned on-disk cache of NumPy tables, one '.npy' file per key.
+        Tables are loaded with np.load(mmap_mode='r'), so processes using the same table share
+        one copy through the page cache. When 'max_bytes' is set, the least recently used files
+        are evicted after every store.
+
+        :param path: str, root directory of the cache.
+        :param version: int, format version; each version lives in its own subdirectory.
+        :param max_bytes: int (optional), size cap of the cache directory, in bytes.
+        """
+        self.__path = os.path.join(path, f'v{version}')
+        self.__max_bytes = max_bytes
+        os.makedirs(self.__path, exist_ok=True)
+
+    def __file(self, key: str):
+        return os.path.join(self.__path, key + '.npy')
+
+    def load(self, key: str):
+        """
+        Return the cached table for 'key', memory-mapped read-only, or None if it is not cached.
+        """
+        file = self.__file(key)
+        try:
+            table = np.load(file, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # A data de modificação marca o último uso, para a política LRU
+        os.utime(file)
+        return table
+
+    def store(self, key: str, table):
+        """
+        Write 'table' for 'key' atomically, evict old entries if needed, and return the memory-mapped copy.
+        """
+        file = self.__file(key)
+        temporary = f'{file}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as handle:
+            np.save(handle, table)
+        os.replace(temporary, file)
+
+        self.evict(keep=file)
+        return np.load(file, mmap_mode='r')
+
+    def evict(self, keep: str = None):
+        """
+        Remove the least recently used tables until the cache fits in 'max_bytes'.
+        :param keep: str (optional), file that must not be evicted (the one just stored).
+        """
+        if self.__max_bytes is None:
+            return
+
+        entries = []
+        for name in os.listdir(self.__path):
+            if not name.endswith('.npy'):
+                continue
+            file = os.path.join(self.__path, name)
+            try:
+                stat = os.stat(file)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, file in sorted(entries):
+            if total <= self.__max_bytes:
+                break
+            if file == keep:
+                continue
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get_nbytes(self):
+        """
+        Return the total size of the cached tables, in bytes.
+        """
+        return sum(os.path.getsize(os.path.join(self.__path, name)) for name in os.listdir(self.__path) if name.endswith('.npy'))
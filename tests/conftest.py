@@ -0,0 +1,48 @@
+# File: conftest.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Shared setup of the test suite: the modules of 'src' are imported as top-level
+#              modules (as when running from 'src'), and every test runs from a temporary 'src'
+#              directory, so the '../results/' tree it writes never lands in the repository.
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from automaton import CellularAutomaton
+
+# Ring sizes of the engine checks: the smallest rings, and widths around a 64-bit word boundary
+SIZES = (1, 2, 63, 64, 65, 100)
+
+def composite_partner(rule: int):
+    """
+    Second rule composed with 'rule' in the checks, so that every rule is also checked in a composition.
+    """
+    return (rule * 37 + 11) % 256
+
+def reference_grid(initial_state, steps: int, rule: int, rule2: int = None):
+    """
+    Grid of the reference 'dict' engine (cell by cell, every row simulated) from a given initial row.
+    """
+    reference = CellularAutomaton(len(initial_state), steps, rule, rule2, begin_type='fixed', engine='dict')
+    reference.set_initial_state(initial_state)
+    reference.run()
+    return reference.get_grid()
+
+@pytest.fixture(autouse=True)
+def workspace(tmp_path, monkeypatch):
+    """
+    Run the test from a temporary 'src' directory.
+    """
+    working = tmp_path / 'src'
+    working.mkdir()
+    monkeypatch.chdir(working)
+    return working
+
+@pytest.fixture
+def generator():
+    return np.random.default_rng(0)
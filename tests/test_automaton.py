@@ -0,0 +1,48 @@
+# File: test_automaton.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: The 'numpy' engine of CellularAutomaton, with the cycle detection and tiling it uses
+#              by default, against the reference 'dict' engine, and the cycles it reports.
+
+import numpy as np
+import pytest
+
+from automaton import CellularAutomaton
+from conftest import SIZES, composite_partner, reference_grid
+from cycle_detection import CYCLE_STRIDE, CycleDetector
+
+STEPS = 40
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('composed', (False, True))
+def test_matches_dict_engine(size, composed, generator):
+    for rule in range(256):
+        rule2 = composite_partner(rule) if composed else None
+        initial_state = generator.integers(0, 2, size).astype(bool)
+
+        ca = CellularAutomaton(size, STEPS, rule, rule2, begin_type='fixed')
+        ca.set_initial_state(initial_state)
+        cycle = ca.run()
+        grid = ca.get_grid()
+        assert np.array_equal(grid, reference_grid(initial_state, STEPS, rule, rule2)), (rule, rule2)
+
+        # O ciclo informado descreve a grade: cada linha depois do transiente repete a de 'period' passos antes
+        assert cycle == ca.get_cycle()
+        if cycle is not None:
+            start = cycle['transient']
+            assert np.array_equal(np.roll(grid[start:-cycle['period']], cycle['shift'], axis=1), grid[start + cycle['period']:])
+
+def test_dict_engine_simulates_every_row():
+    ca = CellularAutomaton(40, 50, 0, engine='dict')
+    assert ca.run() is None and ca.get_cycle() is None
+
+@pytest.mark.parametrize('period', (8, 64, 65, 67, 68, 136))
+def test_detected_periods(period, generator):
+    rows = generator.integers(0, 2, (period, 50)).astype(bool)
+    grid = rows[np.arange(1200) % period][None]
+    detector = CycleDetector(grid)
+    cycle = next((found[0] for step in range(len(grid[0])) if (found := detector.observe(step))), None)
+    if period // np.gcd(period, CYCLE_STRIDE) <= 64:
+        assert cycle == {'transient': 0, 'period': period, 'shift': 0}
+    else:
+        assert cycle is None
@@ -0,0 +1,56 @@
+# File: test_general_rules.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: GeneralRule against the reference 'dict' engine (radius 1 and 2 binary rules) and
+#              against a cell by cell evaluation of the neighborhoods (other radii, state counts and
+#              totalistic rules).
+
+import numpy as np
+import pytest
+
+from conftest import SIZES, composite_partner, reference_grid
+from general_rules import GeneralRule
+from rules import composite_tables_for
+
+STEPS = 12
+
+def evaluate_cells(rule, row, radius: int, states: int, totalistic: bool):
+    """
+    Next row of a general rule, reading the neighborhood of each cell one by one, from left to right.
+    """
+    expected = np.empty_like(row)
+    for cell in range(len(row)):
+        neighborhood = [int(row[(cell + offset) % len(row)]) for offset in range(-radius, radius + 1)]
+        if totalistic:
+            index = sum(neighborhood)
+        else:
+            index = sum(value * states ** (2 * radius - position) for position, value in enumerate(neighborhood))
+        expected[cell] = rule.get_lookup_table()[index]
+    return expected
+
+@pytest.mark.parametrize('size', SIZES)
+def test_elementary_rules_match_dict_engine(size, generator):
+    for rule in range(256):
+        initial_state = generator.integers(0, 2, size).astype(bool)
+        general = GeneralRule(rule)
+        assert general.get_number() == rule
+        assert np.array_equal(general.run(initial_state, STEPS), reference_grid(initial_state, STEPS, rule)), rule
+
+@pytest.mark.parametrize('size', SIZES)
+def test_composite_tables_match_dict_engine(size, generator):
+    for rule in range(256):
+        rule2 = composite_partner(rule)
+        initial_state = generator.integers(0, 2, size).astype(bool)
+        general = GeneralRule(table=composite_tables_for([(rule, rule2)])[0], radius=2)
+        assert np.array_equal(general.run(initial_state, STEPS), reference_grid(initial_state, STEPS, rule, rule2)), (rule, rule2)
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('radius, states, totalistic', ((1, 3, False), (2, 3, False), (3, 2, False), (2, 4, True), (3, 5, True)))
+def test_general_rules_match_cell_evaluation(size, radius, states, totalistic, generator):
+    entries = (2 * radius + 1) * (states - 1) + 1 if totalistic else states ** (2 * radius + 1)
+    rule = GeneralRule(table=generator.integers(0, states, entries), radius=radius, states=states, totalistic=totalistic)
+    row = generator.integers(0, states, size).astype(np.uint8)
+
+    assert np.array_equal(rule.apply(row), evaluate_cells(rule, row, radius, states, totalistic))
+    same_number = GeneralRule(rule.get_number(), radius, states, totalistic)
+    assert np.array_equal(same_number.get_lookup_table(), rule.get_lookup_table())
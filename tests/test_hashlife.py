@@ -0,0 +1,39 @@
+# File: test_hashlife.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: HashlifeAutomaton against the direct engine ('numpy', every row simulated), over
+#              runs long enough to exercise jumps of every power of two below the number of steps.
+
+import numpy as np
+import pytest
+
+from automaton import CellularAutomaton
+from conftest import SIZES, composite_partner
+from hashlife import HashlifeAutomaton
+
+STEPS = 300
+
+def direct_grid(initial_state, steps: int, rule: int, rule2: int = None):
+    direct = CellularAutomaton(len(initial_state), steps, rule, rule2, begin_type='fixed', cycle_window=0)
+    direct.set_initial_state(initial_state)
+    direct.run()
+    return direct.get_grid()
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('composed', (False, True))
+def test_matches_direct_engine(size, composed, generator):
+    for rule in range(256):
+        rule2 = composite_partner(rule) if composed else None
+        initial_state = generator.integers(0, 2, size).astype(bool)
+        generations = sorted(generator.choice(STEPS + 1, 3, replace=False))
+
+        hashlife = HashlifeAutomaton(size, rule, rule2, initial_state=initial_state)
+        expected = direct_grid(initial_state, STEPS, rule, rule2)[generations]
+        assert np.array_equal(hashlife.rows_at(generations), expected), (rule, rule2, generations)
+
+def test_advances_in_several_calls(generator):
+    initial_state = generator.integers(0, 2, 257).astype(bool)
+    hashlife = HashlifeAutomaton(257, 110, initial_state=initial_state)
+    expected = direct_grid(initial_state, STEPS, 110)
+    for generation in (1, 64, 65, 200, STEPS):
+        assert np.array_equal(hashlife.advance(generation - hashlife.get_generation()), expected[generation])
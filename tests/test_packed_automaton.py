@@ -0,0 +1,34 @@
+# File: test_packed_automaton.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: PackedCellularAutomaton against the reference 'dict' engine.
+
+import numpy as np
+import pytest
+
+from conftest import SIZES, composite_partner, reference_grid
+from packed_automaton import PackedCellularAutomaton
+
+STEPS = 12
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('composed', (False, True))
+def test_matches_dict_engine(size, composed, generator):
+    for rule in range(256):
+        rule2 = composite_partner(rule) if composed else None
+        initial_state = generator.integers(0, 2, size).astype(bool)
+
+        packed = PackedCellularAutomaton(size, STEPS, rule, rule2)
+        packed.set_initial_state(initial_state)
+        packed.run()
+
+        assert np.array_equal(packed.get_grid(), reference_grid(initial_state, STEPS, rule, rule2)), (rule, rule2)
+
+def test_rows_are_packed(generator):
+    size = 130
+    initial_state = generator.integers(0, 2, size).astype(bool)
+    packed = PackedCellularAutomaton(size, STEPS, 110)
+    packed.set_initial_state(initial_state)
+    packed.run()
+    assert np.array_equal(packed.get_row(-1), reference_grid(initial_state, STEPS, 110)[-1])
+    assert packed.get_nbytes() < (STEPS + 1) * size
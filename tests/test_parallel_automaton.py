@@ -0,0 +1,42 @@
+# File: test_parallel_automaton.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: ParallelCellularAutomaton against the reference 'dict' engine, for several numbers
+#              of workers and halos, and its behavior when a worker dies.
+
+import multiprocessing
+import os
+import signal
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import SIZES, reference_grid
+from parallel_automaton import ParallelCellularAutomaton
+
+STEPS = 70
+GENERATIONS = [0, 1, 5, 64, 65, STEPS]
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('workers', (1, 2, 3))
+def test_matches_dict_engine(size, workers, generator):
+    for rule, rule2 in ((30, None), (110, None), (90, 30), tuple(int(rule) for rule in generator.integers(0, 256, 2))):
+        initial_state = generator.integers(0, 2, size).astype(bool)
+        expected = reference_grid(initial_state, STEPS, rule, rule2)[GENERATIONS]
+        # Halos menores e maiores que o anel (que então dá mais de uma volta no anel)
+        for halo_steps in (1, 3, 64):
+            with ParallelCellularAutomaton(size, rule, rule2, workers=workers, initial_state=initial_state,
+                                           halo_steps=halo_steps, tile_cells=7) as parallel:
+                assert np.array_equal(parallel.rows_at(GENERATIONS), expected), (rule, rule2, halo_steps)
+
+def test_dead_worker_raises():
+    automaton = ParallelCellularAutomaton(2 * 10**6, 30, workers=2)
+    worker = multiprocessing.active_children()[0]
+    threading.Timer(0.5, os.kill, (worker.pid, signal.SIGKILL)).start()
+    with pytest.raises(ValueError):
+        automaton.advance(10**5)
+    # O autômato foi fechado: os outros workers pararam
+    assert not any(process.is_alive() for process in multiprocessing.active_children())
+    with pytest.raises(ValueError):
+        automaton.advance(1)
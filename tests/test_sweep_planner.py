@@ -0,0 +1,112 @@
+# File: test_sweep_planner.py
+# Creation: 18/10/2026
+# Last update: 18/10/2026
+# Description: Deduplicated sweeps against sweeps that simulate every pair: the derived grids and
+#              the PNG files must be byte for byte the ones of the directly simulated pairs, from
+#              symmetric initial rows; from asymmetric rows nothing is derived.
+
+import os
+
+import numpy as np
+import pytest
+
+from automaton import CellularAutomaton
+from instrumentation import Instrumentation
+from result_store import ResultBuffer
+from simulation import Simulation
+from simulation_type import SimulationType
+from sweep_planner import TRANSFORMS, derive_grid, plan_sweep, row_symmetries, symmetric_row, transform_rule
+
+STEPS = 40
+
+def symmetric_rows(size: int):
+    """
+    Initial rows the planner derives from: alternating cells, a single centered cell and a random symmetric row.
+    """
+    center = np.zeros(size, dtype=bool)
+    center[size // 2] = True
+    np.random.seed(size)
+    return {'alternating': np.arange(size) % 2 == 1, 'center': center, 'random': symmetric_row(size)}
+
+def sweep_pairs():
+    """
+    Every single rule, and every composition of the rules equivalent to a few chosen ones (a set closed under the
+    transformations, so each composed pair also has equivalents in the sweep).
+    """
+    rules = sorted({equivalent for rule in (30, 54, 90, 110)
+                    for equivalent in [rule] + [transform_rule(rule, transform) for transform in TRANSFORMS]})
+    return [(rule, None) for rule in range(256)] + [(rule, rule2) for rule in rules for rule2 in rules]
+
+def direct_grid(initial_state, rule: int, rule2: int = None):
+    ca = CellularAutomaton(len(initial_state), STEPS, rule, rule2, begin_type='fixed')
+    ca.set_initial_state(initial_state)
+    ca.run()
+    return ca.get_grid().copy()
+
+def sweep(mode: str, size: int, **settings):
+    """
+    Run a sweep into a ResultBuffer and return the grids by pair and the number of simulated pairs.
+    """
+    store = ResultBuffer()
+    instrumentation = Instrumentation()
+    Simulation(SimulationType(mode, execs=1), size=size, steps=STEPS, store=store, instrumentation=instrumentation, **settings).run()
+    grids = {(int(rule), None if rule2 < 0 else int(rule2)): packed for packed, (rule, rule2, _, _, _, _) in store.get_records()}
+    return grids, instrumentation.get_state()['counters']['runs']
+
+def png_files(directory):
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            with open(os.path.join(root, name), 'rb') as file:
+                files[os.path.relpath(os.path.join(root, name), directory)] = file.read()
+    return files
+
+@pytest.mark.parametrize('size', (63, 64))
+@pytest.mark.parametrize('row', ('alternating', 'center', 'random'))
+def test_derived_grids_match_direct_grids(size, row):
+    initial_state = symmetric_rows(size)[row]
+    pairs = sweep_pairs()
+    plan = plan_sweep(pairs, initial_state)
+
+    # Cada par aparece exatamente uma vez, simulado ou derivado
+    listed = [pair for simulated, derived in plan for pair in [simulated] + [equivalent for equivalent, _, _ in derived]]
+    assert sorted(listed, key=str) == sorted(pairs, key=str)
+    assert any(derived for _, derived in plan)
+
+    for pair, derived in plan:
+        grid = direct_grid(initial_state, *pair)
+        for equivalent, transform, shift in derived:
+            assert derive_grid(grid, transform, shift).tobytes() == direct_grid(initial_state, *equivalent).tobytes(), (pair, equivalent)
+
+@pytest.mark.parametrize('size', (63, 64))
+def test_asymmetric_row_derives_nothing(size, generator):
+    initial_state = generator.integers(0, 2, size).astype(bool)
+    assert not row_symmetries(initial_state)
+    assert all(not derived for _, derived in plan_sweep(sweep_pairs(), initial_state))
+
+    with pytest.raises(ValueError):
+        Simulation(SimulationType('all', execs=1), size=size, steps=STEPS, initial_state=initial_state, dedup=True).run(save=False)
+
+@pytest.mark.parametrize('mode', ('all', 'custom-3-4'))
+@pytest.mark.parametrize('batch_size', (None, 32))
+@pytest.mark.parametrize('size', (63, 64))
+def test_default_dedup_sweep_matches_full_sweep(mode, batch_size, size):
+    grids, runs = sweep(mode, size, seed=1, dedup=True, batch_size=batch_size)
+    # Sem 'initial_state', a linha sorteada é simétrica e o planejador deriva parte dos pares
+    initial_state = np.unpackbits(next(iter(grids.values()))[0], count=size).astype(bool)
+    assert row_symmetries(initial_state)
+    assert runs < len(grids)
+
+    reference, reference_runs = sweep(mode, size, initial_state=initial_state)
+    assert reference_runs == len(reference)
+    assert {pair: grid.tobytes() for pair, grid in grids.items()} == {pair: grid.tobytes() for pair, grid in reference.items()}
+
+@pytest.mark.parametrize('row', ('alternating', 'center', 'random'))
+def test_dedup_sweep_writes_the_same_images(row):
+    initial_state = symmetric_rows(32)[row]
+    for dedup in (True, False):
+        Simulation(SimulationType('all', execs=1), scale=1, size=32, steps=STEPS, initial_state=initial_state, dedup=dedup).run()
+
+    deduplicated, full = png_files('../results/exec_0'), png_files('../results/exec_1')
+    assert len(full) == 256
+    assert deduplicated == full